@@ -1,7 +1,7 @@
 from flask import Flask, render_template, request, jsonify
 from pdcp_entity import PDCPTransmitter, PDCPReceiver
 from channel_simulator import ChannelSimulator
-from crypto_stub import generate_cipher_key, encrypt, decrypt
+from crypto_stub import generate_cipher_key, encrypt, decrypt, cipher_cache_stats
 from config import CIPHERING_ENABLED
 
 # No longer need matplotlib here
@@ -65,7 +65,8 @@ def simulate():
             'plaintext': plaintext_text,
             'ciphertext': ciphertext_hex,
             'deciphered': deciphered_text,
-            'eavesdrop': eavesdrop_hex
+            'eavesdrop': eavesdrop_hex,
+            'cipher_cache': cipher_cache_stats()
         }
         print(f"Sending response: {response}")
         return jsonify(response)
@@ -0,0 +1,80 @@
+import argparse
+import json
+import os
+import time
+
+from pdcp_entity import PDCPTransmitter, PDCPReceiver
+from crypto_stub import generate_cipher_key
+
+BEARER, DIRECTION = 5, 0
+
+
+def _run_sync(key, sdus) -> float:
+    transmitter = PDCPTransmitter(BEARER, DIRECTION, key, True)
+    receiver = PDCPReceiver(BEARER, DIRECTION, key, True)
+    start = time.perf_counter()
+    for sdu in sdus:
+        receiver.receive_pdu(transmitter.send_sdu(sdu))
+    return time.perf_counter() - start
+
+
+def _run_pipelined(key, sdus, workers, batch_size, max_in_flight, use_processes) -> float:
+    transmitter = PDCPTransmitter(BEARER, DIRECTION, key, True)
+    receiver = PDCPReceiver(BEARER, DIRECTION, key, True)
+    transmitter.start_pipeline(workers, batch_size, max_in_flight, use_processes)
+    receiver.start_pipeline(workers, batch_size, max_in_flight, use_processes)
+    start = time.perf_counter()
+    delivered = []
+    for sdu in sdus:
+        for pdu in transmitter.submit_sdu(sdu):
+            delivered += receiver.submit_pdu(pdu)
+    for pdu in transmitter.flush_pipeline():
+        delivered += receiver.submit_pdu(pdu)
+    delivered += receiver.flush_pipeline()
+    elapsed = time.perf_counter() - start
+    transmitter.stop_pipeline()
+    receiver.stop_pipeline()
+    assert [pdu.deciphered_payload for pdu in delivered] == sdus
+    return elapsed
+
+
+def run_benchmark(num_sdus: int, sdu_size: int, worker_counts: list, batch_size: int,
+                  max_in_flight: int = 0, use_processes: bool = False) -> dict:
+    """TX+RX ciphering throughput (SDUs/s): synchronous send_sdu/receive_pdu vs. the pipeline per worker count."""
+    key = generate_cipher_key()
+    sdus = [os.urandom(sdu_size) for _ in range(num_sdus)]
+    sync_time = _run_sync(key, sdus)
+    results = {"cpus": os.cpu_count(), "sdu_size": sdu_size, "batch_size": batch_size,
+               "pool": "process" if use_processes else "thread",
+               "sync_sdus_per_s": num_sdus / sync_time, "pipelined": []}
+    for workers in worker_counts:
+        elapsed = _run_pipelined(key, sdus, workers, batch_size, max_in_flight, use_processes)
+        results["pipelined"].append({"workers": workers, "sdus_per_s": num_sdus / elapsed,
+                                     "speedup_vs_sync": sync_time / elapsed})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipelined PDCP ciphering against send_sdu/receive_pdu")
+    parser.add_argument("--sdus", type=int, default=20000)
+    parser.add_argument("--sdu-size", type=int, default=1500)
+    parser.add_argument("--workers", type=str, default="1,2,4,8", help="Comma-separated worker counts")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--max-in-flight", type=int, default=0, help="0 = 2 batches per worker")
+    parser.add_argument("--processes", action="store_true", help="Process pool instead of threads")
+    parser.add_argument("--output", type=str, default=None, help="Write the results JSON here")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.sdus, args.sdu_size, [int(w) for w in args.workers.split(",")],
+                            args.batch_size, args.max_in_flight, args.processes)
+    print(f"{results['cpus']} CPUs, {args.sdu_size}-byte SDUs, {results['pool']} pool, batches of {args.batch_size}")
+    print(f"sync: {results['sync_sdus_per_s']:.0f} SDUs/s")
+    for r in results["pipelined"]:
+        print(f"{r['workers']:>3} workers: {r['sdus_per_s']:.0f} SDUs/s ({r['speedup_vs_sync']:.2f}x)")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import collections
+import threading
+import numpy as np
+from Cryptodome.Cipher import AES
+
+BLOCK_SIZE = 16
+
+class CipherContext:
+    """
+    The per-key work that does not change from PDU to PDU: the expanded AES key schedule, held by
+    an ECB cipher object that the CTR keystreams are built on. Safe to share between threads.
+    """
+
+    def __init__(self, key: bytes):
+        self.key = key
+        self.ecb = AES.new(key, AES.MODE_ECB)
+        # Counter halves of CTR blocks 0, 1, 2, ... (9-byte big-endian counters), grown on demand
+        self._counters = np.zeros((0, BLOCK_SIZE), dtype=np.uint8)
+
+    def key_stream(self, nonce: bytes, length: int) -> bytes:
+        """AES-CTR keystream for a 7-byte `nonce` with the 9-byte block counter starting at 0."""
+        num_blocks = (length + BLOCK_SIZE - 1) // BLOCK_SIZE
+        counters = self._counters
+        if len(counters) < num_blocks:
+            counters = np.zeros((max(num_blocks, 2 * len(counters)), BLOCK_SIZE), dtype=np.uint8)
+            counters[:, 8:] = np.arange(len(counters), dtype='>u8').view(np.uint8).reshape(-1, 8)
+            self._counters = counters # Replaced, never modified, so readers in other threads are unaffected
+        blocks = counters[:num_blocks].copy()
+        blocks[:, :len(nonce)] = np.frombuffer(nonce, dtype=np.uint8)
+        return self.ecb.encrypt(blocks.tobytes())[:length]
+
+
+class CipherContextCache:
+    """
+    LRU cache of CipherContexts keyed by cipher key, bounded to `max_entries`. A bearer whose key
+    never changes sets up its AES key schedule once instead of once per PDU. Thread-safe;
+    hit/miss counters are reported by stats().
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._contexts = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: bytes) -> CipherContext:
+        cache_key = bytes(key)
+        with self._lock:
+            context = self._contexts.get(cache_key)
+            if context is not None:
+                self._contexts.move_to_end(cache_key)
+                self.hits += 1
+                return context
+            self.misses += 1
+            context = CipherContext(cache_key)
+            self._contexts[cache_key] = context
+            if len(self._contexts) > self.max_entries:
+                self._contexts.popitem(last=False)
+                self.evictions += 1
+            return context
+
+    def clear(self):
+        with self._lock:
+            self._contexts.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._contexts),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Shared by the crypto functions, so every PDCP entity in the process benefits
+default_cache = CipherContextCache()
+
+def get_context(key: bytes) -> CipherContext:
+    return default_cache.get(key)
+
+def cache_stats() -> dict:
+    return default_cache.stats()
@@ -0,0 +1,91 @@
+import collections
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from crypto_stub import encrypt_batch, decrypt_batch
+
+class CipheringPipeline:
+    """
+    Ciphers (or, with decipher=True, deciphers) one bearer's PDUs in batches on a pool of workers
+    while the caller keeps producing. put() collects PDUs into batches of `batch_size` and hands
+    each full batch to the pool; batches may finish in any order, but results are only released
+    in submission order, so the output stays in COUNT order.
+    Backpressure: at most `max_in_flight` batches are queued or running. Beyond that, put()
+    waits for the oldest batch before submitting the next, so a producer faster than the pool
+    is slowed down to the pool's pace instead of growing the queue.
+    Threads by default: AES (pycryptodome) and the NumPy XOR run without the GIL, and nothing has
+    to be pickled. use_processes=True uses worker processes, each with its own cipher context cache.
+    """
+    def __init__(self, cipher_key: bytes, bearer: int, direction: int, decipher: bool = False,
+                 workers: int = None, batch_size: int = 64, max_in_flight: int = None, use_processes: bool = False):
+        self.cipher_key = cipher_key
+        self.bearer = bearer
+        self.direction = direction
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight or 2 * self.workers
+        self._cipher = decrypt_batch if decipher else encrypt_batch
+        executor = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self._executor = executor(max_workers=self.workers)
+        self._batch = []  # (COUNT, payload) pairs not yet submitted
+        self._tags = []   # Caller's tag for each of them, returned with its result
+        self._in_flight = collections.deque()  # (tags, future) per submitted batch, oldest first
+        self.backpressure_waits = 0  # How often put() had to wait for the pool
+
+    def put(self, count: int, payload: bytes, tag=None) -> list:
+        """
+        Adds one PDU. Returns the (tag, ciphered payload) pairs now available in order,
+        usually empty until a batch completes.
+        """
+        self._batch.append((count, payload))
+        self._tags.append(tag)
+        if len(self._batch) < self.batch_size:
+            return []
+        return self._submit()
+
+    def _submit(self) -> list:
+        ready = []
+        if len(self._in_flight) >= self.max_in_flight:
+            self.backpressure_waits += 1
+            ready.extend(self._pop_oldest()) # Blocks until the oldest batch is done
+        future = self._executor.submit(self._cipher, self.cipher_key, self.bearer, self.direction, self._batch)
+        self._in_flight.append((self._tags, future))
+        self._batch, self._tags = [], []
+        ready.extend(self.poll())
+        return ready
+
+    def _pop_oldest(self) -> list:
+        tags, future = self._in_flight.popleft()
+        return list(zip(tags, future.result())) # Re-raises a worker's exception here
+
+    def poll(self) -> list:
+        """(tag, ciphered payload) pairs of the finished batches at the head of the queue, without blocking."""
+        ready = []
+        while self._in_flight and self._in_flight[0][1].done():
+            ready.extend(self._pop_oldest())
+        return ready
+
+    def flush(self) -> list:
+        """Submits the partial batch and waits for everything in flight. Returns the remaining pairs in order."""
+        ready = self._submit() if self._batch else []
+        while self._in_flight:
+            ready.extend(self._pop_oldest())
+        return ready
+
+    def rekey(self, cipher_key: bytes, bearer: int) -> list:
+        """
+        flush() with the current key and bearer (PDUs already put got their COUNT under them),
+        then uses the new ones for everything put afterwards. Returns the flushed pairs in order.
+        """
+        ready = self.flush()
+        self.cipher_key = cipher_key
+        self.bearer = bearer
+        return ready
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
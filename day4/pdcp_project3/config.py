@@ -4,4 +4,13 @@ CIPHER_KEY_LENGTH_BYTES = 16
 INTEGRITY_ENABLED_FOR_DRB = True
 TAMPERING_RATE = 0.01  # Probability of packet tampering in channel
 SN_LENGTH = 12  # 12-bit SN for simulation
-MAX_SN = 2**SN_LENGTH - 1
\ No newline at end of file
+MAX_SN = 2**SN_LENGTH - 1
+
+# Pipelined ciphering (PDCPTransmitter/PDCPReceiver.start_pipeline)
+PIPELINE_WORKERS = 0  # 0 = one per CPU
+PIPELINE_BATCH_SIZE = 64  # PDUs per batch handed to a worker
+PIPELINE_MAX_IN_FLIGHT = 0  # Batches queued or running before the producer waits; 0 = 2 per worker
+
+# Keystream precomputation ahead of TX_NEXT (PDCPTransmitter)
+KEYSTREAM_RING_SIZE = 0  # COUNTs whose keystream is kept ready (e.g. 64); 0 = off, cipher every SDU on demand
+KEYSTREAM_MAX_SDU_SIZE = 1500  # Keystream length per COUNT; longer SDUs (up to 9000 bytes, TS 38.323) are ciphered on demand
@@ -1,5 +1,9 @@
-from Cryptodome.Cipher import AES
+import numpy as np
 from Cryptodome.Random import get_random_bytes
+from cipher_cache import get_context, cache_stats as cipher_cache_stats # Re-exported for the entities/app
+
+AES_BLOCK_SIZE = 16
+_ZERO_BLOCK = bytes(AES_BLOCK_SIZE)
 
 def generate_cipher_key(length_bytes=16):
     return get_random_bytes(length_bytes)
@@ -16,12 +20,9 @@ def _generate_key_stream(cipher_key: bytes, count: int, bearer: int, direction:
     direction_byte = direction.to_bytes(1, 'big')
     nonce = count_bytes + bearer_byte + direction_byte + b'\x00' * 1  # Total 7 bytes
 
-    # AES in CTR mode for key stream generation
-    # Let pycryptodome handle the counter (remaining 9 bytes of the 16-byte block)
-    cipher = AES.new(cipher_key, AES.MODE_CTR, nonce=nonce)
-
-    # Generate enough key stream for the plaintext
-    key_stream = cipher.encrypt(b'\x00' * length_needed)
+    # AES in CTR mode for key stream generation: counter in the remaining 9 bytes of the 16-byte block,
+    # encrypted with the key's cached AES key schedule rather than a new cipher object per PDU
+    key_stream = get_context(cipher_key).key_stream(nonce, length_needed)
     return key_stream
 
 def encrypt(cipher_key: bytes, count: int, bearer: int, direction: int, plaintext: bytes) -> bytes:
@@ -29,7 +30,7 @@ def encrypt(cipher_key: bytes, count: int, bearer: int, direction: int, plaintex
     Ciphering function: XORs plaintext with generated key stream.
     """
     key_stream = _generate_key_stream(cipher_key, count, bearer, direction, len(plaintext))
-    ciphertext = bytes(p ^ k for p, k in zip(plaintext, key_stream))
+    ciphertext = _xor(plaintext, key_stream)
     return ciphertext
 
 def decrypt(cipher_key: bytes, count: int, bearer: int, direction: int, ciphertext: bytes) -> bytes:
@@ -38,5 +39,80 @@ def decrypt(cipher_key: bytes, count: int, bearer: int, direction: int, cipherte
     (Same operation as encrypt for stream ciphers like CTR).
     """
     key_stream = _generate_key_stream(cipher_key, count, bearer, direction, len(ciphertext))
-    plaintext = bytes(c ^ k for c, k in zip(ciphertext, key_stream))
-    return plaintext
\ No newline at end of file
+    plaintext = _xor(ciphertext, key_stream)
+    return plaintext
+
+def generate_key_streams(cipher_key: bytes, bearer: int, direction: int, counts: list, length: int) -> list:
+    """
+    Keystreams of `length` bytes for many COUNTs of one bearer, each identical to what encrypt()
+    would use for that COUNT, from a single AES-ECB call.
+    """
+    if not counts:
+        return []
+    counts = np.asarray(counts, dtype=np.int64)
+    blocks, first_block = _counter_blocks(counts, bearer, direction, np.full(len(counts), length, dtype=np.int64))
+    key_streams = get_context(cipher_key).ecb.encrypt(blocks.tobytes())
+    stride = len(key_streams) // len(counts)
+    return [key_streams[i * stride:i * stride + length] for i in range(len(counts))]
+
+def apply_key_stream(data: bytes, key_stream: bytes) -> bytes:
+    """Ciphers or deciphers `data` with a precomputed keystream at least as long (e.g. from generate_key_streams())."""
+    return _xor(data, key_stream)
+
+def _xor(data: bytes, key_stream: bytes) -> bytes:
+    # Whole-buffer XOR as one big-integer operation instead of a Python loop over bytes
+    n = len(data)
+    if len(key_stream) < n:
+        # Would leave the tail of `data` unciphered
+        raise ValueError(f"Keystream of {len(key_stream)} bytes is shorter than the {n}-byte data")
+    return (int.from_bytes(data, 'big') ^ int.from_bytes(key_stream[:n], 'big')).to_bytes(n, 'big')
+
+def _counter_blocks(counts: np.ndarray, bearer: int, direction: int, lengths: np.ndarray):
+    """
+    The CTR counter blocks _generate_key_stream() would encrypt for each (COUNT, length), back to
+    back: 7-byte nonce (COUNT, BEARER, DIRECTION, padding) + 9-byte big-endian block counter from 0.
+    Returns (blocks as an (n_blocks, 2) array of big-endian uint64, index of each PDU's first block).
+    """
+    blocks_per_pdu = (lengths + AES_BLOCK_SIZE - 1) // AES_BLOCK_SIZE
+    first_block = np.zeros(len(lengths), dtype=np.int64)
+    np.cumsum(blocks_per_pdu[:-1], out=first_block[1:])
+    pdu_of_block = np.repeat(np.arange(len(lengths)), blocks_per_pdu)
+    block_counter = np.arange(len(pdu_of_block), dtype=np.int64) - first_block[pdu_of_block]
+
+    # Each block as two big-endian 64-bit words: COUNT | BEARER | DIRECTION | 0 | 0, then the counter's low 8 bytes
+    prefixes = (counts.astype(np.uint64) << np.uint64(32)) | np.uint64((bearer << 24) | (direction << 16))
+    blocks = np.empty((len(pdu_of_block), 2), dtype='>u8')
+    blocks[:, 0] = prefixes[pdu_of_block]
+    blocks[:, 1] = block_counter
+    return blocks, first_block
+
+def _cipher_batch(cipher_key: bytes, bearer: int, direction: int, pdus: list) -> list:
+    # CTR keystream for every PDU from one AES-ECB call over all their counter blocks, then one
+    # NumPy XOR over all payloads laid end to end
+    if not pdus:
+        return []
+    counts = np.fromiter((count for count, _ in pdus), dtype=np.int64, count=len(pdus))
+    payloads = [payload for _, payload in pdus]
+    lengths = np.fromiter((len(p) for p in payloads), dtype=np.int64, count=len(pdus))
+    blocks, first_block = _counter_blocks(counts, bearer, direction, lengths)
+    key_stream = np.frombuffer(get_context(cipher_key).ecb.encrypt(blocks.tobytes()), dtype=np.uint8)
+
+    # Payloads laid out on the keystream's block grid (each padded to whole blocks), so the XOR is
+    # one NumPy operation over two equally long buffers and each result is a plain slice of it
+    padded = b''.join([p + _ZERO_BLOCK[:-len(p) % AES_BLOCK_SIZE] if len(p) % AES_BLOCK_SIZE else p for p in payloads])
+    out = np.bitwise_xor(np.frombuffer(padded, dtype=np.uint8), key_stream).tobytes()
+    starts = (first_block * AES_BLOCK_SIZE).tolist()
+    return [out[start:start + length] for start, length in zip(starts, lengths.tolist())]
+
+def encrypt_batch(cipher_key: bytes, bearer: int, direction: int, pdus: list) -> list:
+    """
+    Ciphers many PDUs of one bearer in a single call: `pdus` is a list of (COUNT, plaintext)
+    pairs, the result the list of ciphertexts, each identical to encrypt() for that COUNT.
+    """
+    return _cipher_batch(cipher_key, bearer, direction, pdus)
+
+def decrypt_batch(cipher_key: bytes, bearer: int, direction: int, pdus: list) -> list:
+    """
+    Batch form of decrypt(): `pdus` is a list of (COUNT, ciphertext) pairs.
+    """
+    return _cipher_batch(cipher_key, bearer, direction, pdus)
\ No newline at end of file
@@ -0,0 +1,134 @@
+import collections
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from crypto_stub import generate_key_streams
+
+COUNT_MODULUS = 2**32
+
+# One background thread refills every ring in the process, so idle transmitters hold no thread
+_refill_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="keystream-refill")
+
+class KeystreamRing:
+    """
+    Keystreams precomputed for the COUNTs a transmitter will use next. At the transmitter COUNT
+    is known in advance (TX_NEXT, TX_NEXT + 1, ...), so the AES work can be done before the SDUs
+    arrive: the ring holds up to `size` keystreams of `max_sdu_size` bytes for consecutive COUNTs,
+    and is topped up in the background once it is half empty (with background=False only by
+    fill()). take() then only has to hand out the next one, and ciphering at send time is a
+    single XOR.
+
+    Each keystream is only valid for the (key, bearer, direction) it was generated with, which
+    take() is given every time: when they differ from the ring's, or the COUNT asked for is not
+    the expected next one (e.g. TX_NEXT was moved), everything precomputed is discarded and the
+    ring restarts from there. A refill already running when that happens belongs to an older
+    generation, and its keystreams are dropped instead of being added.
+    """
+    def __init__(self, cipher_key: bytes, bearer: int, direction: int, start_count: int = 0,
+                 size: int = 64, max_sdu_size: int = 1500, background: bool = True):
+        if size < 1 or max_sdu_size < 1:
+            raise ValueError("size and max_sdu_size must be positive")
+        self.size = size
+        self.max_sdu_size = max_sdu_size
+        self.background = background
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock) # Notified when a refill finishes
+        self._streams = collections.deque() # Keystreams for COUNT _expected, _expected + 1, ...
+        self._refilling = False
+        self._generation = 0 # Bumped by every reset; a refill started under an older one is discarded
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+        with self._lock:
+            self._reset((cipher_key, bearer, direction), start_count)
+
+    def _reset(self, params: tuple, start_count: int):
+        # Caller holds self._lock
+        self.discarded += len(self._streams)
+        self._streams.clear()
+        self._params = params
+        self._generation += 1
+        self._expected = start_count % COUNT_MODULUS   # COUNT the next take() should ask for
+        self._next_count = self._expected              # First COUNT not yet generated
+        self._schedule_refill()
+
+    def _schedule_refill(self, force: bool = False):
+        # Caller holds self._lock
+        if self.background and not self._refilling and (force or len(self._streams) <= self.size // 2):
+            self._refilling = True
+            _refill_executor.submit(self._refill)
+
+    def _refill(self):
+        try:
+            while True:
+                with self._lock:
+                    missing = self.size - len(self._streams)
+                    if missing <= 0:
+                        return
+                    generation, (cipher_key, bearer, direction) = self._generation, self._params
+                    # Start at the consumer if it has overtaken what was generated
+                    ahead = (self._next_count - self._expected) % COUNT_MODULUS < COUNT_MODULUS // 2
+                    start = self._next_count if ahead else self._expected
+                counts = [(start + i) % COUNT_MODULUS for i in range(missing)]
+                key_streams = generate_key_streams(cipher_key, bearer, direction, counts, self.max_sdu_size)
+                with self._lock:
+                    if generation != self._generation:
+                        self.discarded += len(key_streams)
+                        continue # Reset while generating: these are for the old key/bearer/COUNT
+                    # Drop the ones for COUNTs taken (as misses) while they were being generated
+                    behind = (self._expected - start) % COUNT_MODULUS
+                    skip = min(behind, missing) if behind < COUNT_MODULUS // 2 else 0
+                    self.discarded += skip
+                    self._streams.extend(key_streams[skip:])
+                    self._next_count = (start + missing) % COUNT_MODULUS
+        finally:
+            with self._lock:
+                self._refilling = False
+                self._idle.notify_all()
+
+    def take(self, count: int, length: int, cipher_key: bytes, bearer: int, direction: int):
+        """
+        Keystream (max_sdu_size bytes) for `count`, or None if it is not ready, or the SDU is
+        longer than max_sdu_size; the caller then ciphers the SDU itself.
+        """
+        with self._lock:
+            if (cipher_key, bearer, direction) != self._params or count % COUNT_MODULUS != self._expected:
+                self._reset((cipher_key, bearer, direction), count)
+            self._expected = (self._expected + 1) % COUNT_MODULUS
+            key_stream = self._streams.popleft() if self._streams else None
+            self._schedule_refill()
+            if key_stream is None or length > self.max_sdu_size:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return key_stream
+
+    def invalidate(self, cipher_key: bytes, bearer: int, direction: int, start_count: int):
+        """Discards everything precomputed and restarts from `start_count` with the given key/bearer/direction."""
+        with self._lock:
+            self._reset((cipher_key, bearer, direction), start_count)
+
+    def fill(self, timeout: float = None) -> bool:
+        """Blocks until the ring is full (refilling in this thread if background=False). Returns False on timeout."""
+        with self._lock:
+            if not self.background and not self._refilling:
+                self._refilling = True
+                self._lock.release()
+                try:
+                    self._refill()
+                finally:
+                    self._lock.acquire()
+            self._schedule_refill(force=True)
+            return self._idle.wait_for(lambda: not self._refilling and len(self._streams) >= self.size, timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            taken = self.hits + self.misses
+            return {
+                "size": self.size,
+                "max_sdu_size": self.max_sdu_size,
+                "ready": len(self._streams),
+                "hits": self.hits,
+                "misses": self.misses,
+                "discarded": self.discarded,
+                "hit_rate": self.hits / taken if taken else 0.0,
+            }
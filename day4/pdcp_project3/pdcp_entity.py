@@ -1,14 +1,24 @@
 from pdcp_packet import PDCP_PDU
-from crypto_stub import encrypt, decrypt
-from config import SN_LENGTH, MAX_SN
+from crypto_stub import encrypt, decrypt, apply_key_stream
+from cipher_pipeline import CipheringPipeline
+from keystream_ring import KeystreamRing
+from config import (SN_LENGTH, MAX_SN, PIPELINE_WORKERS, PIPELINE_BATCH_SIZE, PIPELINE_MAX_IN_FLIGHT,
+                    KEYSTREAM_RING_SIZE, KEYSTREAM_MAX_SDU_SIZE)
 
 class PDCPTransmitter:
-    def __init__(self, bearer_id: int, direction: int, cipher_key: bytes, ciphering_enabled: bool):
+    def __init__(self, bearer_id: int, direction: int, cipher_key: bytes, ciphering_enabled: bool,
+                 keystream_ring_size: int = KEYSTREAM_RING_SIZE, max_sdu_size: int = KEYSTREAM_MAX_SDU_SIZE):
         self.bearer_id = bearer_id
         self.direction = direction
         self.cipher_key = cipher_key
         self.ciphering_enabled = ciphering_enabled
         self.tx_next = 0
+        self.pipeline = None
+        # Keystreams for TX_NEXT onwards, precomputed in the background (None, the default = cipher on demand)
+        self.keystream_ring = None
+        if ciphering_enabled and keystream_ring_size > 0:
+            self.keystream_ring = KeystreamRing(cipher_key, bearer_id, direction, start_count=self.tx_next,
+                                                size=keystream_ring_size, max_sdu_size=max_sdu_size)
 
     def send_sdu(self, sdu_payload: bytes):
         hfn = self.tx_next >> SN_LENGTH
@@ -16,13 +26,85 @@ class PDCPTransmitter:
         count = self.tx_next
         payload_to_cipher = sdu_payload
         if self.ciphering_enabled:
-            ciphered_payload = encrypt(self.cipher_key, count, self.bearer_id, self.direction, payload_to_cipher)
+            key_stream = None
+            if self.keystream_ring is not None:
+                # The ring checks key/bearer/direction/COUNT against what it precomputed for
+                key_stream = self.keystream_ring.take(count, len(payload_to_cipher), self.cipher_key,
+                                                      self.bearer_id, self.direction)
+            if key_stream is not None:
+                ciphered_payload = apply_key_stream(payload_to_cipher, key_stream)
+            else:
+                ciphered_payload = encrypt(self.cipher_key, count, self.bearer_id, self.direction, payload_to_cipher)
         else:
             ciphered_payload = payload_to_cipher
         pdu = PDCP_PDU(sn, hfn, count, ciphered_payload)
         self.tx_next = (self.tx_next + 1) % (2 ** 32)
         return pdu
 
+    def set_key(self, cipher_key: bytes) -> list:
+        """
+        New cipher key from the next SDU on. Keystreams precomputed with the old one are discarded.
+        A running pipeline is flushed first (its SDUs are ciphered with the old key); the PDUs
+        flushed are returned in COUNT order (empty without a pipeline).
+        """
+        pdus = self._rekey(cipher_key, self.bearer_id)
+        self.cipher_key = cipher_key
+        self._invalidate_keystreams()
+        return pdus
+
+    def set_bearer(self, bearer_id: int) -> list:
+        """As set_key(), for a new bearer identity."""
+        pdus = self._rekey(self.cipher_key, bearer_id)
+        self.bearer_id = bearer_id
+        self._invalidate_keystreams()
+        return pdus
+
+    def _rekey(self, cipher_key: bytes, bearer_id: int) -> list:
+        if self.pipeline is None:
+            return []
+        return self._ready(self.pipeline.rekey(cipher_key, bearer_id))
+
+    def _invalidate_keystreams(self):
+        # take() would notice the change too; this starts precomputing for the new one right away
+        if self.keystream_ring is not None:
+            self.keystream_ring.invalidate(self.cipher_key, self.bearer_id, self.direction, self.tx_next)
+
+    def start_pipeline(self, workers: int = PIPELINE_WORKERS, batch_size: int = PIPELINE_BATCH_SIZE,
+                       max_in_flight: int = PIPELINE_MAX_IN_FLIGHT, use_processes: bool = False):
+        """Switches to pipelined ciphering: use submit_sdu()/flush_pipeline() instead of send_sdu()."""
+        self.pipeline = CipheringPipeline(self.cipher_key, self.bearer_id, self.direction,
+                                          workers=workers, batch_size=batch_size,
+                                          max_in_flight=max_in_flight, use_processes=use_processes)
+
+    def submit_sdu(self, sdu_payload: bytes) -> list:
+        """
+        Pipelined send_sdu(): the SDU gets its COUNT now and is ciphered on the pipeline's pool.
+        Returns the PDUs whose ciphering has finished, in COUNT order (often none). Blocks
+        when the pool is max_in_flight batches behind.
+        """
+        count = self.tx_next
+        pdu = PDCP_PDU(count & MAX_SN, count >> SN_LENGTH, count, sdu_payload)
+        self.tx_next = (self.tx_next + 1) % (2 ** 32)
+        # Unciphered SDUs still go through the queue (with nothing to cipher) to keep the order
+        return self._ready(self.pipeline.put(count, sdu_payload if self.ciphering_enabled else b"", pdu))
+
+    def flush_pipeline(self) -> list:
+        """Waits for all SDUs submitted so far; returns their PDUs in COUNT order."""
+        return self._ready(self.pipeline.flush())
+
+    def stop_pipeline(self) -> list:
+        """flush_pipeline(), then shuts the pool down and returns to send_sdu()."""
+        pdus = self.flush_pipeline()
+        self.pipeline.close()
+        self.pipeline = None
+        return pdus
+
+    def _ready(self, results: list) -> list:
+        if self.ciphering_enabled:
+            for pdu, ciphered_payload in results:
+                pdu.payload = ciphered_payload
+        return [pdu for pdu, _ in results]
+
 class PDCPReceiver:
     def __init__(self, bearer_id: int, direction: int, cipher_key: bytes, ciphering_enabled: bool):
         self.bearer_id = bearer_id
@@ -30,6 +112,7 @@ class PDCPReceiver:
         self.cipher_key = cipher_key
         self.ciphering_enabled = ciphering_enabled
         self.rx_deliv = 0
+        self.pipeline = None
 
     def receive_pdu(self, pdu):
         if pdu.is_corrupted:
@@ -41,4 +124,41 @@ class PDCPReceiver:
             deciphered_payload = pdu.payload
         pdu.deciphered_payload = deciphered_payload
         pdu.verified_integrity = True
-        return deciphered_payload
\ No newline at end of file
+        return deciphered_payload
+
+    def start_pipeline(self, workers: int = PIPELINE_WORKERS, batch_size: int = PIPELINE_BATCH_SIZE,
+                       max_in_flight: int = PIPELINE_MAX_IN_FLIGHT, use_processes: bool = False):
+        """Switches to pipelined deciphering: use submit_pdu()/flush_pipeline() instead of receive_pdu()."""
+        self.pipeline = CipheringPipeline(self.cipher_key, self.bearer_id, self.direction, decipher=True,
+                                          workers=workers, batch_size=batch_size,
+                                          max_in_flight=max_in_flight, use_processes=use_processes)
+
+    def submit_pdu(self, pdu) -> list:
+        """
+        Pipelined receive_pdu(): the PDU is deciphered on the pipeline's pool. Returns the PDUs
+        processed so far, in arrival order, with deciphered_payload set as receive_pdu() would
+        (None for corrupted PDUs). Blocks when the pool is max_in_flight batches behind.
+        """
+        rcvd_count = (pdu.hfn << SN_LENGTH) | pdu.sn
+        # Corrupted PDUs still take their place in the queue (with nothing to decipher) to keep the order
+        skip = pdu.is_corrupted or not self.ciphering_enabled
+        return self._ready(self.pipeline.put(rcvd_count, b"" if skip else pdu.payload, pdu))
+
+    def flush_pipeline(self) -> list:
+        """Waits for all PDUs submitted so far; returns them in arrival order."""
+        return self._ready(self.pipeline.flush())
+
+    def stop_pipeline(self) -> list:
+        """flush_pipeline(), then shuts the pool down and returns to receive_pdu()."""
+        pdus = self.flush_pipeline()
+        self.pipeline.close()
+        self.pipeline = None
+        return pdus
+
+    def _ready(self, results: list) -> list:
+        for pdu, deciphered_payload in results:
+            if pdu.is_corrupted:
+                continue
+            pdu.deciphered_payload = deciphered_payload if self.ciphering_enabled else pdu.payload
+            pdu.verified_integrity = True
+        return [pdu for pdu, _ in results]
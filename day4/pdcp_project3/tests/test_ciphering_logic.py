@@ -1,5 +1,6 @@
 import unittest
-from src.crypto_stub import generate_cipher_key, encrypt, decrypt
+from cipher_cache import CipherContextCache
+from crypto_stub import generate_cipher_key, encrypt, decrypt, encrypt_batch, decrypt_batch, apply_key_stream
 
 class TestCipheringLogic(unittest.TestCase):
     def test_encrypt_decrypt(self):
@@ -19,5 +20,47 @@ class TestCipheringLogic(unittest.TestCase):
         deciphered = decrypt(key2, count, bearer, direction, ciphertext)
         self.assertNotEqual(plaintext, deciphered)
 
+    def test_batch_matches_per_pdu(self):
+        key = generate_cipher_key()
+        # Lengths around the AES block size, empty payloads and COUNTs near the 32-bit limit
+        pdus = [(count, bytes((count + i) % 256 for i in range(length)))
+                for count, length in [(0, 12), (1, 0), (2, 15), (3, 16), (4, 17), (2**32 - 1, 1500), (77, 33)]]
+        bearer, direction = 5, 1
+        ciphertexts = encrypt_batch(key, bearer, direction, pdus)
+        self.assertEqual(ciphertexts, [encrypt(key, count, bearer, direction, p) for count, p in pdus])
+        self.assertEqual(decrypt_batch(key, bearer, direction, [(count, c) for (count, _), c in zip(pdus, ciphertexts)]),
+                         [p for _, p in pdus])
+        self.assertEqual(encrypt_batch(key, bearer, direction, []), [])
+
+class TestCipherContextCache(unittest.TestCase):
+    def test_lru_eviction_and_hit_rate(self):
+        cache = CipherContextCache(max_entries=2)
+        key_a, key_b, key_c = generate_cipher_key(), generate_cipher_key(), generate_cipher_key()
+        context_a = cache.get(key_a)
+        self.assertIs(cache.get(key_a), context_a)
+        cache.get(key_b)
+        cache.get(key_a)
+        cache.get(key_c) # Evicts key_b, the least recently used
+        self.assertIs(cache.get(key_a), context_a)
+        cache.get(key_b) # Evicts key_c
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["hits"], stats["misses"], stats["evictions"]), (2, 3, 4, 2))
+        self.assertAlmostEqual(stats["hit_rate"], 3 / 7)
+
+    def test_cached_key_stream_matches_encrypt(self):
+        cache = CipherContextCache()
+        key = generate_cipher_key()
+        plaintext = bytes(range(200))
+        nonce = (7).to_bytes(4, 'big') + bytes([5, 1, 0])
+        key_stream = cache.get(key).key_stream(nonce, len(plaintext))
+        self.assertEqual(bytes(p ^ k for p, k in zip(plaintext, key_stream)), encrypt(key, 7, 5, 1, plaintext))
+
+    def test_apply_key_stream_rejects_short_key_stream(self):
+        key_stream = CipherContextCache().get(generate_cipher_key()).key_stream(bytes(7), 32)
+        self.assertEqual(apply_key_stream(b"x" * 20, key_stream), apply_key_stream(b"x" * 20, key_stream[:20]))
+        with self.assertRaises(ValueError):
+            apply_key_stream(b"x" * 33, key_stream)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,89 @@
+import unittest
+from crypto_stub import generate_cipher_key, encrypt
+from keystream_ring import KeystreamRing
+from pdcp_entity import PDCPTransmitter
+
+class TestKeystreamRing(unittest.TestCase):
+    def _transmitter(self, key, size=8):
+        transmitter = PDCPTransmitter(5, 0, key, True, keystream_ring_size=0)
+        # Refilled by fill() only, so the test decides when keystreams are ready
+        transmitter.keystream_ring = KeystreamRing(key, 5, 0, size=size, max_sdu_size=32, background=False)
+        return transmitter
+
+    def test_precomputed_matches_encrypt_across_count_wrap(self):
+        key = generate_cipher_key()
+        transmitter = self._transmitter(key)
+        transmitter.tx_next = 2**32 - 3 # Moving TX_NEXT restarts the ring there
+        transmitter.send_sdu(b"miss")
+        transmitter.keystream_ring.fill()
+        for i in range(6):
+            count = transmitter.tx_next
+            sdu = bytes(range(i * 5 + 1)) if i != 3 else bytes(40) # One longer than max_sdu_size
+            self.assertEqual(transmitter.send_sdu(sdu).payload, encrypt(key, count, 5, 0, sdu))
+        stats = transmitter.keystream_ring.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (5, 2))
+        self.assertEqual(transmitter.tx_next, 4)
+
+    def test_key_and_bearer_change_discard_precomputed(self):
+        key, new_key = generate_cipher_key(), generate_cipher_key()
+        transmitter = self._transmitter(key)
+        transmitter.keystream_ring.fill()
+        transmitter.send_sdu(b"old key")
+
+        transmitter.set_key(new_key)
+        self.assertEqual(transmitter.keystream_ring.stats()["discarded"], 7)
+        transmitter.keystream_ring.fill()
+        self.assertEqual(transmitter.send_sdu(b"new key").payload, encrypt(new_key, 1, 5, 0, b"new key"))
+
+        transmitter.set_bearer(6)
+        transmitter.keystream_ring.fill()
+        self.assertEqual(transmitter.send_sdu(b"new bearer").payload, encrypt(new_key, 2, 6, 0, b"new bearer"))
+
+        # Changing the attribute directly is caught by take() as well
+        transmitter.keystream_ring.fill()
+        transmitter.cipher_key = key
+        self.assertEqual(transmitter.send_sdu(b"direct").payload, encrypt(key, 3, 6, 0, b"direct"))
+        self.assertEqual(transmitter.keystream_ring.stats()["hits"], 3)
+
+    def test_background_refill(self):
+        key = generate_cipher_key()
+        transmitter = PDCPTransmitter(5, 0, key, True, keystream_ring_size=16, max_sdu_size=64)
+        sdus = [bytes([i]) * 50 for i in range(40)]
+        for i, sdu in enumerate(sdus):
+            if i % 8 == 0:
+                self.assertTrue(transmitter.keystream_ring.fill(timeout=5))
+            self.assertEqual(transmitter.send_sdu(sdu).payload, encrypt(key, i, 5, 0, sdu))
+        self.assertEqual(transmitter.keystream_ring.stats()["hits"], 40)
+
+    def test_ring_is_opt_in(self):
+        self.assertIsNone(PDCPTransmitter(5, 0, generate_cipher_key(), True).keystream_ring)
+
+    def _pipelined_change(self, change):
+        # Four SDUs before the change, four after, in batches that straddle it
+        key = generate_cipher_key()
+        transmitter = PDCPTransmitter(5, 0, key, True)
+        transmitter.start_pipeline(workers=2, batch_size=3)
+        pdus = []
+        for i in range(4):
+            pdus += transmitter.submit_sdu(bytes([i]) * 10)
+        pdus += change(transmitter)
+        for i in range(4, 8):
+            pdus += transmitter.submit_sdu(bytes([i]) * 10)
+        pdus += transmitter.stop_pipeline()
+        self.assertEqual([pdu.count for pdu in pdus], list(range(8)))
+        return key, pdus
+
+    def test_set_key_with_running_pipeline(self):
+        new_key = generate_cipher_key()
+        key, pdus = self._pipelined_change(lambda transmitter: transmitter.set_key(new_key))
+        self.assertEqual([pdu.payload for pdu in pdus],
+                         [encrypt(key if i < 4 else new_key, i, 5, 0, bytes([i]) * 10) for i in range(8)])
+
+    def test_set_bearer_with_running_pipeline(self):
+        key, pdus = self._pipelined_change(lambda transmitter: transmitter.set_bearer(6))
+        self.assertEqual([pdu.payload for pdu in pdus],
+                         [encrypt(key, i, 5 if i < 4 else 6, 0, bytes([i]) * 10) for i in range(8)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -60,7 +60,8 @@ def run_simulation():
         "packets_delivered": pdcp_rx.delivered_sdu_count,
         "packets_discarded": pdcp_rx.discarded_pdu_count,
         "integrity_key": integrity_key.hex(),
-        "bearer_id": BEARER_ID
+        "bearer_id": BEARER_ID,
+        "cipher_cache": crypto_logic.cipher_cache_stats()
     }
 
     return jsonify({
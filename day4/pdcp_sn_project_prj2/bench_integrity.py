@@ -0,0 +1,71 @@
+import argparse
+import json
+import os
+import time
+
+from Cryptodome.Cipher import AES
+from Cryptodome.Hash import CMAC
+
+from simulation import crypto_logic
+
+BEARER, DIRECTION = 1, 0
+
+
+def _uncached_mac_i(key: bytes, count: int, input_data: bytes) -> bytes:
+    # calculate_mac_i() as it was before the context cache: CMAC.new() per PDU
+    message = count.to_bytes(4, 'big') + bytes([BEARER, DIRECTION]) + input_data
+    return CMAC.new(key, msg=message, ciphermod=AES).digest()[:4]
+
+
+def _best_of(repeats: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(num_pdus: int, sizes: list, repeats: int = 3) -> list:
+    """MAC-I throughput per payload size: uncached CMAC.new, cached scalar and batched, in PDUs/s."""
+    key = crypto_logic.generate_integrity_key()
+    results = []
+    for size in sizes:
+        items = [(count, os.urandom(size)) for count in range(num_pdus)]
+        scalar = [crypto_logic.calculate_mac_i(key, c, BEARER, DIRECTION, p) for c, p in items]
+        assert crypto_logic.calculate_mac_i_batch(key, BEARER, DIRECTION, items) == scalar
+
+        timings = {
+            "uncached": _best_of(repeats, lambda: [_uncached_mac_i(key, c, p) for c, p in items]),
+            "scalar": _best_of(repeats, lambda: [crypto_logic.calculate_mac_i(key, c, BEARER, DIRECTION, p) for c, p in items]),
+            "batch": _best_of(repeats, lambda: crypto_logic.calculate_mac_i_batch(key, BEARER, DIRECTION, items)),
+        }
+        results.append({
+            "payload_bytes": size,
+            **{f"{name}_pdus_per_s": num_pdus / t for name, t in timings.items()},
+            "batch_vs_scalar": timings["scalar"] / timings["batch"],
+            "batch_vs_uncached": timings["uncached"] / timings["batch"],
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-PDU vs. batched MAC-I calculation")
+    parser.add_argument("--pdus", type=int, default=2000, help="PDUs per batch")
+    parser.add_argument("--sizes", type=str, default="16,64,256,512,1024,1500,9000", help="Comma-separated payload sizes in bytes")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", type=str, default=None, help="Write the results JSON here")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.pdus, [int(s) for s in args.sizes.split(",")], args.repeats)
+    print(f"{'bytes':>6} {'uncached/s':>12} {'scalar/s':>12} {'batch/s':>12} {'vs scalar':>10} {'vs uncached':>12}")
+    for r in results:
+        print(f"{r['payload_bytes']:>6} {r['uncached_pdus_per_s']:>12.0f} {r['scalar_pdus_per_s']:>12.0f} "
+              f"{r['batch_pdus_per_s']:>12.0f} {r['batch_vs_scalar']:>9.2f}x {r['batch_vs_uncached']:>11.2f}x")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import collections
+import threading
+from Cryptodome.Cipher import AES
+
+BLOCK_SIZE = 16
+_ZERO_BLOCK = bytes(BLOCK_SIZE)
+_CMAC_RB = 0x87  # Reduction constant for 128-bit blocks (NIST SP 800-38B)
+
+def _xor_block(a: bytes, b: bytes) -> bytes:
+    return (int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')).to_bytes(BLOCK_SIZE, 'big')
+
+def _double(block: bytes) -> bytes:
+    # Multiplication by x in GF(2^128), as in CMAC subkey generation
+    value = int.from_bytes(block, 'big') << 1
+    if value >> 128:
+        value = (value ^ _CMAC_RB) & ((1 << 128) - 1)
+    return value.to_bytes(BLOCK_SIZE, 'big')
+
+def cmac_last_block(message: bytes, k1: bytes, k2: bytes) -> tuple:
+    """
+    Splits a message for CMAC: (whole blocks before the last, last block XORed with K1 if it
+    was complete, or padded with 10* and XORed with K2 if not).
+    """
+    tail = len(message) % BLOCK_SIZE
+    if message and not tail:
+        return message[:-BLOCK_SIZE], _xor_block(message[-BLOCK_SIZE:], k1)
+    split = len(message) - tail
+    padded = message[split:] + b'\x80' + bytes(BLOCK_SIZE - tail - 1)
+    return message[:split], _xor_block(padded, k2)
+
+
+class CipherContext:
+    """
+    The per-key work that does not change from PDU to PDU for NIA2-style integrity: the expanded
+    AES key schedule (held by an ECB cipher object, which batched CBC-MAC chains are built on)
+    and the CMAC subkeys K1/K2. Safe to share between threads.
+    """
+
+    def __init__(self, key: bytes):
+        self.key = key
+        self.ecb = AES.new(key, AES.MODE_ECB)
+        self.k1 = _double(self.ecb.encrypt(_ZERO_BLOCK))
+        self.k2 = _double(self.k1)
+        self._lock = threading.Lock()
+        # One CBC object for all messages. It carries on from the previous message's last
+        # block, so that block is XORed into the next message's first one: the same as a
+        # fresh chain from a zero IV, without setting up the cipher again.
+        self._cbc = AES.new(key, AES.MODE_CBC, iv=_ZERO_BLOCK)
+        self._chain = _ZERO_BLOCK
+
+    def cmac(self, message: bytes) -> bytes:
+        """Full 16-byte AES-CMAC of `message`."""
+        body, last = cmac_last_block(message, self.k1, self.k2)
+        data = body + last
+        with self._lock:
+            chained = self._cbc.encrypt(_xor_block(data[:BLOCK_SIZE], self._chain) + data[BLOCK_SIZE:])
+            self._chain = chained[-BLOCK_SIZE:]
+        return chained[-BLOCK_SIZE:]
+
+
+class CipherContextCache:
+    """
+    LRU cache of CipherContexts keyed by integrity key, bounded to `max_entries`. A bearer whose
+    key never changes sets up its AES key schedule and CMAC subkeys once instead of once per PDU.
+    Thread-safe; hit/miss counters are reported by stats().
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._contexts = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: bytes) -> CipherContext:
+        cache_key = bytes(key)
+        with self._lock:
+            context = self._contexts.get(cache_key)
+            if context is not None:
+                self._contexts.move_to_end(cache_key)
+                self.hits += 1
+                return context
+            self.misses += 1
+            context = CipherContext(cache_key)
+            self._contexts[cache_key] = context
+            if len(self._contexts) > self.max_entries:
+                self._contexts.popitem(last=False)
+                self.evictions += 1
+            return context
+
+    def clear(self):
+        with self._lock:
+            self._contexts.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._contexts),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Shared by the crypto functions, so every PDCP entity in the process benefits
+default_cache = CipherContextCache()
+
+def get_context(key: bytes) -> CipherContext:
+    return default_cache.get(key)
+
+def cache_stats() -> dict:
+    return default_cache.stats()
@@ -41,6 +41,33 @@ class PDCPTransmitter:
         
         return pdu, log_entry
 
+    def protect_batch(self, sdu_payloads: list):
+        """
+        send_sdu() for many SDUs at once: the MAC-Is are computed together by
+        crypto_logic.calculate_mac_i_batch(). Returns (pdus, log_entries).
+        """
+        counts = range(self.count + 1, self.count + 1 + len(sdu_payloads))
+        self.count += len(sdu_payloads)
+        mac_is = crypto_logic.calculate_mac_i_batch(
+            self.integrity_key,
+            self.bearer_id,
+            self.direction,
+            list(zip(counts, sdu_payloads))
+        )
+
+        pdus, log_entries = [], []
+        for count, sdu_payload, mac_i in zip(counts, sdu_payloads, mac_is):
+            pdu = PDCP_PDU(sdu_id=count, count=count, payload=sdu_payload, mac_i=mac_i)
+            pdus.append(pdu)
+            log_entries.append({
+                "event": "tx_protect",
+                "sdu_id": pdu.sdu_id,
+                "count": hex(pdu.count),
+                "payload": pdu.payload.decode(),
+                "mac_i": pdu.mac_i.hex()
+            })
+        return pdus, log_entries
+
 class PDCPReceiver:
     """Simulates the receiving side of a PDCP entity."""
     def __init__(self, integrity_key, bearer_id, direction):
@@ -82,4 +109,33 @@ class PDCPReceiver:
                 "calculated_x_mac": calculated_x_mac.hex(),
                 "status": "FAILED"
             }
-            return False, log_entry
\ No newline at end of file
+            return False, log_entry
+
+    def verify_batch(self, pdus: list):
+        """
+        receive_pdu() for many PDUs at once: the X-MACs are computed together by
+        crypto_logic.calculate_mac_i_batch() and compared with each PDU's MAC-I.
+        Returns (pass/fail mask as a list of bools, log_entries).
+        """
+        calculated_x_macs = crypto_logic.calculate_mac_i_batch(
+            self.integrity_key,
+            self.bearer_id,
+            self.direction,
+            [(pdu.count, pdu.payload) for pdu in pdus]
+        )
+
+        passed, log_entries = [], []
+        for pdu, calculated_x_mac in zip(pdus, calculated_x_macs):
+            ok = calculated_x_mac == pdu.mac_i
+            passed.append(ok)
+            log_entries.append({
+                "event": "rx_verify_pass" if ok else "rx_verify_fail",
+                "sdu_id": pdu.sdu_id,
+                "received_mac": pdu.mac_i.hex(),
+                "calculated_x_mac": calculated_x_mac.hex(),
+                "status": "PASSED" if ok else "FAILED"
+            })
+        delivered = sum(passed)
+        self.delivered_sdu_count += delivered
+        self.discarded_pdu_count += len(pdus) - delivered
+        return passed, log_entries
@@ -0,0 +1,38 @@
+import unittest
+from Cryptodome.Cipher import AES
+from Cryptodome.Hash import CMAC
+from simulation.cipher_cache import CipherContextCache
+from simulation.crypto_logic import generate_integrity_key
+
+class TestCipherContextCache(unittest.TestCase):
+    def test_cached_cmac_matches_cryptodome(self):
+        cache = CipherContextCache()
+        key = generate_integrity_key()
+        context = cache.get(key)
+        # Empty, partial, exactly one and several blocks; the reused CBC chain must not leak between messages
+        for length in [0, 1, 15, 16, 17, 32, 33, 1506, 16]:
+            message = bytes((i * 7) % 256 for i in range(length))
+            expected = CMAC.new(key, msg=message, ciphermod=AES).digest()
+            self.assertEqual(context.cmac(message), expected)
+            self.assertIs(cache.get(key), context)
+
+    def test_rfc4493_subkeys(self):
+        # RFC 4493 section 4 example key
+        context = CipherContextCache().get(bytes.fromhex("2b7e151628aed2a6abf7158809cf4f3c"))
+        self.assertEqual(context.k1.hex(), "fbeed618357133667c85e08f7236a8de")
+        self.assertEqual(context.k2.hex(), "f7ddac306ae266ccf90bc11ee46d513b")
+        self.assertEqual(context.cmac(b"").hex(), "bb1d6929e95937287fa37d129b756746")
+
+    def test_lru_eviction(self):
+        cache = CipherContextCache(max_entries=2)
+        key_a, key_b, key_c = generate_integrity_key(), generate_integrity_key(), generate_integrity_key()
+        context_a = cache.get(key_a)
+        cache.get(key_b)
+        cache.get(key_a)
+        cache.get(key_c) # Evicts key_b, the least recently used
+        self.assertIs(cache.get(key_a), context_a)
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["hits"], stats["misses"], stats["evictions"]), (2, 2, 3, 1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,16 +1,20 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, url_for, Response, stream_with_context
 import io
 import base64
 import matplotlib
 matplotlib.use('Agg') # Non-interactive backend for Matplotlib
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure # Figure objects, not pyplot's global state: plots are drawn in concurrent job threads
 import os
 from datetime import datetime
+import json
 import logging
+import threading
 
 # Project modules
 import config as default_config
 from main import run_simulation # The core simulation logic from main.py
+from jobs import JobManager, QueueFullError, FINISHED_STATES
+from result_cache import ResultCache, cache_key
 from src.pdcp_entity import PDCPTransmitter, PDCPReceiver # For type hints or direct use if needed
 from src.channel_simulator import ImpairedChannel
 
@@ -21,6 +25,17 @@ log_format = '%(asctime)s - %(levelname)s - %(message)s'
 logging.basicConfig(level=logging.INFO, format=log_format)
 app.logger.setLevel(logging.INFO)
 
+# Simulations run as background jobs so a long run never holds an HTTP worker
+job_manager = JobManager(max_workers=default_config.WEB_JOB_WORKERS, max_pending=default_config.WEB_MAX_PENDING_JOBS)
+# Metrics + rendered plots of seeded runs, keyed by the canonical parameter hash
+result_cache = ResultCache(max_bytes=default_config.WEB_CACHE_MAX_BYTES, persist_dir=default_config.WEB_CACHE_DIR)
+# Runs currently computing a cache key, shared by identical requests:
+# {"key", "job_id", "requesters"}, by cache key and by job id. The job is only cancelled once
+# every requester sharing it has cancelled.
+_inflight_jobs = {}
+_inflight_by_job = {}
+_inflight_lock = threading.Lock()
+
 
 class SimulationParameters:
     """Class to hold simulation parameters, similar to config module."""
@@ -32,8 +47,27 @@ class SimulationParameters:
         self.DUPLICATION_RATE = kwargs.get('DUPLICATION_RATE', default_config.DUPLICATION_RATE)
         self.CORRUPTION_RATE = kwargs.get('CORRUPTION_RATE', default_config.CORRUPTION_RATE)
         self.T_REORDERING_THRESHOLD = kwargs.get('T_REORDERING_THRESHOLD', default_config.T_REORDERING_THRESHOLD)
+        self.T_REORDERING_MS = kwargs.get('T_REORDERING_MS', default_config.T_REORDERING_MS)
+        self.SDU_INTERVAL_MS = kwargs.get('SDU_INTERVAL_MS', default_config.SDU_INTERVAL_MS)
+        self.CHANNEL_PROPAGATION_DELAY_MS = kwargs.get('CHANNEL_PROPAGATION_DELAY_MS', default_config.CHANNEL_PROPAGATION_DELAY_MS)
+        self.CHANNEL_REORDER_BUFFER_SIZE = kwargs.get('CHANNEL_REORDER_BUFFER_SIZE', default_config.CHANNEL_REORDER_BUFFER_SIZE)
+        self.CHANNEL_JITTER_MS = kwargs.get('CHANNEL_JITTER_MS', default_config.CHANNEL_JITTER_MS)
+        self.CHANNEL_JITTER_DISTRIBUTION = kwargs.get('CHANNEL_JITTER_DISTRIBUTION', default_config.CHANNEL_JITTER_DISTRIBUTION)
+        self.CHANNEL_BURST_P_GOOD_TO_BAD = kwargs.get('CHANNEL_BURST_P_GOOD_TO_BAD', default_config.CHANNEL_BURST_P_GOOD_TO_BAD)
+        self.CHANNEL_BURST_P_BAD_TO_GOOD = kwargs.get('CHANNEL_BURST_P_BAD_TO_GOOD', default_config.CHANNEL_BURST_P_BAD_TO_GOOD)
+        self.CHANNEL_BURST_LOSS_RATE = kwargs.get('CHANNEL_BURST_LOSS_RATE', default_config.CHANNEL_BURST_LOSS_RATE)
+        self.SEED = kwargs.get('SEED', default_config.SEED)
+        self.INITIAL_COUNT = kwargs.get('INITIAL_COUNT', default_config.INITIAL_COUNT)
+        self.PAYLOAD_FREE = kwargs.get('PAYLOAD_FREE', default_config.PAYLOAD_FREE)
+        self.BATCH_SIZE = kwargs.get('BATCH_SIZE', default_config.BATCH_SIZE)
+        self.ENCODE_PDUS = kwargs.get('ENCODE_PDUS', default_config.ENCODE_PDUS)
+        self.PDU_PAYLOAD_BYTES = kwargs.get('PDU_PAYLOAD_BYTES', default_config.PDU_PAYLOAD_BYTES)
         self.PLOT_GRANULARITY = kwargs.get('PLOT_GRANULARITY', default_config.PLOT_GRANULARITY)
+        self.PLOT_MAX_POINTS = kwargs.get('PLOT_MAX_POINTS', default_config.PLOT_MAX_POINTS)
         self.LOG_LEVEL = kwargs.get('LOG_LEVEL', default_config.LOG_LEVEL)
+        self.TRACE_SAMPLE_EVERY = kwargs.get('TRACE_SAMPLE_EVERY', default_config.TRACE_SAMPLE_EVERY)
+        self.TRACE_RING_CAPACITY = kwargs.get('TRACE_RING_CAPACITY', default_config.TRACE_RING_CAPACITY)
+        self.STAGE_TIMING = kwargs.get('STAGE_TIMING', default_config.STAGE_TIMING)
 
 def generate_plots_base64(plot_data):
     """Generates plots and returns them as base64 encoded strings."""
@@ -41,38 +75,38 @@ def generate_plots_base64(plot_data):
 
     try:
         # Plot 1: TX_NEXT vs RX_DELIV vs RX_NEXT
-        plt.figure(figsize=(10, 5)) # Adjusted size for web
-        plt.plot(plot_data["time"], plot_data["tx_count"], label='TX_NEXT', linestyle='--')
-        plt.plot(plot_data["time"], plot_data["rx_deliv"], label='RX_DELIV')
-        plt.plot(plot_data["time"], plot_data["rx_next"], label='RX_NEXT', linestyle=':')
-        plt.xlabel('Simulation Step (Packet Index)')
-        plt.ylabel('COUNT Value')
-        plt.title('PDCP COUNT Progression')
-        plt.legend()
-        plt.grid(True)
-        plt.tight_layout() # Adjust layout
-        
+        fig = Figure(figsize=(10, 5)) # Adjusted size for web
+        ax = fig.subplots()
+        ax.plot(plot_data["time"], plot_data["tx_count"], label='TX_NEXT', linestyle='--')
+        ax.plot(plot_data["time"], plot_data["rx_deliv"], label='RX_DELIV')
+        ax.plot(plot_data["time"], plot_data["rx_next"], label='RX_NEXT', linestyle=':')
+        ax.set_xlabel('Simulation Step (Packet Index)')
+        ax.set_ylabel('COUNT Value')
+        ax.set_title('PDCP COUNT Progression')
+        ax.legend()
+        ax.grid(True)
+        fig.tight_layout() # Adjust layout
+
         img_io = io.BytesIO()
-        plt.savefig(img_io, format='png', bbox_inches='tight')
+        fig.savefig(img_io, format='png', bbox_inches='tight')
         img_io.seek(0)
         plots_base64['count_progression'] = base64.b64encode(img_io.getvalue()).decode('utf-8')
-        plt.close()
 
         # Plot 2: Reordering Buffer Size
-        plt.figure(figsize=(10, 5))
-        plt.plot(plot_data["time"], plot_data["buffer_size"], label='Reordering Buffer Size', color='orange')
-        plt.xlabel('Simulation Step (Packet Index)')
-        plt.ylabel('Number of PDUs in Buffer')
-        plt.title('PDCP Receiver Reordering Buffer Occupancy')
-        plt.legend()
-        plt.grid(True)
-        plt.tight_layout()
+        fig = Figure(figsize=(10, 5))
+        ax = fig.subplots()
+        ax.plot(plot_data["time"], plot_data["buffer_size"], label='Reordering Buffer Size', color='orange')
+        ax.set_xlabel('Simulation Step (Packet Index)')
+        ax.set_ylabel('Number of PDUs in Buffer')
+        ax.set_title('PDCP Receiver Reordering Buffer Occupancy')
+        ax.legend()
+        ax.grid(True)
+        fig.tight_layout()
 
         img_io = io.BytesIO()
-        plt.savefig(img_io, format='png', bbox_inches='tight')
+        fig.savefig(img_io, format='png', bbox_inches='tight')
         img_io.seek(0)
         plots_base64['buffer_occupancy'] = base64.b64encode(img_io.getvalue()).decode('utf-8')
-        plt.close()
 
     except Exception as e:
         app.logger.error(f"Error generating plot: {e}")
@@ -91,68 +125,200 @@ def index():
         'DUPLICATION_RATE': default_config.DUPLICATION_RATE,
         'CORRUPTION_RATE': default_config.CORRUPTION_RATE,
         'T_REORDERING_THRESHOLD': default_config.T_REORDERING_THRESHOLD,
+        'SEED': default_config.WEB_DEFAULT_SEED,
     }
     return render_template('index.html', params=default_params)
 
+def parse_simulation_form(params_from_form):
+    """Builds SimulationParameters from the web form fields."""
+    sim_params = SimulationParameters(
+        SN_LENGTH_BITS=int(params_from_form.get('sn_length_bits', default_config.SN_LENGTH_BITS)),
+        SIMULATION_PACKETS=int(params_from_form.get('simulation_packets', default_config.SIMULATION_PACKETS)),
+        LOSS_RATE=float(params_from_form.get('loss_rate', default_config.LOSS_RATE)),
+        REORDERING_RATE=float(params_from_form.get('reordering_rate', default_config.REORDERING_RATE)),
+        DUPLICATION_RATE=float(params_from_form.get('duplication_rate', default_config.DUPLICATION_RATE)),
+        CORRUPTION_RATE=float(params_from_form.get('corruption_rate', default_config.CORRUPTION_RATE)),
+        T_REORDERING_THRESHOLD=int(params_from_form.get('t_reordering_threshold', default_config.T_REORDERING_THRESHOLD)),
+        PLOT_MAX_POINTS=default_config.WEB_PLOT_MAX_POINTS, # Bounded, peak-preserving plot data for any run length
+        SEED=int(params_from_form['seed']) if params_from_form.get('seed', '').strip() else None,
+        LOG_LEVEL=default_config.LOG_LEVEL # Keep log level from main config for now
+    )
+    return sim_params
+
+def run_simulation_job(sim_params, progress_callback=None, key=None, inflight=None):
+    """
+    Job body (runs in a JobManager worker thread): simulation + plots, returned as the response payload.
+    With a cache `key`, the payload is stored in result_cache for repeat requests.
+    """
+    try:
+        payload = _simulate_and_plot(sim_params, progress_callback)
+        result_cache.put(key, payload)
+        return payload
+    finally:
+        if inflight is not None:
+            with _inflight_lock:
+                # Only this run's entry: after a cancel, a newer run may compute the same key
+                if _inflight_jobs.get(key) is inflight:
+                    del _inflight_jobs[key]
+                _inflight_by_job.pop(inflight["job_id"], None)
+
+def _simulate_and_plot(sim_params, progress_callback):
+    results = run_simulation(sim_params, progress_callback=progress_callback) # run_simulation now takes a params object
+
+    # Generate plots as base64 strings
+    plot_images_base64 = {}
+    if results.get("plot_data"):
+        plot_images_base64 = generate_plots_base64(results["plot_data"])
+
+    return {
+        "metrics": {
+            "total_sdu_sent": results["total_sdu_sent"],
+            "tx_next_final": results["tx_status"]["tx_next_final"],
+            "delivered_sdu_count": results["rx_status"]["delivered_sdu_count"],
+            "rx_deliv_final": results["rx_status"]["rx_deliv"],
+            "rx_next_final": results["rx_status"]["rx_next"],
+            "buffered_final": results["rx_status"]["buffered_pdu_count"],
+            "discarded_duplicates": results["rx_status"]["discarded_duplicates"],
+            "discarded_old": results["rx_status"]["discarded_old"],
+            "discarded_corrupted": results["rx_status"]["discarded_corrupted"],
+            "out_of_order_deliveries": results["rx_status"]["out_of_order_deliveries"],
+            "channel_lost": results["channel_stats"]["total_lost"],
+            "channel_duplicated": results["channel_stats"]["total_duplicated"],
+            "channel_corrupted": results["channel_stats"]["total_corrupted"],
+            "channel_reorder_events": results["channel_stats"]["total_reordered_events"],
+            "simulation_duration": f"{results['duration_seconds']:.2f}s"
+        },
+        "plots": plot_images_base64
+    }
+
 @app.route('/run_simulation', methods=['POST'])
 def handle_run_simulation():
+    """
+    Seeded parameter sets already in the result cache are answered at once (status "done").
+    Otherwise queues a simulation job and returns its id; poll /jobs/<job_id> for progress and results.
+    """
     try:
         params_from_form = request.form
         app.logger.info(f"Received simulation request with params: {params_from_form}")
+        sim_params = parse_simulation_form(params_from_form)
+        app.logger.info(f"Parsed Simulation Parameters: SN={sim_params.SN_LENGTH_BITS}, Packets={sim_params.SIMULATION_PACKETS}, Loss={sim_params.LOSS_RATE*100}%")
 
-        sim_params = SimulationParameters(
-            SN_LENGTH_BITS=int(params_from_form.get('sn_length_bits', default_config.SN_LENGTH_BITS)),
-            SIMULATION_PACKETS=int(params_from_form.get('simulation_packets', default_config.SIMULATION_PACKETS)),
-            LOSS_RATE=float(params_from_form.get('loss_rate', default_config.LOSS_RATE)),
-            REORDERING_RATE=float(params_from_form.get('reordering_rate', default_config.REORDERING_RATE)),
-            DUPLICATION_RATE=float(params_from_form.get('duplication_rate', default_config.DUPLICATION_RATE)),
-            CORRUPTION_RATE=float(params_from_form.get('corruption_rate', default_config.CORRUPTION_RATE)),
-            T_REORDERING_THRESHOLD=int(params_from_form.get('t_reordering_threshold', default_config.T_REORDERING_THRESHOLD)),
-            PLOT_GRANULARITY=max(1, int(params_from_form.get('simulation_packets', default_config.SIMULATION_PACKETS)) // 200), # Dynamic granularity
-            LOG_LEVEL=default_config.LOG_LEVEL # Keep log level from main config for now
-        )
-        
-        # Ensure plot granularity is at least 1
-        if sim_params.PLOT_GRANULARITY < 1:
-            sim_params.PLOT_GRANULARITY = 1
+        key = cache_key(sim_params)
+        cached = result_cache.get(key)
+        if cached is not None:
+            app.logger.info(f"Cache hit for {key[:12]}")
+            return jsonify({"success": True, "status": "done", "cached": True, "result": cached})
 
+        with _inflight_lock:
+            # The same parameters are already being computed: share that job instead of running again
+            inflight = _inflight_jobs.get(key) if key is not None else None
+            if inflight is not None:
+                inflight["requesters"] += 1
+                job_id = inflight["job_id"]
+            else:
+                inflight = {"key": key, "job_id": None, "requesters": 1} if key is not None else None
+                job_id = job_manager.submit(run_simulation_job, sim_params, key=key, inflight=inflight,
+                                            description=f"SN={sim_params.SN_LENGTH_BITS}, Packets={sim_params.SIMULATION_PACKETS}")
+                if inflight is not None:
+                    inflight["job_id"] = job_id
+                    _inflight_jobs[key] = _inflight_by_job[job_id] = inflight
+        return jsonify({"success": True, "job_id": job_id,
+                        "status_url": url_for('handle_job_status', job_id=job_id),
+                        "events_url": url_for('handle_job_events', job_id=job_id),
+                        "cancel_url": url_for('handle_job_cancel', job_id=job_id)}), 202
 
-        app.logger.info(f"Parsed Simulation Parameters: SN={sim_params.SN_LENGTH_BITS}, Packets={sim_params.SIMULATION_PACKETS}, Loss={sim_params.LOSS_RATE*100}%")
-        
-        results = run_simulation(sim_params) # run_simulation now takes a params object
-        
-        # Generate plots as base64 strings
-        plot_images_base64 = {}
-        if results.get("plot_data"):
-            plot_images_base64 = generate_plots_base64(results["plot_data"])
-        
-        response_data = {
-            "success": True,
-            "metrics": {
-                "total_sdu_sent": results["total_sdu_sent"],
-                "tx_next_final": results["tx_status"]["tx_next_final"],
-                "delivered_sdu_count": results["rx_status"]["delivered_sdu_count"],
-                "rx_deliv_final": results["rx_status"]["rx_deliv"],
-                "rx_next_final": results["rx_status"]["rx_next"],
-                "buffered_final": results["rx_status"]["buffered_pdu_count"],
-                "discarded_duplicates": results["rx_status"]["discarded_duplicates"],
-                "discarded_old": results["rx_status"]["discarded_old"],
-                "discarded_corrupted": results["rx_status"]["discarded_corrupted"],
-                "out_of_order_deliveries": results["rx_status"]["out_of_order_deliveries"],
-                "channel_lost": results["channel_stats"]["total_lost"],
-                "channel_duplicated": results["channel_stats"]["total_duplicated"],
-                "channel_corrupted": results["channel_stats"]["total_corrupted"],
-                "channel_reorder_events": results["channel_stats"]["total_reordered_events"],
-                "simulation_duration": f"{results['duration_seconds']:.2f}s"
-            },
-            "plots": plot_images_base64
-        }
-        return jsonify(response_data)
-
+    except QueueFullError as e:
+        app.logger.warning(f"Rejected simulation request: {e}")
+        return jsonify({"success": False, "error": f"Server busy: {e}"}), 429
     except Exception as e:
         app.logger.error(f"Error during simulation via web: {e}", exc_info=True)
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def handle_job_status(job_id):
+    """Job status and progress; once status is "done" the response also carries the metrics and plots."""
+    job = job_manager.status(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": f"Unknown job {job_id}"}), 404
+    return jsonify({"success": job["status"] != "failed", **job})
+
+def _sse(event, data, event_id=None):
+    # One Server-Sent Events message
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def handle_job_events(job_id):
+    """
+    Server-Sent Events stream of a job: a "progress" event (running counters + the current
+    COUNT/buffer sample, about every 1% of the run) as they are reported, then one final
+    "done" (with metrics and plots), "failed" or "cancelled" event. Reconnecting clients resume
+    after the Last-Event-ID they saw. The simulation thread never blocks on a slow client: it
+    only appends to the job's bounded event list.
+    """
+    if job_manager.status(job_id, include_result=False) is None:
+        return jsonify({"success": False, "error": f"Unknown job {job_id}"}), 404
+    try:
+        last_seq = int(request.headers.get('Last-Event-ID', request.args.get('last_seq', -1)))
+    except ValueError:
+        return jsonify({"success": False, "error": "Last-Event-ID / last_seq must be an integer"}), 400
+    heartbeat_s = default_config.WEB_SSE_HEARTBEAT_S
+
+    def stream():
+        version, sent_seq = None, last_seq
+        while True:
+            update = job_manager.wait_for_update(job_id, version, timeout=heartbeat_s)
+            if update is None: # Evicted while streaming
+                yield _sse("failed", {"error": f"Unknown job {job_id}"})
+                return
+            new_version, job, events = update
+            if new_version == version:
+                yield ": keep-alive\n\n" # Comment line so proxies keep the connection open
+                continue
+            version = new_version
+            for event in events:
+                if event["seq"] > sent_seq:
+                    yield _sse("progress", {**event, "sdus_total": job["sdus_total"]}, event_id=event["seq"])
+                    sent_seq = event["seq"]
+            if job["status"] in FINISHED_STATES:
+                yield _sse(job["status"], job)
+                return
+
+    return Response(stream_with_context(stream()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def handle_job_cancel(job_id):
+    """
+    Withdraws one requester of the job. A job shared by identical requests keeps running for the
+    others ("cancelled": false); the last one to cancel stops it.
+    """
+    with _inflight_lock:
+        inflight = _inflight_by_job.get(job_id)
+        if inflight is not None:
+            if inflight["requesters"] > 1:
+                inflight["requesters"] -= 1
+                return jsonify({"success": True, "job_id": job_id, "cancelled": False,
+                                "requesters": inflight["requesters"]})
+            # New identical requests start a fresh run rather than joining this one
+            del _inflight_by_job[job_id]
+            if _inflight_jobs.get(inflight["key"]) is inflight:
+                del _inflight_jobs[inflight["key"]]
+    if not job_manager.cancel(job_id):
+        return jsonify({"success": False, "error": f"Job {job_id} is unknown or already finished"}), 409
+    return jsonify({"success": True, "job_id": job_id, "cancelled": True})
+
+@app.route('/cache/stats', methods=['GET'])
+def handle_cache_stats():
+    return jsonify({"success": True, **result_cache.stats()})
+
+@app.route('/jobs', methods=['GET'])
+def handle_list_jobs():
+    return jsonify({"success": True, "jobs": job_manager.list_jobs()})
+
 if __name__ == '__main__':
     # Create dummy plots and data folders if they don't exist, for main_cli compatibility
     if not os.path.exists("data"): os.makedirs("data")
@@ -0,0 +1,236 @@
+"""
+Throughput / peak-memory benchmarks for the PDCP hot path.
+
+Measures PDCPTransmitter.send_sdu, ImpairedChannel.transmit and PDCPReceiver.receive_pdu
+separately (PDUs/s, best of --repeat runs) plus the receiver's peak traced memory, for a set of
+impairment profiles, and the bulk PDU codec's encode/decode throughput (MB/s). Results are written as JSON; --baseline compares them against a stored run
+and exits non-zero on a regression beyond --tolerance.
+
+    python benchmarks/bench_pdcp.py --packets 100000 --output benchmarks/results/latest.json
+    python benchmarks/bench_pdcp.py --baseline benchmarks/baseline.json
+"""
+import argparse
+import dataclasses
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.pdcp_entity import PDCPTransmitter, PDCPReceiver
+from src.channel_simulator import ImpairedChannel
+from src.pdu_codec import PDUCodec
+
+logger = logging.getLogger(__name__)
+
+STAGES = ["send_sdu", "channel_transmit", "receive_pdu"]
+CODEC_STAGES = ["encode_mb_per_s", "decode_mb_per_s"]
+
+
+@dataclasses.dataclass
+class BenchProfile:
+    name: str
+    sn_length: int = 12
+    loss_rate: float = 0.0
+    reordering_rate: float = 0.0
+    duplication_rate: float = 0.0
+    corruption_rate: float = 0.0
+    burst: int = 1 # PDUs per transmit() call; reordering only shuffles within a call
+    start_count: int = 0 # Initial COUNT on both sides (near 2**32 to cross the COUNT wrap)
+
+
+PROFILES = [
+    BenchProfile("clean_sn12"),
+    BenchProfile("clean_sn18", sn_length=18),
+    BenchProfile("heavy_loss_sn12", loss_rate=0.2),
+    BenchProfile("heavy_reorder_sn12", reordering_rate=0.5, burst=16),
+    BenchProfile("heavy_reorder_sn18", sn_length=18, reordering_rate=0.5, burst=16),
+    BenchProfile("duplication_storm_sn12", duplication_rate=0.5),
+    BenchProfile("count_wrap_sn12", loss_rate=0.01, reordering_rate=0.1, burst=4, start_count=2**32 - 50000),
+    BenchProfile("count_wrap_sn18", sn_length=18, loss_rate=0.01, reordering_rate=0.1, burst=4, start_count=2**32 - 50000),
+]
+
+
+def _make_entities(profile: BenchProfile, seed: int):
+    transmitter = PDCPTransmitter(sn_length=profile.sn_length, initial_count=profile.start_count)
+    receiver = PDCPReceiver(sn_length=profile.sn_length, t_reordering_threshold=20, initial_count=profile.start_count)
+    channel = ImpairedChannel(profile.loss_rate, profile.reordering_rate, profile.duplication_rate,
+                              profile.corruption_rate, seed=seed)
+    return transmitter, channel, receiver
+
+
+def _rate(n, elapsed_ns):
+    return n / (elapsed_ns / 1e9) if elapsed_ns else float("inf")
+
+
+def bench_profile(profile: BenchProfile, packets: int, repeat: int = 3, seed: int = 1) -> dict:
+    """Runs one profile `repeat` times and keeps the best throughput of each stage."""
+    best = {stage: 0.0 for stage in STAGES}
+    arrivals_count = delivered = 0
+    for _ in range(repeat):
+        transmitter, channel, receiver = _make_entities(profile, seed)
+
+        start = time.perf_counter_ns()
+        pdus = [transmitter.send_sdu(i) for i in range(packets)]
+        best["send_sdu"] = max(best["send_sdu"], _rate(packets, time.perf_counter_ns() - start))
+
+        arrivals = []
+        start = time.perf_counter_ns()
+        for i in range(0, packets, profile.burst):
+            arrivals.extend(channel.transmit(pdus[i:i + profile.burst]))
+        best["channel_transmit"] = max(best["channel_transmit"], _rate(packets, time.perf_counter_ns() - start))
+
+        start = time.perf_counter_ns()
+        for pdu in arrivals:
+            receiver.receive_pdu(pdu)
+        best["receive_pdu"] = max(best["receive_pdu"], _rate(len(arrivals), time.perf_counter_ns() - start))
+        arrivals_count, delivered = len(arrivals), receiver.get_status()["delivered_sdu_count"]
+
+    # Peak memory of the receive stage, measured in a separate pass (tracemalloc slows things down)
+    transmitter, channel, receiver = _make_entities(profile, seed)
+    arrivals = []
+    for i in range(0, packets, profile.burst):
+        arrivals.extend(channel.transmit([transmitter.send_sdu(j) for j in range(i, min(i + profile.burst, packets))]))
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    for pdu in arrivals:
+        receiver.receive_pdu(pdu)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "profile": dataclasses.asdict(profile),
+        "packets": packets,
+        "arrivals": arrivals_count,
+        "delivered": delivered,
+        "throughput_pdus_per_s": best,
+        "receive_peak_memory_bytes": peak - base,
+    }
+
+
+def bench_codec(sn_length: int, packets: int, payload_bytes: int = 1400, repeat: int = 3) -> dict:
+    """Best-of-`repeat` PDUCodec.encode_batch / decode_batch throughput over `packets` fixed-size PDUs."""
+    codec = PDUCodec(sn_length)
+    sns = np.arange(packets, dtype=np.int64) & codec.max_sn_value
+    payloads = np.random.default_rng(0).integers(0, 256, size=(packets, payload_bytes), dtype=np.uint8)
+    out = bytearray(packets * (codec.header_size + payload_bytes))
+    best = {stage: 0.0 for stage in CODEC_STAGES}
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        buffer, lengths = codec.encode_batch(sns, payloads, out=out)
+        best["encode_mb_per_s"] = max(best["encode_mb_per_s"], _rate(len(buffer) / 1e6, time.perf_counter_ns() - start))
+        start = time.perf_counter_ns()
+        codec.decode_batch(buffer, lengths)
+        best["decode_mb_per_s"] = max(best["decode_mb_per_s"], _rate(len(buffer) / 1e6, time.perf_counter_ns() - start))
+    return {"packets": packets, "payload_bytes": payload_bytes, "throughput": best}
+
+
+def run_benchmarks(profiles=None, packets: int = 100000, repeat: int = 3, seed: int = 1, codec: bool = True) -> dict:
+    results = {}
+    for profile in profiles or PROFILES:
+        logger.info(f"Benchmarking {profile.name} ({packets} packets x {repeat})")
+        results[profile.name] = bench_profile(profile, packets, repeat, seed)
+    codec_results = {}
+    if codec:
+        for sn_length in (12, 18):
+            logger.info(f"Benchmarking PDU codec, {sn_length}-bit SN")
+            codec_results[f"sn{sn_length}"] = bench_codec(sn_length, packets, repeat=repeat)
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "packets": packets,
+            "repeat": repeat,
+        },
+        "results": results,
+        "codec": codec_results,
+    }
+
+
+def compare_to_baseline(current: dict, baseline: dict, tolerance: float = 0.2) -> list:
+    """
+    Regressions of `current` vs `baseline`: a stage's throughput below baseline * (1 - tolerance),
+    or receive peak memory above baseline * (1 + tolerance). Profiles missing on either side are skipped.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        for stage in STAGES:
+            now, before = result["throughput_pdus_per_s"][stage], base["throughput_pdus_per_s"][stage]
+            if now < before * (1 - tolerance):
+                regressions.append(f"{name}.{stage}: {now:,.0f} PDUs/s vs baseline {before:,.0f} ({now / before - 1:+.0%})")
+        now, before = result["receive_peak_memory_bytes"], base["receive_peak_memory_bytes"]
+        if before and now > before * (1 + tolerance):
+            regressions.append(f"{name}.receive_peak_memory: {now:,} B vs baseline {before:,} B ({now / before - 1:+.0%})")
+    for name, result in current.get("codec", {}).items():
+        base = baseline.get("codec", {}).get(name)
+        if base is None:
+            continue
+        for stage in CODEC_STAGES:
+            now, before = result["throughput"][stage], base["throughput"][stage]
+            if now < before * (1 - tolerance):
+                regressions.append(f"codec.{name}.{stage}: {now:,.0f} vs baseline {before:,.0f} ({now / before - 1:+.0%})")
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="PDCP hot-path benchmarks")
+    parser.add_argument("--packets", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--profiles", type=str, default=None, help="Comma-separated profile names (default: all)")
+    parser.add_argument("--no-codec", action="store_true", help="Skip the PDU codec benchmark")
+    parser.add_argument("--output", type=str, default=None, help="Write results JSON here")
+    parser.add_argument("--baseline", type=str, default=None, help="Compare against this results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown / memory growth")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+    logging.getLogger("src").setLevel(logging.ERROR) # Per-PDU logging would dominate the measurement
+
+    profiles = PROFILES
+    if args.profiles:
+        wanted = set(args.profiles.split(","))
+        profiles = [p for p in PROFILES if p.name in wanted]
+    current = run_benchmarks(profiles, args.packets, args.repeat, codec=not args.no_codec)
+
+    for name, result in current["results"].items():
+        rates = ", ".join(f"{stage} {rate:,.0f}/s" for stage, rate in result["throughput_pdus_per_s"].items())
+        logger.info(f"{name}: {rates}, RX peak {result['receive_peak_memory_bytes'] / 1024:.0f} KiB")
+    for name, result in current["codec"].items():
+        rates = result["throughput"]
+        logger.info(f"codec {name}: encode {rates['encode_mb_per_s']:,.0f} MB/s, decode {rates['decode_mb_per_s']:,.0f} MB/s "
+                    f"({result['payload_bytes']}-byte payloads)")
+
+    if args.output:
+        output_dir = os.path.dirname(args.output)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")  # json.dump leaves the last line unterminated
+        logger.info(f"Benchmark results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(current, baseline, args.tolerance)
+        for regression in regressions:
+            logger.error(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        logger.info(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main_cli()
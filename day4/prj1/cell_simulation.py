@@ -0,0 +1,202 @@
+import argparse
+import dataclasses
+import json
+import logging
+import os
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import config # Default simulation parameters
+from main import run_simulation, setup_logging
+
+logger = logging.getLogger(__name__)
+
+# Receiver/channel counters summed into the cell-level report
+RX_COUNTERS = ["delivered_sdu_count", "buffered_pdu_count", "discarded_duplicates",
+               "discarded_old", "discarded_corrupted", "out_of_order_deliveries"]
+CHANNEL_COUNTERS = ["total_passed_through", "total_lost", "total_duplicated",
+                    "total_corrupted", "total_reordered_events"]
+
+DEFAULT_PROFILES = {
+    "clean": {"LOSS_RATE": 0.0, "REORDERING_RATE": 0.0, "DUPLICATION_RATE": 0.0, "CORRUPTION_RATE": 0.0},
+    "default": {},
+    "lossy": {"LOSS_RATE": 0.05, "REORDERING_RATE": 0.05, "CORRUPTION_RATE": 0.01},
+}
+
+
+@dataclasses.dataclass
+class BearerSpec:
+    ue_id: int
+    bearer_id: int
+    profile: str
+    seed: int
+    overrides: dict # Parameter overrides on top of config.py for this bearer
+
+
+@dataclasses.dataclass
+class PopulationSpec:
+    """Describes a cell: num_ues UEs, each with bearers_per_ue DRBs, each running an impairment profile."""
+    num_ues: int
+    bearers_per_ue: int
+    packets_per_bearer: int
+    profiles: dict = dataclasses.field(default_factory=lambda: dict(DEFAULT_PROFILES)) # name -> parameter overrides
+    profile_cycle: list = None # Profile names assigned to bearers in turn; defaults to all profiles
+    base_seed: int = 0
+
+    def bearers(self) -> list:
+        cycle = self.profile_cycle or list(self.profiles)
+        specs = []
+        for ue_id in range(self.num_ues):
+            for bearer_id in range(self.bearers_per_ue):
+                profile = cycle[(ue_id * self.bearers_per_ue + bearer_id) % len(cycle)]
+                overrides = dict(self.profiles[profile])
+                overrides["SIMULATION_PACKETS"] = self.packets_per_bearer
+                specs.append(BearerSpec(ue_id, bearer_id, profile,
+                                        bearer_seed(self.base_seed, ue_id, bearer_id), overrides))
+        return specs
+
+
+def bearer_seed(base_seed: int, ue_id: int, bearer_id: int) -> int:
+    """Deterministic per-bearer seed, independent of how bearers are sharded across workers."""
+    return int(np.random.SeedSequence([base_seed, ue_id, bearer_id]).generate_state(1)[0])
+
+
+# Applied under every bearer's / sweep run's own overrides: only summaries are kept, so skip
+# per-SDU plot sampling (PLOT_MAX_POINTS) and record just the first and last point
+SUMMARY_ONLY_OVERRIDES = {"PLOT_MAX_POINTS": 0, "PLOT_GRANULARITY": 2**62}
+
+
+def simulation_params(*overrides: dict, seed: int):
+    """Simulation parameters for one run: config.py defaults, each dict of `overrides` applied in turn, then SEED."""
+    params = {k: v for k, v in vars(config).items() if k.isupper()}
+    for override in overrides:
+        params.update(override)
+    params["SEED"] = seed
+    return types.SimpleNamespace(**params)
+
+
+def bearer_params(bearer: BearerSpec):
+    """Simulation parameters for one bearer: config.py defaults + profile overrides + the bearer's seed."""
+    return simulation_params(SUMMARY_ONLY_OVERRIDES, bearer.overrides, seed=bearer.seed)
+
+
+def run_bearer(bearer: BearerSpec) -> dict:
+    """Runs one bearer through main.run_simulation and keeps only its summary (no plot data)."""
+    results = run_simulation(bearer_params(bearer))
+    return {
+        "ue_id": bearer.ue_id,
+        "bearer_id": bearer.bearer_id,
+        "profile": bearer.profile,
+        "seed": bearer.seed,
+        "total_sdu_sent": results["total_sdu_sent"],
+        "calculated_lost_sdu": results["calculated_lost_sdu"],
+        "tx_next_final": results["tx_status"]["tx_next_final"],
+        "rx_status": {k: results["rx_status"][k] for k in RX_COUNTERS + ["rx_deliv", "rx_next"]},
+        "channel_stats": dict(results["channel_stats"]),
+        "duration_seconds": results["duration_seconds"],
+    }
+
+
+def init_worker(log_level):
+    """Process pool initializer: worker processes log like the parent."""
+    setup_logging(log_level)
+    logging.getLogger().setLevel(log_level)
+
+
+def _run_shard(bearers: list) -> list:
+    return [run_bearer(bearer) for bearer in bearers]
+
+
+def merge_bearer_results(bearer_results: list) -> dict:
+    """Merges per-bearer summaries into cell totals plus per-UE and per-profile breakdowns."""
+    def empty_totals():
+        return {"bearers": 0, "total_sdu_sent": 0, "calculated_lost_sdu": 0,
+                **{k: 0 for k in RX_COUNTERS}, **{f"channel_{k}": 0 for k in CHANNEL_COUNTERS}}
+
+    def accumulate(totals, result):
+        totals["bearers"] += 1
+        totals["total_sdu_sent"] += result["total_sdu_sent"]
+        totals["calculated_lost_sdu"] += result["calculated_lost_sdu"]
+        for k in RX_COUNTERS:
+            totals[k] += result["rx_status"][k]
+        for k in CHANNEL_COUNTERS:
+            totals[f"channel_{k}"] += result["channel_stats"][k]
+
+    cell, per_ue, per_profile = empty_totals(), {}, {}
+    for result in bearer_results:
+        accumulate(cell, result)
+        accumulate(per_ue.setdefault(result["ue_id"], empty_totals()), result)
+        accumulate(per_profile.setdefault(result["profile"], empty_totals()), result)
+
+    return {
+        "cell": cell,
+        "per_ue": per_ue,
+        "per_profile": per_profile,
+        "bearers": sorted(bearer_results, key=lambda r: (r["ue_id"], r["bearer_id"])),
+    }
+
+
+def run_cell_simulation(population: PopulationSpec, workers: int = None, log_level: str = "ERROR") -> dict:
+    """
+    Runs every bearer of `population`, sharded across a process pool, and returns the merged
+    cell report. Each bearer runs with its own seed, so its result does not depend on the
+    worker count or on which shard it lands in.
+    """
+    bearers = population.bearers()
+    workers = workers or os.cpu_count() or 1
+    # Several shards per worker so uneven bearer profiles still balance across the pool
+    num_shards = min(len(bearers), workers * 4) or 1
+    shards = [bearers[i::num_shards] for i in range(num_shards)]
+
+    logger.info(f"Running {len(bearers)} bearers ({population.num_ues} UEs x {population.bearers_per_ue}) on {workers} workers, {num_shards} shards")
+    start_time = time.time()
+    if workers == 1:
+        init_worker(log_level)
+        shard_results = [_run_shard(shard) for shard in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(log_level,)) as pool:
+            shard_results = list(pool.map(_run_shard, shards))
+    wall_seconds = time.time() - start_time
+
+    report = merge_bearer_results([r for shard in shard_results for r in shard])
+    report["run"] = {
+        "workers": workers,
+        "num_bearers": len(bearers),
+        "wall_seconds": wall_seconds,
+        "throughput_sdu_per_second": report["cell"]["total_sdu_sent"] / wall_seconds if wall_seconds > 0 else None,
+    }
+    logger.info(f"Cell simulation finished in {wall_seconds:.2f} s ({report['run']['throughput_sdu_per_second']:.0f} SDU/s)")
+    return report
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Multi-UE / multi-bearer PDCP cell simulation")
+    parser.add_argument("--ues", type=int, default=10)
+    parser.add_argument("--bearers-per-ue", type=int, default=2)
+    parser.add_argument("--packets", type=int, default=config.SIMULATION_PACKETS, help="SDUs per bearer")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profiles", type=str, default=None, help="JSON file: {profile_name: {PARAM: value}}")
+    parser.add_argument("--output", type=str, default=None, help="Write the cell report JSON here")
+    args = parser.parse_args()
+
+    setup_logging(config.LOG_LEVEL)
+    population = PopulationSpec(num_ues=args.ues, bearers_per_ue=args.bearers_per_ue,
+                                packets_per_bearer=args.packets, base_seed=args.seed)
+    if args.profiles:
+        with open(args.profiles) as f:
+            population.profiles = json.load(f)
+
+    report = run_cell_simulation(population, workers=args.workers)
+    logger.info(f"Cell totals: {report['cell']}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f)
+        logger.info(f"Cell report saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main_cli()
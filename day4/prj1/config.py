@@ -1,7 +1,13 @@
 # Simulation Parameters
 SN_LENGTH_BITS = 12  # Can be 12 or 18
 SIMULATION_PACKETS = 1000  # Number of SDUs to send
+PAYLOAD_FREE = False  # True: PDUs carry only IDs/COUNTs, no payload strings (for large sweeps)
+BATCH_SIZE = 0  # > 0: process SDUs in NumPy blocks of this size (vectorized channel + receive_batch); 0 = per-SDU loop
+ENCODE_PDUS = False  # Batched mode: hand the receiver 38.323 PDU bytes (2/3-byte header + payload) instead of SN arrays
+PDU_PAYLOAD_BYTES = 0  # Payload bytes per encoded PDU
 # SIMULATION_PACKETS = 5000 # For wrap-around testing with 12-bit SN
+INITIAL_COUNT = 0 # Starting COUNT for TX and RX, e.g. 2**32 - 1000 to cross the 32-bit COUNT wrap in a short run
+                  # (count_scenarios.py runs several such COUNT regions back to back)
 
 # Channel Impairment Rates
 LOSS_RATE = 0.01          # Packet loss rate (0.0 to 1.0)
@@ -9,17 +15,50 @@ REORDERING_RATE = 0.02    # Packet reordering rate (0.0 to 1.0)
 DUPLICATION_RATE = 0.01   # Packet duplication rate (0.0 to 1.0)
 CORRUPTION_RATE = 0.005   # Packet corruption rate (0.0 to 1.0)
 
+SEED = None  # Seed for the channel's impairment RNG; None draws from the global `random` module
+
 # PDCP Receiver Parameters
 # Window_Size for HFN calculation is 2**(SN_LENGTH_BITS - 1) as per spec, calculated in PDCPReceiver
 T_REORDERING_THRESHOLD = 20  # Number of PDUs received while timer is active to trigger expiry
                                # Or, if a gap persists for this many subsequently processed PDUs.
+T_REORDERING_MS = None  # If set (e.g. 10), t-Reordering runs on the simulated clock for this many ms
+                        # and T_REORDERING_THRESHOLD is ignored.
+SDU_INTERVAL_MS = 0.1  # Simulated time between consecutive SDUs at the transmitter
 
 # Channel Simulator Parameters
 CHANNEL_REORDER_BUFFER_SIZE = 10 # Max packets channel holds for potential reordering
+CHANNEL_PROPAGATION_DELAY_MS = 1.0 # Fixed delay added to each PDU's arrival timestamp
+CHANNEL_JITTER_MS = 0.0 # > 0: REORDERING_RATE of the PDUs are held back by a random jitter of this mean and
+                        # PDUs leave in delivery-time order (real reordering; needs no multi-PDU transmits)
+CHANNEL_JITTER_DISTRIBUTION = "exponential" # "exponential", "uniform" or "pareto" (heavy tail)
+CHANNEL_BURST_P_GOOD_TO_BAD = 0.0 # > 0: Gilbert-Elliott bursty loss; per-PDU chance of entering the bad state
+CHANNEL_BURST_P_BAD_TO_GOOD = 0.25 # Per-PDU chance of leaving it (mean burst length 1/p)
+CHANNEL_BURST_LOSS_RATE = 0.5 # Loss rate in the bad state (LOSS_RATE applies in the good state)
+
+# Results output
+RESULTS_FORMAT = "columnar" # "columnar": time series streamed to per-column compressed chunk files + JSON summary sidecar
+                            # "json": one JSON document with everything (small runs only)
+RESULTS_COMPRESS_LEVEL = 6 # Columnar only: zlib level per chunk (0 = stored); columns stay memory-mappable either way
+PDU_TRACE_FILE = None # e.g. "data/pdus.pdcptrace": also dump every PDU leaving the channel, for replay with pdu_trace.py
+PDU_TRACE_FORMAT = "pdcptrace" # "pdcptrace" (keeps the corrupted flag) or "pcap" (LINKTYPE_USER0, corrupted PDUs left out)
 
 # Plotting
 ENABLE_PLOTTING = True
 PLOT_GRANULARITY = 50 # Plot data points every N packets for large simulations to keep plots readable
+PLOT_MAX_POINTS = 1000 # If > 0: sample every packet and keep at most this many points via min/max bucketing
+                       # (buffer occupancy peaks are kept at full resolution); PLOT_GRANULARITY is then ignored
+
+# Web app (app.py)
+WEB_JOB_WORKERS = 2 # Simulations run concurrently in background threads
+WEB_MAX_PENDING_JOBS = 16 # Queued + running jobs before /run_simulation answers 429
+WEB_SSE_HEARTBEAT_S = 15 # Keep-alive comment interval on idle progress streams
+WEB_PLOT_MAX_POINTS = 400 # Plot points per series sent to the browser
+WEB_DEFAULT_SEED = 0 # Seed pre-filled in the web form; seeded runs are reproducible and therefore cached
+WEB_CACHE_MAX_BYTES = 64 * 1024 * 1024 # Memory budget of the result/plot cache (LRU eviction)
+WEB_CACHE_DIR = None # e.g. "data/cache": also persist cached results to disk
 
 # Logging
-LOG_LEVEL = "INFO" # DEBUG, INFO, WARNING, ERROR
\ No newline at end of file
+LOG_LEVEL = "INFO" # DEBUG, INFO, WARNING, ERROR
+TRACE_SAMPLE_EVERY = 1 # Log only 1 in N per-packet events (1 = log all)
+TRACE_RING_CAPACITY = 0 # Keep the last N per-packet events in memory and dump them on error (0 = off)
+STAGE_TIMING = False # Per-stage call counts / cumulative / max ns in results["stage_timing"] and the RX status
\ No newline at end of file
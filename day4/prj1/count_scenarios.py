@@ -0,0 +1,146 @@
+import argparse
+import dataclasses
+import json
+import logging
+import time
+
+import config # Default simulation parameters
+from main import setup_logging, make_channel
+from cell_simulation import simulation_params
+from src.pdcp_entity import PDCPTransmitter, PDCPReceiver
+from src.tracing import Tracer
+
+logger = logging.getLogger(__name__)
+
+COUNT_MODULUS = 2**32
+
+# Receiver counters reported per region (as the change over that region)
+REGION_COUNTERS = ["delivered_sdu_count", "discarded_duplicates", "discarded_old",
+                   "discarded_corrupted", "out_of_order_deliveries"]
+
+
+@dataclasses.dataclass
+class CountRegion:
+    """`num_sdus` SDUs sent starting at COUNT `start_count`."""
+    start_count: int
+    num_sdus: int
+    label: str = ""
+
+
+def regions_of_interest(sn_length: int, sdus_per_region: int = 5000) -> list:
+    """
+    COUNT regions worth exercising, each centred on its boundary: session start, the first HFN
+    increment, COUNT bit 31 (signed/unsigned confusion) and the 32-bit COUNT wrap.
+    """
+    half = sdus_per_region // 2
+    return [
+        CountRegion(0, sdus_per_region, "session_start"),
+        CountRegion(2**sn_length - half, sdus_per_region, "first_hfn_increment"),
+        CountRegion(2**31 - half, sdus_per_region, "count_bit31"),
+        CountRegion(COUNT_MODULUS - half, sdus_per_region, "count_wrap"),
+    ]
+
+
+def run_count_scenario(params, regions: list) -> dict:
+    """
+    Runs one TX -> channel -> RX session through several COUNT regions in turn. Before each region
+    both entities are fast-forwarded to its start_count (the receiver is flushed first), so regions
+    billions of COUNTs apart take seconds. SDU_IDs and the simulated clock continue across regions.
+    Returns per-region receiver counters plus the final RX status and channel stats.
+    """
+    tracer = Tracer(sample_every=getattr(params, "TRACE_SAMPLE_EVERY", 1),
+                    ring_capacity=getattr(params, "TRACE_RING_CAPACITY", 0))
+    first_count = regions[0].start_count if regions else 0
+    transmitter = PDCPTransmitter(sn_length=params.SN_LENGTH_BITS, tracer=tracer, initial_count=first_count)
+    receiver = PDCPReceiver(sn_length=params.SN_LENGTH_BITS,
+                            t_reordering_threshold=params.T_REORDERING_THRESHOLD,
+                            t_reordering_ms=getattr(params, "T_REORDERING_MS", None),
+                            tracer=tracer, initial_count=first_count)
+    channel = make_channel(params, tracer)
+    sdu_interval_ms = getattr(params, "SDU_INTERVAL_MS", 0.1)
+
+    start_time = time.time()
+    sdu_id = 0
+    region_results = []
+    try:
+        for region in regions:
+            start_count = region.start_count % COUNT_MODULUS
+            if start_count != transmitter.tx_next:
+                receiver.flush_buffer()
+                transmitter.fast_forward(start_count)
+                receiver.fast_forward(start_count)
+            before = receiver.get_status()
+            for _ in range(region.num_sdus):
+                pdcp_pdu = transmitter.send_sdu(sdu_id=sdu_id)
+                for p_out_ch in channel.transmit([pdcp_pdu], now_ms=sdu_id * sdu_interval_ms):
+                    receiver.receive_pdu(p_out_ch)
+                sdu_id += 1
+            for p_out_ch in channel.flush(): # A jittering channel's stragglers count towards their own region
+                receiver.receive_pdu(p_out_ch)
+            after = receiver.get_status()
+            end_count = (start_count + region.num_sdus) % COUNT_MODULUS
+            region_results.append({
+                "label": region.label,
+                "start_count": start_count,
+                "end_count": end_count,
+                "num_sdus": region.num_sdus,
+                "crosses_count_wrap": start_count + region.num_sdus > COUNT_MODULUS,
+                "rx_deliv": after["rx_deliv"],
+                "rx_next": after["rx_next"],
+                "buffered_pdu_count": after["buffered_pdu_count"],
+                **{k: after[k] - before[k] for k in REGION_COUNTERS},
+            })
+            logger.info(f"Region {region.label or start_count}: COUNT {start_count}..{end_count}, "
+                        f"delivered {region_results[-1]['delivered_sdu_count']}/{region.num_sdus}, "
+                        f"RX_DELIV={after['rx_deliv']}, RX_NEXT={after['rx_next']}")
+        receiver.flush_buffer()
+    except Exception:
+        logger.error("COUNT scenario aborted by an exception; dumping recent PDCP events.")
+        tracer.dump()
+        raise
+
+    return {
+        "duration_seconds": time.time() - start_time,
+        "total_sdu_sent": sdu_id,
+        "regions": region_results,
+        "tx_status": {"tx_next_final": transmitter.tx_next},
+        "rx_status": receiver.get_status(),
+        "channel_stats": channel.get_stats(),
+    }
+
+
+def _parse_regions(text: str) -> list:
+    # "start:count[:label],..." e.g. "4294966296:2000:wrap,0:1000"
+    regions = []
+    for item in text.split(","):
+        fields = item.strip().split(":")
+        regions.append(CountRegion(int(fields[0], 0), int(fields[1]), fields[2] if len(fields) > 2 else ""))
+    return regions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Run the PDCP simulation through selected COUNT regions (e.g. the 32-bit wrap)")
+    parser.add_argument("--regions", type=str, default=None,
+                        help='Comma-separated start:num_sdus[:label], e.g. "0xFFFFFC18:2000:wrap" (default: regions_of_interest())')
+    parser.add_argument("--sdus-per-region", type=int, default=5000)
+    parser.add_argument("--sn-length", type=int, default=None, help="Default: config.SN_LENGTH_BITS")
+    parser.add_argument("--seed", type=int, default=None, help="Default: config.SEED")
+    parser.add_argument("--output", type=str, default=None, help="Write the results JSON here")
+    args = parser.parse_args()
+
+    setup_logging(config.LOG_LEVEL)
+    overrides = {"SN_LENGTH_BITS": args.sn_length} if args.sn_length is not None else {}
+    params = simulation_params(overrides, seed=args.seed if args.seed is not None else config.SEED)
+    regions = _parse_regions(args.regions) if args.regions else regions_of_interest(params.SN_LENGTH_BITS, args.sdus_per_region)
+
+    results = run_count_scenario(params, regions)
+    for region in results["regions"]:
+        logger.info(f"{region['label'] or region['start_count']}: {json.dumps(region)}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+        logger.info(f"COUNT scenario results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main_cli()
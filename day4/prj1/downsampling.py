@@ -0,0 +1,80 @@
+class MinMaxDownsampler:
+    """
+    Online min/max bucketing of a sample stream into at most `max_points` plot points.
+
+    Samples are grouped into equal-width buckets. For each bucket only the sample with the lowest
+    and the one with the highest `peak_column` value are kept, so short spikes (e.g. reordering
+    buffer occupancy) survive at full resolution however long the run is. When the bucket list
+    is full, neighbouring buckets are merged pairwise and the width doubles, so memory stays
+    O(max_points) without knowing the stream length in advance.
+    Same append() interface as the other plot sinks; the retained points are written to the
+    wrapped `sink` by finish(), or read with data().
+    """
+
+    def __init__(self, max_points: int, sink=None, peak_column: str = "buffer_size"):
+        if max_points < 4:
+            raise ValueError("max_points must be at least 4")
+        self.sink = sink
+        self.peak_column = peak_column
+        # Even, so buckets always merge in pairs. 2 points per bucket, plus the open bucket and the last sample.
+        self._max_buckets = max(2, ((max_points - 3) // 2) & ~1)
+        self._buckets = []  # Closed buckets: (min_sample, max_sample)
+        self._width = 1
+        self._open_min = None
+        self._open_max = None
+        self._open_count = 0
+        self._last = None
+        self.samples_seen = 0
+
+    def append(self, **sample):
+        self.samples_seen += 1
+        self._last = sample
+        value = sample[self.peak_column]
+        if not self._open_count:
+            self._open_min = self._open_max = sample
+        elif value < self._open_min[self.peak_column]:
+            self._open_min = sample
+        elif value > self._open_max[self.peak_column]:
+            self._open_max = sample
+        self._open_count += 1
+        if self._open_count == self._width:
+            self._buckets.append((self._open_min, self._open_max))
+            self._open_count = 0
+            if len(self._buckets) == self._max_buckets:
+                self._merge_pairs()
+
+    def _merge_pairs(self):
+        peak = self.peak_column
+        merged = []
+        for (min_a, max_a), (min_b, max_b) in zip(self._buckets[0::2], self._buckets[1::2]):
+            merged.append((min_a if min_a[peak] <= min_b[peak] else min_b,
+                           max_a if max_a[peak] >= max_b[peak] else max_b))
+        self._buckets = merged
+        self._width *= 2
+
+    def _points(self) -> list:
+        buckets = list(self._buckets)
+        if self._open_count:
+            buckets.append((self._open_min, self._open_max))
+        points = []
+        for low, high in buckets:
+            # Keep stream order inside the bucket
+            first, second = (low, high) if low["time"] <= high["time"] else (high, low)
+            points.append(first)
+            if second is not first:
+                points.append(second)
+        if self._last is not None and (not points or points[-1] is not self._last):
+            points.append(self._last) # Always end on the final state
+        return points
+
+    def data(self) -> dict:
+        """Retained points as {column: [values]}, in stream order."""
+        points = self._points()
+        if not points:
+            return {}
+        return {name: [p[name] for p in points] for name in points[0]}
+
+    def finish(self):
+        """Writes the retained points to the wrapped sink."""
+        for point in self._points():
+            self.sink.append(**point)
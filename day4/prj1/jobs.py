@@ -0,0 +1,190 @@
+import collections
+import logging
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job (from its progress callback) once cancel() was requested."""
+
+
+class QueueFullError(RuntimeError):
+    """Raised by JobManager.submit() when max_pending jobs are already queued or running."""
+
+
+class Job:
+    """One submitted simulation. Fields are updated by the worker thread; read them via JobManager.status()."""
+
+    def __init__(self, job_id: str, description: str, max_progress_events: int = 256):
+        self.id = job_id
+        self.description = description
+        self.status = JOB_QUEUED
+        self.progress_done = 0
+        self.progress_total = 0
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.cancel_requested = threading.Event()
+        # Progress snapshots reported by the job, each tagged with a sequence number "seq" so
+        # streaming clients can ask for what they have not seen. Bounded: every other one is
+        # dropped when full, which keeps the whole time span at lower resolution.
+        self.progress_events = []
+        self.max_progress_events = max_progress_events
+        self.events_recorded = 0
+        self.version = 0  # Bumped on every change, so listeners know when to wake up
+
+    def snapshot(self, include_result: bool = True) -> dict:
+        progress = self.progress_done / self.progress_total if self.progress_total else (1.0 if self.status == JOB_DONE else 0.0)
+        snapshot = {
+            "job_id": self.id,
+            "description": self.description,
+            "status": self.status,
+            "progress": progress,
+            "sdus_done": self.progress_done,
+            "sdus_total": self.progress_total,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "cancel_requested": self.cancel_requested.is_set(),
+        }
+        if self.error is not None:
+            snapshot["error"] = self.error
+        if include_result and self.status == JOB_DONE:
+            snapshot["result"] = self.result
+        return snapshot
+
+
+class JobManager:
+    """
+    Runs simulation jobs in a bounded pool of worker threads, off the HTTP request threads.
+
+    submit(fn, ...) returns a job id right away; fn(..., progress_callback=cb) runs in the pool
+    and reports progress through cb(done, total). At most `max_pending` jobs may be queued or
+    running at once (submit raises QueueFullError beyond that), and only the most recent
+    `max_finished` finished jobs are kept for polling. Progress snapshots passed as
+    cb(done, total, snapshot) are kept per job for streaming (see wait_for_update()), and
+    cancel() makes the next progress report raise JobCancelled inside the job.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 16, max_finished: int = 100):
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sim-job")
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)  # Notified whenever any job changes
+        self._jobs = collections.OrderedDict()  # job_id -> Job, in submission order
+        self._pending = 0
+
+    def _touch(self, job: Job):
+        # Caller holds self._lock (the condition's lock)
+        job.version += 1
+        self._changed.notify_all()
+
+    def submit(self, fn, *args, description: str = "", **kwargs) -> str:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFullError(f"{self._pending} jobs already queued or running (limit {self.max_pending})")
+            job = Job(uuid.uuid4().hex, description)
+            self._jobs[job.id] = job
+            self._pending += 1
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        logger.info(f"Job {job.id} queued: {description}")
+        return job.id
+
+    def _run(self, job: Job, fn, args, kwargs):
+        with self._lock:
+            job.started_at = time.time()
+            job.status = JOB_RUNNING
+            self._touch(job)
+
+        def progress_callback(done, total, snapshot=None):
+            if job.cancel_requested.is_set():
+                raise JobCancelled(f"Job {job.id} cancelled")
+            with self._lock:
+                job.progress_done, job.progress_total = done, total
+                if snapshot is not None:
+                    if len(job.progress_events) >= job.max_progress_events:
+                        del job.progress_events[::2]
+                    job.progress_events.append({"seq": job.events_recorded, **snapshot})
+                    job.events_recorded += 1
+                self._touch(job)
+
+        try:
+            if job.cancel_requested.is_set():
+                raise JobCancelled(f"Job {job.id} cancelled before it started")
+            result = fn(*args, progress_callback=progress_callback, **kwargs)
+            status, error = JOB_DONE, None
+            logger.info(f"Job {job.id} finished in {time.time() - job.started_at:.2f}s")
+        except JobCancelled as e:
+            result, status, error = None, JOB_CANCELLED, str(e)
+            logger.info(str(e))
+        except Exception as e:
+            result, status, error = None, JOB_FAILED, str(e)
+            logger.error(f"Job {job.id} failed: {e}\n{traceback.format_exc()}")
+        with self._lock:
+            job.result, job.status, job.error = result, status, error
+            job.finished_at = time.time()
+            self._pending -= 1
+            self._touch(job)
+            self._evict_finished()
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Requests cancellation. A queued job never starts; a running one stops at its next
+        progress report. Returns False if the job is unknown or already finished.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED_STATES:
+                return False
+            job.cancel_requested.set()
+            return True
+
+    def wait_for_update(self, job_id: str, seen_version: int, timeout: float = None):
+        """
+        Blocks until the job's version moves past `seen_version` (or `timeout` seconds pass).
+        Returns (version, snapshot, progress_events) with the events recorded so far, or None for an unknown job.
+        """
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            self._changed.wait_for(lambda: job.version != seen_version, timeout=timeout)
+            return job.version, job.snapshot(), list(job.progress_events)
+
+    def _evict_finished(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def status(self, job_id: str, include_result: bool = True) -> dict:
+        """Snapshot of a job (None if unknown or already evicted). The result is included once done."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.snapshot(include_result) if job is not None else None
+
+    def progress_events(self, job_id: str) -> list:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return list(job.progress_events) if job is not None else None
+
+    def list_jobs(self) -> list:
+        with self._lock:
+            return [job.snapshot(include_result=False) for job in self._jobs.values()]
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
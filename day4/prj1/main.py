@@ -7,19 +7,32 @@ from datetime import datetime
 from src.pdcp_entity import PDCPTransmitter, PDCPReceiver
 from src.channel_simulator import ImpairedChannel
 from src.pdcp_packet import PDCP_PDU # For type hinting if needed
+from src.pdu_codec import PDUCodec
+from src.tracing import Tracer
+from src.stage_timing import StageTimers, perf_counter_ns
+import numpy as np
 import config # Simulation parameters from config.py
+from result_store import ColumnarResultWriter, ColumnarResultReader, PLOT_COLUMNS
+from downsampling import MinMaxDownsampler
+from pdu_trace import TraceWriter
 
 # --- Initialize module-level logger ---
 # This logger will be used by functions within this main.py file.
 # The src/ modules will create their own loggers which will also benefit from basicConfig.
 logger = logging.getLogger(__name__)
 
-# --- Data Collection for Plotting (Global within this module) ---
-tx_counts_log = []
-rx_deliv_log = []
-rx_next_log = []
-reordering_buffer_size_log = []
-simulation_time_log = [] # Relative time or packet number
+class PlotDataLog:
+    """
+    Per-run, in-memory collection of the plot time series (what results["plot_data"] holds).
+    Same append() interface as result_store.ColumnarResultWriter, so run_simulation can feed either.
+    Each run gets its own instance, so concurrent runs (e.g. web jobs) never share plot data.
+    """
+    def __init__(self):
+        self.data = {name: [] for name in PLOT_COLUMNS}
+
+    def append(self, **sample):
+        for name, values in self.data.items():
+            values.append(sample[name])
 
 def setup_logging(log_level_str):
     level = getattr(logging, log_level_str.upper(), logging.INFO)
@@ -28,51 +41,162 @@ def setup_logging(log_level_str):
     logging.basicConfig(level=level, format='%(asctime)s - %(levelname)s - %(name)s - %(message)s')
     logger.info(f"Logging initialized at level {log_level_str.upper()} for the application.")
 
-def run_simulation(params):
+def _record_plot_point(step, transmitter, receiver, sample_sink):
+    sample_sink.append(time=step, tx_count=transmitter.tx_next, rx_deliv=receiver.rx_deliv,
+                       rx_next=receiver.rx_next, buffer_size=len(receiver.reordering_buffer))
+
+def _progress_snapshot(step, transmitter, receiver, channel):
+    # Small live view of the run for progress streaming: the current plot sample plus running counters
+    return {
+        "time": step,
+        "tx_count": transmitter.tx_next,
+        "rx_deliv": receiver.rx_deliv,
+        "rx_next": receiver.rx_next,
+        "buffer_size": len(receiver.reordering_buffer),
+        "delivered_sdu_count": len(receiver.delivered_sdu_ids),
+        "discarded_duplicates": receiver.discarded_duplicates_count,
+        "discarded_old": receiver.discarded_old_count,
+        "discarded_corrupted": receiver.discarded_corrupted_count,
+        "out_of_order_deliveries": receiver.out_of_order_deliveries,
+        "channel_lost": channel.stats["total_lost"],
+    }
+
+def make_channel(params, tracer: Tracer) -> ImpairedChannel:
+    """The ImpairedChannel described by the CHANNEL_* / rate parameters."""
+    burst_loss = None
+    if getattr(params, "CHANNEL_BURST_P_GOOD_TO_BAD", 0.0) > 0:
+        burst_loss = (params.CHANNEL_BURST_P_GOOD_TO_BAD, params.CHANNEL_BURST_P_BAD_TO_GOOD,
+                      params.CHANNEL_BURST_LOSS_RATE)
+    return ImpairedChannel(
+        loss_rate=params.LOSS_RATE,
+        reordering_rate=params.REORDERING_RATE,
+        duplication_rate=params.DUPLICATION_RATE,
+        corruption_rate=params.CORRUPTION_RATE,
+        reorder_buffer_size=getattr(params, "CHANNEL_REORDER_BUFFER_SIZE", 10),
+        propagation_delay_ms=getattr(params, "CHANNEL_PROPAGATION_DELAY_MS", 0.0),
+        seed=getattr(params, "SEED", None),
+        tracer=tracer,
+        jitter_ms=getattr(params, "CHANNEL_JITTER_MS", 0.0),
+        jitter_distribution=getattr(params, "CHANNEL_JITTER_DISTRIBUTION", "exponential"),
+        burst_loss=burst_loss,
+    )
+
+def run_simulation(params, sample_writer=None, progress_callback=None, pdu_trace_writer=None):
     """
     Runs a single simulation with given parameters.
     `params` is a dictionary-like object (e.g., config module or a dict).
+    All simulation state is local to the call, so runs can execute concurrently in threads.
+    If `sample_writer` (a result_store.ColumnarResultWriter) is given, the time-series samples are
+    streamed to it instead of being kept in memory, and results["plot_data"] is left empty.
+    `progress_callback(sdus_done, total_sdus, snapshot)` is called about every 1% of the run with a
+    small dict of current counters (see _progress_snapshot); raising from it aborts the run.
+    If `pdu_trace_writer` (a pdu_trace.TraceWriter) is given, every PDU leaving the channel is also
+    written to it, encoded, in arrival order, for later replay with pdu_trace.py.
     """
     # Note: setup_logging() is now called in main_cli() or at the start of the script if run directly.
     # The module-level 'logger' is used throughout this function.
 
-    # Clear previous log data
-    tx_counts_log.clear()
-    rx_deliv_log.clear()
-    rx_next_log.clear()
-    reordering_buffer_size_log.clear()
-    simulation_time_log.clear()
+    plot_log = PlotDataLog()
+    sample_sink = sample_writer if sample_writer is not None else plot_log
+    # PLOT_MAX_POINTS: sample every SDU and keep a bounded, peak-preserving subset (constant memory).
+    # Otherwise fall back to a fixed stride of PLOT_GRANULARITY.
+    plot_max_points = getattr(params, "PLOT_MAX_POINTS", 0)
+    downsampler = None
+    if plot_max_points:
+        downsampler = sample_sink = MinMaxDownsampler(plot_max_points, sink=sample_sink)
+    plot_stride = 1 if downsampler is not None else getattr(params, "PLOT_GRANULARITY", 1)
+
+    # One tracer shared by TX, channel and RX so the ring buffer holds their events interleaved.
+    # Created after logging is configured: it snapshots the enabled levels.
+    tracer = Tracer(sample_every=getattr(params, "TRACE_SAMPLE_EVERY", 1),
+                    ring_capacity=getattr(params, "TRACE_RING_CAPACITY", 0))
+
+    # Per-stage timing (STAGE_TIMING): run_simulation times TX / channel / RX / flush, the receiver
+    # its internal stages, all into the same counters
+    timers = StageTimers(enabled=getattr(params, "STAGE_TIMING", False))
 
     # Initialize PDCP entities and Channel
-    transmitter = PDCPTransmitter(sn_length=params.SN_LENGTH_BITS)
+    # INITIAL_COUNT: both sides start as if that many SDUs had already been exchanged
+    initial_count = getattr(params, "INITIAL_COUNT", 0)
+    transmitter = PDCPTransmitter(sn_length=params.SN_LENGTH_BITS, tracer=tracer, initial_count=initial_count)
     receiver = PDCPReceiver(sn_length=params.SN_LENGTH_BITS,
-                            t_reordering_threshold=params.T_REORDERING_THRESHOLD)
-    channel = ImpairedChannel(
-        loss_rate=params.LOSS_RATE,
-        reordering_rate=params.REORDERING_RATE,
-        duplication_rate=params.DUPLICATION_RATE,
-        corruption_rate=params.CORRUPTION_RATE,
-    )
+                            t_reordering_threshold=params.T_REORDERING_THRESHOLD,
+                            t_reordering_ms=getattr(params, "T_REORDERING_MS", None),
+                            tracer=tracer, timers=timers, initial_count=initial_count)
+    channel = make_channel(params, tracer)
+    sdu_interval_ms = getattr(params, "SDU_INTERVAL_MS", 0.1)
 
     logger.info("Starting PDCP Simulation...") # Uses module-level logger
     start_time = time.time()
 
     total_sdu_to_send = params.SIMULATION_PACKETS
-    for i in range(total_sdu_to_send):
-        sdu_payload = f"SDU_data_{i}"
-        pdcp_pdu = transmitter.send_sdu(sdu_id=i, sdu_payload=sdu_payload)
-        pdus_from_channel = channel.transmit([pdcp_pdu])
-        for p_out_ch in pdus_from_channel:
-            receiver.receive_pdu(p_out_ch)
-
-        if i % getattr(params, "PLOT_GRANULARITY", 1) == 0 or i == total_sdu_to_send - 1:
-            tx_counts_log.append(transmitter.tx_next)
-            rx_deliv_log.append(receiver.rx_deliv)
-            rx_next_log.append(receiver.rx_next)
-            reordering_buffer_size_log.append(len(receiver.reordering_buffer))
-            simulation_time_log.append(i)
-
-    receiver.flush_buffer()
+    # Payload-free mode skips building a payload string per SDU; nothing downstream reads it.
+    payload_free = getattr(params, "PAYLOAD_FREE", False)
+    batch_size = getattr(params, "BATCH_SIZE", 0)
+    # ENCODE_PDUS: the receiver gets real 38.323 PDU bytes (batched mode), so parsing is part of the run
+    codec = None
+    if getattr(params, "ENCODE_PDUS", False):
+        if batch_size:
+            codec = PDUCodec(params.SN_LENGTH_BITS)
+        else:
+            logger.warning("ENCODE_PDUS needs BATCH_SIZE > 0; running with PDU objects instead.")
+    progress_every = max(1, total_sdu_to_send // 100)
+    try:
+        if batch_size:
+            _run_batched(transmitter, channel, receiver, total_sdu_to_send, batch_size, sdu_interval_ms,
+                         sample_sink, progress_callback, timers, codec, getattr(params, "PDU_PAYLOAD_BYTES", 0),
+                         pdu_trace_writer)
+        else:
+            timing = timers.enabled
+            for i in range(total_sdu_to_send):
+                sdu_payload = None if payload_free else f"SDU_data_{i}"
+                if timing:
+                    t0 = perf_counter_ns()
+                    pdcp_pdu = transmitter.send_sdu(sdu_id=i, sdu_payload=sdu_payload)
+                    t1 = perf_counter_ns()
+                    pdus_from_channel = channel.transmit([pdcp_pdu], now_ms=i * sdu_interval_ms)
+                    t2 = perf_counter_ns()
+                    trace_ns = 0
+                    for p_out_ch in pdus_from_channel:
+                        if pdu_trace_writer is not None:
+                            t3 = perf_counter_ns()
+                            pdu_trace_writer.write_pdu(p_out_ch)
+                            trace_ns += perf_counter_ns() - t3
+                        receiver.receive_pdu(p_out_ch)
+                    timers.add("tx", t1 - t0)
+                    timers.add("channel", t2 - t1)
+                    if pdu_trace_writer is not None:
+                        timers.add("trace_write", trace_ns)
+                    timers.add("rx", perf_counter_ns() - t2 - trace_ns)
+                else:
+                    pdcp_pdu = transmitter.send_sdu(sdu_id=i, sdu_payload=sdu_payload)
+                    pdus_from_channel = channel.transmit([pdcp_pdu], now_ms=i * sdu_interval_ms)
+                    for p_out_ch in pdus_from_channel:
+                        if pdu_trace_writer is not None:
+                            pdu_trace_writer.write_pdu(p_out_ch)
+                        receiver.receive_pdu(p_out_ch)
+
+                if i % plot_stride == 0 or i == total_sdu_to_send - 1:
+                    _record_plot_point(i, transmitter, receiver, sample_sink)
+                if progress_callback is not None and i % progress_every == 0:
+                    progress_callback(i, total_sdu_to_send, _progress_snapshot(i, transmitter, receiver, channel))
+
+        t0 = perf_counter_ns() if timers.enabled else 0
+        if not batch_size:
+            # PDUs still held back by a delay-scheduling channel
+            for p_out_ch in channel.flush():
+                if pdu_trace_writer is not None:
+                    pdu_trace_writer.write_pdu(p_out_ch)
+                receiver.receive_pdu(p_out_ch)
+        receiver.flush_buffer()
+        if t0:
+            timers.add("flush", perf_counter_ns() - t0)
+        if downsampler is not None:
+            downsampler.finish()
+    except Exception:
+        logger.error("Simulation aborted by an exception; dumping recent PDCP events.")
+        tracer.dump()
+        raise
     end_time = time.time()
     simulation_duration = end_time - start_time
     logger.info(f"Simulation finished in {simulation_duration:.2f} seconds.")
@@ -104,16 +228,71 @@ def run_simulation(params):
         "rx_status": rx_status,
         "channel_stats": channel_stats,
         "calculated_lost_sdu": lost_sdu_count,
-        "plot_data": {
-            "time": simulation_time_log,
-            "tx_count": tx_counts_log,
-            "rx_deliv": rx_deliv_log,
-            "rx_next": rx_next_log,
-            "buffer_size": reordering_buffer_size_log
-        }
+        "plot_data": plot_log.data
     }
+    if timers.enabled:
+        results["stage_timing"] = timers.snapshot()
+        for stage, stats in sorted(results["stage_timing"].items(), key=lambda item: -item[1]["total_ns"]):
+            logger.info(f"Stage {stage}: {stats['calls']} calls, {stats['total_ns'] / 1e6:.1f} ms total, "
+                        f"{stats['mean_ns']:.0f} ns mean, {stats['max_ns'] / 1e3:.1f} us max")
+    if progress_callback is not None:
+        progress_callback(total_sdu_to_send, total_sdu_to_send,
+                          _progress_snapshot(total_sdu_to_send, transmitter, receiver, channel))
     return results
 
+def _run_batched(transmitter, channel, receiver, total_sdu_to_send, batch_size, sdu_interval_ms, sample_sink,
+                 progress_callback, timers, codec=None, pdu_payload_bytes=0, pdu_trace_writer=None):
+    # Block-at-a-time version of the per-SDU loop in run_simulation(): same channel decisions for a
+    # given SEED, with TX, channel and RX each working on arrays. Plot points are taken at block ends.
+    # Stage timings count one call per block here. With a codec, each block of PDUs that made it
+    # through the channel is encoded into one buffer and the receiver parses it.
+    # SNs and SDU_IDs of the channel's output are derived from the indices rather than looked up, as
+    # a delay-scheduling channel also releases PDUs of earlier blocks (negative indices).
+    # deliver() times trace writing and encoding as their own stages and returns when it handed the
+    # block to the receiver (0 when not timing), where the caller's "rx" stage starts.
+    def deliver(block_start, first_sn, indices, corrupted_mask, arrival_times, timing):
+        t_start = perf_counter_ns() if timing else 0
+        out_sns = (first_sn + indices) & transmitter.max_sn_value
+        if pdu_trace_writer is not None:
+            pdu_trace_writer.write_batch(out_sns, arrival_times, corrupted_mask)
+            if timing:
+                now = perf_counter_ns()
+                timers.add("trace_write", now - t_start)
+                t_start = now
+        if codec is not None:
+            buffer, pdu_lengths = codec.encode_batch(out_sns, payload_size=pdu_payload_bytes)
+            if timing:
+                now = perf_counter_ns()
+                timers.add("encode", now - t_start)
+                t_start = now
+            receiver.receive_encoded(buffer, pdu_lengths, corrupted_mask=corrupted_mask,
+                                     sdu_ids=block_start + indices, arrival_times=arrival_times)
+        else:
+            receiver.receive_batch(out_sns, corrupted_mask=corrupted_mask,
+                                   sdu_ids=block_start + indices, arrival_times=arrival_times)
+        return t_start
+
+    start = first_sn = 0
+    for start in range(0, total_sdu_to_send, batch_size):
+        n = min(batch_size, total_sdu_to_send - start)
+        sdu_ids = np.arange(start, start + n)
+        t0 = perf_counter_ns() if timers.enabled else 0
+        _, sns = transmitter.send_batch(n)
+        first_sn = int(sns[0])
+        t1 = perf_counter_ns() if t0 else 0
+        indices, corrupted_mask, arrival_times = channel.transmit_batch(n, send_times_ms=sdu_ids * sdu_interval_ms)
+        t2 = perf_counter_ns() if t0 else 0
+        t3 = deliver(start, first_sn, indices, corrupted_mask, arrival_times, bool(t0))
+        if t0:
+            timers.add("tx", t1 - t0)
+            timers.add("channel", t2 - t1)
+            timers.add("rx", perf_counter_ns() - t3)
+        _record_plot_point(start + n - 1, transmitter, receiver, sample_sink)
+        if progress_callback is not None:
+            progress_callback(start + n, total_sdu_to_send, _progress_snapshot(start + n, transmitter, receiver, channel))
+    if channel.scheduled:
+        deliver(start, first_sn, *channel.flush_batch(), False)
+
 def save_results(results, base_filename="sim_results"):
     if not os.path.exists("data"):
         os.makedirs("data")
@@ -124,13 +303,40 @@ def save_results(results, base_filename="sim_results"):
     logger.info(f"Simulation results saved to {filepath}") # Uses module-level logger
     return filepath
 
+def save_results_columnar(results, sample_writer, base_filename="sim_results"):
+    """Finishes a streamed run: writes the summary (everything but plot_data) as the writer's JSON sidecar."""
+    summary = {k: v for k, v in results.items() if k != "plot_data"}
+    run_dir = sample_writer.close(summary)
+    logger.info(f"Simulation results saved to {run_dir} ({sample_writer.num_samples} samples)")
+    return run_dir
+
 def main_cli():
     # Setup logging ONCE at the beginning of the script execution for CLI mode.
     # For the web app (app.py), Flask's own logger or a similar setup in app.py handles logging.
     setup_logging(config.LOG_LEVEL)
 
-    results = run_simulation(config)
-    results_filepath = save_results(results)
+    pdu_trace_writer = None
+    if getattr(config, "PDU_TRACE_FILE", None):
+        pdu_trace_writer = TraceWriter(config.PDU_TRACE_FILE, config.SN_LENGTH_BITS,
+                                       fmt=getattr(config, "PDU_TRACE_FORMAT", "pdcptrace"),
+                                       payload_bytes=getattr(config, "PDU_PAYLOAD_BYTES", 0))
+
+    try:
+        if getattr(config, "RESULTS_FORMAT", "json") == "columnar":
+            # Samples stream to data/sim_results_<timestamp>/*.zcol, summary to its summary.json
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            sample_writer = ColumnarResultWriter(os.path.join("data", f"sim_results_{timestamp}"),
+                                                 compress_level=getattr(config, "RESULTS_COMPRESS_LEVEL", 6))
+            results = run_simulation(config, sample_writer=sample_writer, pdu_trace_writer=pdu_trace_writer)
+            results_filepath = save_results_columnar(results, sample_writer)
+            reader = ColumnarResultReader(results_filepath)
+            results["plot_data"] = {name: reader.column(name) for name in reader.columns} # Memory-mapped, decompressed on access
+        else:
+            results = run_simulation(config, pdu_trace_writer=pdu_trace_writer)
+            results_filepath = save_results(results)
+    finally:
+        if pdu_trace_writer is not None:
+            pdu_trace_writer.close() # Also after an exception, so the records written so far reach the file
 
     if config.ENABLE_PLOTTING:
         try:
@@ -0,0 +1,301 @@
+import argparse
+import dataclasses
+import logging
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+import config # Default simulation parameters
+from src.pdcp_entity import PDCPReceiver
+from src.pdcp_packet import PDCP_PDU
+from src.pdu_codec import PDUCodec
+
+logger = logging.getLogger(__name__)
+
+# Native format: a file header, then one record per PDU: a fixed record header followed by the
+# 38.323-encoded PDU bytes (see src/pdu_codec.py).
+TRACE_MAGIC = b"PDCPTRC1"
+_FILE_HEADER = struct.Struct("<8sB7x")   # magic, SN length
+_RECORD_HEADER = struct.Struct("<dIB3x") # arrival time (ms), PDU length, flags
+FLAG_CORRUPTED = 0x01                    # The channel flagged the PDU corrupted (the receiver discards it)
+
+# Classic libpcap. PDUs are stored as raw link-layer frames of type LINKTYPE_USER0 when written
+# here; captures with other framing (e.g. PDCP over UDP) are read with a fixed per-packet pdu_offset.
+_PCAP_MAGIC_US = 0xA1B2C3D4
+_PCAP_MAGIC_NS = 0xA1B23C4D
+PCAP_LINKTYPE_USER0 = 147
+_PCAP_FILE_HEADER = "IHHiIII" # magic, version 2.4, thiszone, sigfigs, snaplen, linktype
+_PCAP_RECORD_HEADER = "IIII"  # ts_sec, ts_usec (or ns), captured length, original length
+
+TRACE_FORMATS = ["pdcptrace", "pcap"]
+
+_RELEASE_EVERY = 64 * 1024 * 1024 # TraceReader drops mapped pages it has passed in steps of this many bytes
+
+
+@dataclasses.dataclass
+class TraceBatch:
+    """A run of consecutive trace records. `buffer` is the whole memory-mapped file; PDUs sit at `offsets`."""
+    buffer: mmap.mmap
+    offsets: np.ndarray       # Start of each PDU in the buffer
+    lengths: np.ndarray       # PDU lengths (header + payload)
+    arrival_times: np.ndarray # ms
+    corrupted: np.ndarray     # bool
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+
+class TraceWriter:
+    """
+    Writes PDUs as they leave the channel, in arrival order, to a native .pdcptrace file or a
+    pcap. Payloads are the SDU payload strings when the run has them, otherwise `payload_bytes`
+    zero bytes. pcap has no place for the corrupted flag, so corrupted PDUs are left out there
+    (a real capture would not see frames that failed the lower-layer CRC either).
+    """
+
+    def __init__(self, path: str, sn_length: int, fmt: str = "pdcptrace", payload_bytes: int = 0):
+        if fmt not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format '{fmt}'; expected one of {TRACE_FORMATS}")
+        self.path = path
+        self.fmt = fmt
+        self.codec = PDUCodec(sn_length)
+        self.payload_bytes = payload_bytes
+        self.records_written = 0
+        self.skipped_corrupted = 0
+        trace_dir = os.path.dirname(path)
+        if trace_dir and not os.path.exists(trace_dir):
+            os.makedirs(trace_dir)
+        self._file = open(path, "wb", buffering=1024 * 1024)
+        if fmt == "pdcptrace":
+            self._file.write(_FILE_HEADER.pack(TRACE_MAGIC, sn_length))
+        else:
+            self._file.write(struct.pack("<" + _PCAP_FILE_HEADER, _PCAP_MAGIC_US, 2, 4, 0, 0, 65535, PCAP_LINKTYPE_USER0))
+
+    def write(self, pdu_bytes, arrival_time_ms: float, corrupted: bool = False):
+        """One already-encoded PDU."""
+        if self.fmt == "pdcptrace":
+            self._file.write(_RECORD_HEADER.pack(arrival_time_ms, len(pdu_bytes), FLAG_CORRUPTED if corrupted else 0))
+        elif corrupted:
+            self.skipped_corrupted += 1
+            return
+        else:
+            micros = int(round(arrival_time_ms * 1000))
+            self._file.write(struct.pack("<" + _PCAP_RECORD_HEADER, micros // 1000000, micros % 1000000,
+                                         len(pdu_bytes), len(pdu_bytes)))
+        self._file.write(pdu_bytes)
+        self.records_written += 1
+
+    def write_pdu(self, pdu: PDCP_PDU):
+        payload = pdu.original_sdu_payload.encode() if pdu.original_sdu_payload is not None else bytes(self.payload_bytes)
+        self.write(self.codec.encode(pdu.sn, payload), pdu.arrival_time, pdu.is_corrupted)
+
+    def write_batch(self, sns, arrival_times, corrupted_mask=None):
+        """Many PDUs at once (batched simulation): encoded and framed as arrays, written in one call."""
+        sns = np.asarray(sns, dtype=np.int64)
+        arrival_times = np.asarray(arrival_times, dtype=np.float64)
+        corrupted = np.zeros(len(sns), dtype=bool) if corrupted_mask is None else np.asarray(corrupted_mask, dtype=bool)
+        if self.fmt == "pcap" and corrupted.any():
+            self.skipped_corrupted += int(corrupted.sum())
+            sns, arrival_times, corrupted = sns[~corrupted], arrival_times[~corrupted], corrupted[~corrupted]
+        pdus, _ = self.codec.encode_batch(sns, payload_size=self.payload_bytes)
+        pdu_size = self.codec.header_size + self.payload_bytes
+        if self.fmt == "pdcptrace":
+            records = np.zeros(len(sns), dtype=[("time", "<f8"), ("length", "<u4"), ("flags", "u1"), ("pad", "V3"),
+                                                ("pdu", "u1", (pdu_size,))])
+            records["time"] = arrival_times
+            records["flags"] = np.where(corrupted, FLAG_CORRUPTED, 0)
+        else:
+            records = np.zeros(len(sns), dtype=[("sec", "<u4"), ("usec", "<u4"), ("length", "<u4"), ("orig_length", "<u4"),
+                                                ("pdu", "u1", (pdu_size,))])
+            micros = np.round(arrival_times * 1000).astype(np.int64)
+            records["sec"], records["usec"] = micros // 1000000, micros % 1000000
+            records["orig_length"] = pdu_size
+        records["length"] = pdu_size
+        records["pdu"] = np.frombuffer(pdus, dtype=np.uint8).reshape(len(sns), pdu_size)
+        self._file.write(records.tobytes())
+        self.records_written += len(sns)
+
+    def close(self):
+        self._file.close()
+        logger.info(f"PDU trace saved to {self.path} ({self.records_written} records)")
+
+
+class TraceReader:
+    """
+    Memory-maps a .pdcptrace or pcap file and yields it as TraceBatch runs of records, so only the
+    current batch's index arrays are held in memory, whatever the file size; the PDU bytes are
+    read straight from the mapping, and pages already passed are handed back to the OS (they are
+    re-read from the file if an old batch is touched again), so resident memory stays bounded too.
+    For pcaps, `sn_length` must be given and `pdu_offset` bytes are skipped at the start of every
+    packet (0 for LINKTYPE_USER0 frames written by TraceWriter).
+    A truncated last record (interrupted write) is ignored.
+    """
+
+    def __init__(self, path: str, sn_length: int = None, pdu_offset: int = 0):
+        self.path = path
+        self.pdu_offset = pdu_offset
+        self._mm = None
+        self._file = open(path, "rb")
+        try:
+            if os.fstat(self._file.fileno()).st_size < _FILE_HEADER.size:
+                raise ValueError(f"{path} is too short to be a PDU trace")
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(self._mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                self._mm.madvise(mmap.MADV_SEQUENTIAL)
+            self._read_file_header(sn_length)
+        except BaseException:
+            self.close() # Nothing else will: the caller never gets the reader
+            raise
+
+    def _read_file_header(self, sn_length: int):
+        if self._mm[:8] == TRACE_MAGIC:
+            self.format = "pdcptrace"
+            _, self.sn_length = _FILE_HEADER.unpack_from(self._mm, 0)
+            self._data_start = _FILE_HEADER.size
+        else:
+            magic_le, = struct.unpack_from("<I", self._mm, 0)
+            magic_be, = struct.unpack_from(">I", self._mm, 0)
+            if _PCAP_MAGIC_US in (magic_le, magic_be) or _PCAP_MAGIC_NS in (magic_le, magic_be):
+                self.format = "pcap"
+                endian = "<" if magic_le in (_PCAP_MAGIC_US, _PCAP_MAGIC_NS) else ">"
+                self._pcap_record = struct.Struct(endian + _PCAP_RECORD_HEADER)
+                self._pcap_ns = _PCAP_MAGIC_NS in (magic_le, magic_be)
+                self.linktype = struct.unpack_from(endian + _PCAP_FILE_HEADER, self._mm, 0)[6]
+                self._data_start = struct.calcsize(endian + _PCAP_FILE_HEADER)
+                if sn_length is None:
+                    raise ValueError("sn_length is required to read PDCP PDUs from a pcap")
+                self.sn_length = sn_length
+            else:
+                raise ValueError(f"{self.path} is neither a .pdcptrace file nor a pcap")
+        if sn_length is not None and sn_length != self.sn_length:
+            raise ValueError(f"{self.path} holds {self.sn_length}-bit SN PDUs, not {sn_length}-bit")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._mm is not None and not self._mm.closed:
+            try:
+                self._mm.close()
+            except BufferError:
+                # A caller still holds a view into a batch; the mapping goes away with the last view
+                logger.debug(f"{self.path} still has PDU views in use; mapping left to be freed with them")
+        self._file.close()
+
+    def batches(self, max_records: int = 4096):
+        mm = self._mm
+        size = len(mm)
+        pos = self._data_start
+        native = self.format == "pdcptrace"
+        header = _RECORD_HEADER if native else self._pcap_record
+        header_size = header.size
+        unpack = header.unpack_from
+        offsets = np.empty(max_records, dtype=np.int64)
+        lengths = np.empty(max_records, dtype=np.int64)
+        times = np.empty(max_records, dtype=np.float64)
+        flags = np.empty(max_records, dtype=np.uint8)
+        released = 0
+        can_release = hasattr(mm, "madvise") and hasattr(mmap, "MADV_DONTNEED")
+        while pos + header_size <= size:
+            if can_release and pos - released >= _RELEASE_EVERY:
+                # Everything before the next batch has been consumed
+                release_to = pos - pos % mmap.PAGESIZE
+                mm.madvise(mmap.MADV_DONTNEED, released, release_to - released)
+                released = release_to
+            n = 0
+            while n < max_records and pos + header_size <= size:
+                if native:
+                    arrival_time, length, flag = unpack(mm, pos)
+                    start = pos + header_size
+                else:
+                    ts_sec, ts_frac, length, _ = unpack(mm, pos)
+                    arrival_time = ts_sec * 1000.0 + (ts_frac / 1e6 if self._pcap_ns else ts_frac / 1e3)
+                    start = pos + header_size + self.pdu_offset
+                    length -= self.pdu_offset
+                    flag = 0
+                end = pos + header_size + (length if native else length + self.pdu_offset)
+                if end > size:
+                    logger.warning(f"Ignoring truncated record at byte {pos} of {self.path} (interrupted write?)")
+                    pos = size
+                    break
+                offsets[n], lengths[n], times[n], flags[n] = start, length, arrival_time, flag
+                n += 1
+                pos = end
+            if n:
+                yield TraceBatch(mm, offsets[:n].copy(), lengths[:n].copy(), times[:n].copy(),
+                                 (flags[:n] & FLAG_CORRUPTED) != 0)
+
+
+def replay_trace(reader: TraceReader, receiver: PDCPReceiver, paced: bool = False, speed: float = 1.0,
+                 max_records: int = 4096) -> dict:
+    """
+    Feeds every PDU of a trace to `receiver.receive_encoded()`, batch by batch, with the record
+    timestamps as arrival times (so time-based t-Reordering sees the captured timing).
+    Default is as fast as possible; paced=True holds each PDU back until its timestamp, relative
+    to the first one and scaled by 1/speed, has passed on the wall clock.
+    """
+    records = data_bytes = 0
+    first_time = None
+    start = time.perf_counter()
+    for batch in reader.batches(max_records):
+        if not paced:
+            receiver.receive_encoded(batch.buffer, batch.lengths, corrupted_mask=batch.corrupted,
+                                     arrival_times=batch.arrival_times, pdu_offsets=batch.offsets)
+        else:
+            if first_time is None:
+                first_time = batch.arrival_times[0]
+            due = (batch.arrival_times - first_time) / 1000.0 / speed # Seconds after start
+            i = 0
+            while i < len(batch):
+                wait = due[i] - (time.perf_counter() - start)
+                if wait > 0:
+                    time.sleep(wait)
+                j = max(i + 1, int(np.searchsorted(due, time.perf_counter() - start, side="right")))
+                receiver.receive_encoded(batch.buffer, batch.lengths[i:j], corrupted_mask=batch.corrupted[i:j],
+                                         arrival_times=batch.arrival_times[i:j], pdu_offsets=batch.offsets[i:j])
+                i = j
+        records += len(batch)
+        data_bytes += int(batch.lengths.sum())
+    elapsed = time.perf_counter() - start
+    return {
+        "records": records,
+        "pdu_bytes": data_bytes,
+        "elapsed_seconds": elapsed,
+        "records_per_second": records / elapsed if elapsed else float("inf"),
+        "mb_per_second": data_bytes / 1e6 / elapsed if elapsed else float("inf"),
+        "rx_status": receiver.get_status(),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Replay a PDU trace (.pdcptrace or pcap) through PDCPReceiver")
+    parser.add_argument("trace", type=str)
+    parser.add_argument("--sn-length", type=int, default=None, help="Required for pcaps")
+    parser.add_argument("--pdu-offset", type=int, default=0, help="pcap: bytes before the PDCP PDU in each packet")
+    parser.add_argument("--paced", action="store_true", help="Replay at the recorded timestamps instead of as fast as possible")
+    parser.add_argument("--speed", type=float, default=1.0, help="Paced mode: time scale (2.0 = twice as fast)")
+    parser.add_argument("--t-reordering-ms", type=float, default=None, help="Time-based t-Reordering (default: config)")
+    parser.add_argument("--max-records", type=int, default=4096, help="Records per receive batch")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=config.LOG_LEVEL, format='%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+    logging.getLogger("src").setLevel(logging.WARNING) # Per-PDU logging would dominate the replay
+    with TraceReader(args.trace, sn_length=args.sn_length, pdu_offset=args.pdu_offset) as reader:
+        receiver = PDCPReceiver(sn_length=reader.sn_length,
+                                t_reordering_threshold=config.T_REORDERING_THRESHOLD,
+                                t_reordering_ms=args.t_reordering_ms if args.t_reordering_ms is not None else config.T_REORDERING_MS)
+        summary = replay_trace(reader, receiver, paced=args.paced, speed=args.speed, max_records=args.max_records)
+        receiver.flush_buffer()
+    logger.info(f"Replayed {summary['records']} PDUs in {summary['elapsed_seconds']:.2f}s "
+                f"({summary['records_per_second']:,.0f} PDUs/s, {summary['mb_per_second']:.1f} MB/s)")
+    logger.info(f"Receiver status: {receiver.get_status()}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,127 @@
+import collections
+import hashlib
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Parameters that do not change a run's results and so are left out of the cache key
+NON_RESULT_PARAMS = {"LOG_LEVEL", "TRACE_SAMPLE_EVERY", "TRACE_RING_CAPACITY", "PAYLOAD_FREE"}
+
+
+def cache_key(params) -> str:
+    """
+    Content address of a run: SHA-256 over the canonical JSON of its parameters (SEED included).
+    Returns None for unseeded runs, whose results are not reproducible and so not cacheable.
+    """
+    values = {k: v for k, v in vars(params).items()
+              if k.isupper() and k not in NON_RESULT_PARAMS and isinstance(v, (int, float, str, bool, type(None)))}
+    if values.get("SEED") is None:
+        return None
+    canonical = json.dumps(values, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    LRU cache of JSON-serializable run results (metrics + rendered plots), bounded by `max_bytes`.
+
+    An entry's size is the length of its JSON encoding, which is dominated by the base64 plot
+    images. The least recently used entries are evicted once the total exceeds the budget.
+    With `persist_dir` set, entries are also written there as <key>.json and a memory miss
+    falls back to disk, so the cache survives restarts (the disk copy is not size-bounded).
+    Thread-safe; hit/miss counters are reported by stats().
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, persist_dir: str = None):
+        self.max_bytes = max_bytes
+        self.persist_dir = persist_dir
+        if persist_dir:
+            os.makedirs(persist_dir, exist_ok=True)
+        self._entries = collections.OrderedDict()  # key -> (value, size), least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str):
+        """Cached value for `key`, or None."""
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        encoded = self._read_disk(key)
+        with self._lock:
+            if encoded is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            value = json.loads(encoded)
+            self._insert(key, value, len(encoded))
+            return value
+
+    def put(self, key: str, value):
+        if key is None:
+            return
+        encoded = json.dumps(value)
+        with self._lock:
+            self._insert(key, value, len(encoded))
+        self._write_disk(key, encoded)
+
+    def _insert(self, key, value, size):
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        if size > self.max_bytes:
+            return # Larger than the whole budget: keep it on disk only
+        self._entries[key] = (value, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def _path(self, key):
+        return os.path.join(self.persist_dir, f"{key}.json")
+
+    def _read_disk(self, key):
+        if not self.persist_dir or not os.path.exists(self._path(key)):
+            return None
+        try:
+            with open(self._path(key)) as f:
+                return f.read()
+        except OSError as e:
+            logger.warning(f"Could not read cached result {key}: {e}")
+            return None
+
+    def _write_disk(self, key, encoded):
+        if not self.persist_dir:
+            return
+        tmp_path = self._path(key) + f".tmp{threading.get_ident()}"
+        try:
+            with open(tmp_path, "w") as f:
+                f.write(encoded)
+            os.replace(tmp_path, self._path(key)) # Atomic: readers never see a partial file
+        except OSError as e:
+            logger.warning(f"Could not persist cached result {key}: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,202 @@
+import json
+import mmap
+import os
+import struct
+import zlib
+
+import numpy as np
+
+# Time-series columns written by run_simulation: name -> on-disk dtype (little-endian)
+PLOT_COLUMNS = {
+    "time": "<i8",        # Packet index of the sample
+    "tx_count": "<u4",    # COUNTs are 32-bit
+    "rx_deliv": "<u4",
+    "rx_next": "<u4",
+    "buffer_size": "<u4",
+}
+
+SUMMARY_FILE = "summary.json"
+COLUMN_SUFFIX = ".zcol"
+# Each chunk of a column file: number of samples, compressed size in bytes, then the zlib data
+CHUNK_HEADER = struct.Struct("<II")
+
+
+class ColumnarResultWriter:
+    """
+    Streams time-series samples to one file per column inside `run_dir`, in chunks of up to
+    `chunk_size` samples, and writes the run summary as a small JSON sidecar on close().
+
+    Only one chunk per column is ever held in memory, so long runs cost the same RAM as short
+    ones. Each chunk is zlib-compressed on its own (`compress_level`, 0 = stored) behind a small
+    header, so ColumnarResultReader can memory-map a column file and decompress just the chunks
+    a slice touches. Complete chunks can be read while the run is still being written.
+    """
+
+    def __init__(self, run_dir: str, columns: dict = None, chunk_size: int = 65536, compress_level: int = 6):
+        self.run_dir = run_dir
+        self.columns = dict(columns if columns is not None else PLOT_COLUMNS)
+        self.chunk_size = chunk_size
+        self.compress_level = compress_level
+        os.makedirs(run_dir, exist_ok=True)
+        self._chunks = {name: np.empty(chunk_size, dtype=dtype) for name, dtype in self.columns.items()}
+        self._files = {name: open(os.path.join(run_dir, name + COLUMN_SUFFIX), "wb") for name in self.columns}
+        self._fill = 0
+        self.num_samples = 0
+
+    def append(self, **sample):
+        """Adds one sample; every column must be given."""
+        for name, chunk in self._chunks.items():
+            chunk[self._fill] = sample[name]
+        self._fill += 1
+        self.num_samples += 1
+        if self._fill == self.chunk_size:
+            self.flush()
+
+    def append_chunk(self, **arrays):
+        """Adds many samples at once (equal-length arrays, one per column)."""
+        self.flush()
+        lengths = {len(arrays[name]) for name in self.columns}
+        if len(lengths) != 1:
+            raise ValueError(f"Column lengths differ: {lengths}")
+        n = lengths.pop()
+        for name, dtype in self.columns.items():
+            values = np.asarray(arrays[name], dtype=dtype)
+            for start in range(0, n, self.chunk_size):
+                self._write_chunk(name, values[start:start + self.chunk_size])
+        self.num_samples += n
+
+    def _write_chunk(self, name: str, values: np.ndarray):
+        data = zlib.compress(values.tobytes(), self.compress_level)
+        self._files[name].write(CHUNK_HEADER.pack(len(values), len(data)))
+        self._files[name].write(data)
+
+    def flush(self):
+        if self._fill:
+            for name, chunk in self._chunks.items():
+                self._write_chunk(name, chunk[:self._fill])
+            self._fill = 0
+        for f in self._files.values():
+            f.flush()
+
+    def close(self, summary: dict = None) -> str:
+        """Writes any buffered samples and the JSON sidecar. Returns the run directory."""
+        self.flush()
+        for f in self._files.values():
+            f.close()
+        sidecar = {
+            "format": "pdcp-columnar-v2",
+            "layout": "zlib-chunks",
+            "num_samples": self.num_samples,
+            "columns": self.columns,
+            "summary": summary or {},
+        }
+        with open(os.path.join(self.run_dir, SUMMARY_FILE), "w") as f:
+            json.dump(sidecar, f, indent=4)
+        return self.run_dir
+
+
+class ChunkedColumn:
+    """
+    One column of a run, backed by its memory-mapped file. Indexing and slicing decompress only
+    the chunks the requested samples are in (the most recent one is kept); np.asarray() or
+    tolist() decompress it all.
+    """
+
+    def __init__(self, path: str, dtype: str):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self._mmap = None
+        self._offsets, self._nbytes, counts = [], [], [] # Per chunk: data offset, compressed size, samples
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        position, size = 0, len(self._mmap) if self._mmap is not None else 0
+        while position + CHUNK_HEADER.size <= size:
+            count, nbytes = CHUNK_HEADER.unpack_from(self._mmap, position)
+            position += CHUNK_HEADER.size
+            if position + nbytes > size:
+                break # Chunk still being written
+            self._offsets.append(position)
+            self._nbytes.append(nbytes)
+            counts.append(count)
+            position += nbytes
+        self._starts = np.zeros(len(counts) + 1, dtype=np.int64) # First sample of each chunk, plus the total
+        np.cumsum(counts, out=self._starts[1:])
+        self._cached = (None, None)
+
+    def __len__(self) -> int:
+        return int(self._starts[-1])
+
+    @property
+    def num_chunks(self) -> int:
+        return len(self._offsets)
+
+    def chunk(self, i: int) -> np.ndarray:
+        if self._cached[0] != i:
+            offset = self._offsets[i]
+            data = zlib.decompress(self._mmap[offset:offset + self._nbytes[i]])
+            self._cached = (i, np.frombuffer(data, dtype=self.dtype))
+        return self._cached[1]
+
+    def _range(self, start: int, stop: int) -> np.ndarray:
+        if start >= stop:
+            return np.empty(0, dtype=self.dtype)
+        first = int(np.searchsorted(self._starts, start, side="right")) - 1
+        last = int(np.searchsorted(self._starts, stop, side="left")) - 1
+        parts = [self.chunk(i) for i in range(first, last + 1)]
+        values = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        offset = int(self._starts[first])
+        return values[start - offset:stop - offset]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step < 0:
+                return self._range(0, len(self))[index]
+            return self._range(start, stop)[::step] if step > 1 else self._range(start, stop).copy()
+        position = index + len(self) if index < 0 else index
+        if not 0 <= position < len(self):
+            raise IndexError(f"Sample {index} out of range for {len(self)} samples")
+        return self._range(position, position + 1)[0]
+
+    def __array__(self, dtype=None, copy=None):
+        values = self._range(0, len(self))
+        return values.astype(dtype) if dtype is not None else values.copy()
+
+    def tolist(self) -> list:
+        return self._range(0, len(self)).tolist()
+
+    def close(self):
+        self._cached = (None, None)
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+
+class ColumnarResultReader:
+    """Opens a run written by ColumnarResultWriter. column() memory-maps one column without reading the rest."""
+
+    def __init__(self, run_dir: str):
+        self.run_dir = run_dir
+        with open(os.path.join(run_dir, SUMMARY_FILE)) as f:
+            self.sidecar = json.load(f)
+
+    @property
+    def summary(self) -> dict:
+        return self.sidecar["summary"]
+
+    @property
+    def columns(self) -> list:
+        return list(self.sidecar["columns"])
+
+    def __len__(self) -> int:
+        return self.sidecar["num_samples"]
+
+    def column(self, name: str) -> ChunkedColumn:
+        if name not in self.sidecar["columns"]:
+            raise KeyError(f"No column '{name}' in {self.run_dir}; have {self.columns}")
+        return ChunkedColumn(os.path.join(self.run_dir, name + COLUMN_SUFFIX), self.sidecar["columns"][name])
+
+    def plot_data(self) -> dict:
+        """All columns as lists, in the same shape as run_simulation()'s results["plot_data"]."""
+        return {name: self.column(name).tolist() for name in self.columns}
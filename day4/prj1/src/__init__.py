@@ -1,11 +1,25 @@
 from .pdcp_packet import PDCP_SDU, PDCP_PDU
 from .pdcp_entity import PDCPTransmitter, PDCPReceiver
+from .pdu_codec import PDUCodec
 from .channel_simulator import ImpairedChannel
+from .duplicate_detector import DuplicateDetector
+from .reordering_buffer import ReorderingBuffer
+from .sdu_id_set import SduIdSet
+from .stage_timing import StageTimers
+from .timer_wheel import TimerWheel
+from .tracing import Tracer
 
 __all__ = [
     'PDCP_SDU',
     'PDCP_PDU',
     'PDCPTransmitter',
     'PDCPReceiver',
-    'ImpairedChannel'
+    'PDUCodec',
+    'ImpairedChannel',
+    'DuplicateDetector',
+    'ReorderingBuffer',
+    'SduIdSet',
+    'StageTimers',
+    'TimerWheel',
+    'Tracer'
 ]
\ No newline at end of file
@@ -1,14 +1,29 @@
+import dataclasses
+import heapq
+import math
 import random
-import dataclasses # For PDCP_PDU copy
+import numpy as np
 from .pdcp_packet import PDCP_PDU
+from .tracing import Tracer, EV_CH_LOST, EV_CH_CORRUPTED, EV_CH_DUPLICATED, EV_CH_REORDERED
 import logging
 
 logger = logging.getLogger(__name__)
 
+_UNIFORM_BLOCK = 4096  # Uniforms pre-drawn at a time for the scalar path of a seeded channel
+
+JITTER_DISTRIBUTIONS = ("exponential", "uniform", "pareto")
+_PARETO_SHAPE = 2.5  # Tail index of the heavy-tailed jitter option (finite mean and variance)
+
 class ImpairedChannel:
     def __init__(self, loss_rate: float, reordering_rate: float, 
                  duplication_rate: float, corruption_rate: float,
-                 reorder_buffer_size: int = 10): # reorder_buffer_size for channel's internal mechanism
+                 reorder_buffer_size: int = 10, # reorder_buffer_size for channel's internal mechanism
+                 propagation_delay_ms: float = 0.0,
+                 seed=None, # int or np.random.SeedSequence: gives this channel its own reproducible RNG streams
+                 tracer: Tracer = None,
+                 jitter_ms: float = 0.0, # > 0: delay-scheduled mode, see transmit()
+                 jitter_distribution: str = "exponential", # One of JITTER_DISTRIBUTIONS, with mean jitter_ms
+                 burst_loss: tuple = None): # Gilbert-Elliott (p_good_to_bad, p_bad_to_good, loss_rate_in_bad)
         self.loss_rate = loss_rate
         self.reordering_rate = reordering_rate
         self.duplication_rate = duplication_rate
@@ -17,6 +32,49 @@ class ImpairedChannel:
         # Internal buffer for simulating reordering by delaying packets
         self.channel_internal_buffer = [] 
         self.reorder_buffer_size = reorder_buffer_size # Max packets held by channel to induce reordering
+        self.propagation_delay_ms = propagation_delay_ms # Added to the send time to stamp arrival_time
+
+        # Delay-scheduled mode (jitter_ms > 0): a `reordering_rate` fraction of PDUs is held back by a
+        # random jitter on top of the propagation delay, and PDUs leave in order of delivery time from
+        # a min-heap of (release time, sequence number, PDU), so a PDU is overtaken by everything sent
+        # after it that is due earlier. Push and pop are O(log n) in the number of PDUs in flight.
+        # When more than reorder_buffer_size PDUs are held, the earliest due ones are released early.
+        if jitter_distribution not in JITTER_DISTRIBUTIONS:
+            raise ValueError(f"jitter_distribution must be one of {JITTER_DISTRIBUTIONS}")
+        self.jitter_ms = jitter_ms
+        self.jitter_distribution = jitter_distribution
+        self.scheduled = jitter_ms > 0
+        self._in_flight = []
+        self._next_seq = 0 # Tie-breaker in the heap, in send order
+        self._max_released_seq = -1 # Anything released with a lower seq than this has been overtaken
+        self._batch_base = 0 # Position of the latest transmit_batch() block in the batch PDU stream
+        self._batch_sent = 0
+
+        # Gilbert-Elliott burst loss: a two-state Markov chain stepped once per PDU. loss_rate is the
+        # loss probability in the good state, loss_rate_in_bad the one in the bad state.
+        self.burst_loss = burst_loss
+        self._burst_bad = False
+        # Per-instance NumPy Generator, so several channels in one process (or one per worker, seeded
+        # from a SeedSequence) never share a stream. Every PDU consumes one row of four uniforms
+        # [loss, corruption, duplication, reordering] whether or not the PDU survives, so
+        # transmit_batch() and one transmit() call per PDU make identical decisions for a seed.
+        # Unseeded channels keep drawing the scalar path from the global `random` module.
+        # With burst_loss the row gets a fifth uniform in front for the Gilbert-Elliott state step, and
+        # in delay-scheduled mode the reordering uniform decides (and sizes) each PDU's jitter.
+        self.seed = seed
+        self.tracer = tracer if tracer is not None else Tracer()
+        self._uniforms = []
+        self._uniform_pos = 0
+        if seed is not None:
+            seed_seq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+            self._np_rng = np.random.default_rng(seed_seq)
+            self._uniform = self._next_uniform
+            # Shuffling only reorders PDUs already decided on, so it gets its own stream.
+            self._shuffle_rng = random.Random(int(seed_seq.generate_state(1)[0]))
+        else:
+            self._np_rng = np.random.default_rng()
+            self._uniform = random.random
+            self._shuffle_rng = random
 
         self.stats = {
             "total_passed_through": 0,
@@ -25,58 +83,351 @@ class ImpairedChannel:
             "total_corrupted": 0,
             "total_reordered_events": 0 # Count how many times reordering logic was triggered
         }
-        logger.info(f"ImpairedChannel initialized: Loss={loss_rate*100}%, Reorder={reordering_rate*100}%, Duplication={duplication_rate*100}%, Corruption={corruption_rate*100}%")
+        if self.scheduled:
+            self.stats["total_forced_releases"] = 0 # Released before their delivery time (buffer full)
+        if burst_loss is not None:
+            self.stats["total_bad_state_pdus"] = 0 # PDUs sent while the loss model was in the bad state
+        logger.info(f"ImpairedChannel initialized: Loss={loss_rate*100}%, Reorder={reordering_rate*100}%, Duplication={duplication_rate*100}%, Corruption={corruption_rate*100}%"
+                    + (f", Jitter={jitter_ms}ms {jitter_distribution}" if self.scheduled else "")
+                    + (f", Burst loss={burst_loss}" if burst_loss is not None else ""))
 
-    def transmit(self, pdu_list: list[PDCP_PDU]) -> list[PDCP_PDU]:
+    def transmit(self, pdu_list: list[PDCP_PDU], now_ms: float = None) -> list[PDCP_PDU]:
         """
         Processes a list of PDUs, applying impairments.
         Reordering is simulated by potentially holding packets and releasing them out of order.
+        The channel takes ownership of the PDUs: corruption and arrival_time are set on the PDU
+        objects in place, and a duplicate is the same object emitted twice (no per-packet copies).
+        If `now_ms` (send time) is given, released PDUs are stamped with arrival_time = now_ms + propagation delay.
+        In delay-scheduled mode `now_ms` is required; the PDUs returned are those whose delivery time
+        (send time + jitter) has come, stamped with it (plus propagation delay), and the rest stay
+        in flight for a later call or flush().
         """
+        if self.scheduled and now_ms is None:
+            raise ValueError("transmit() needs now_ms when the channel schedules PDUs by delay")
         output_pdus_from_channel = []
+        uniform = self._uniform
 
         # Add incoming PDUs to the channel's internal buffer first
         for pdu_in in pdu_list:
+            # All draws are taken up front to keep the stream layout fixed (see __init__)
+            loss_rate = self._step_burst_state(uniform()) if self.burst_loss is not None else self.loss_rate
+            u_loss, u_corrupt, u_dup = uniform(), uniform(), uniform()
+            u_jitter = uniform() if self.scheduled else 0.0
             # 1. Loss
-            if random.random() < self.loss_rate:
-                logger.debug(f"CHANNEL: PDU SDU_ID={pdu_in.sdu_id} (SN={pdu_in.sn}) LOST.")
+            if u_loss < loss_rate:
+                if self.tracer.debug and self.tracer.sampled():
+                    logger.debug(f"CHANNEL: PDU SDU_ID={pdu_in.sdu_id} (SN={pdu_in.sn}) LOST.")
+                if self.tracer.recording:
+                    self.tracer.record(EV_CH_LOST, pdu_in.count, pdu_in.sdu_id)
                 self.stats["total_lost"] += 1
                 continue  # PDU is lost
 
             # 2. Corruption
-            pdu_processed = dataclasses.replace(pdu_in) # Work on a copy
-            if random.random() < self.corruption_rate:
+            pdu_processed = pdu_in # Flag is set in place, no copy
+            if u_corrupt < self.corruption_rate:
                 pdu_processed.is_corrupted = True
                 self.stats["total_corrupted"] += 1
-                logger.debug(f"CHANNEL: PDU SDU_ID={pdu_processed.sdu_id} (SN={pdu_processed.sn}) CORRUPTED.")
+                if self.tracer.debug and self.tracer.sampled():
+                    logger.debug(f"CHANNEL: PDU SDU_ID={pdu_processed.sdu_id} (SN={pdu_processed.sn}) CORRUPTED.")
+                if self.tracer.recording:
+                    self.tracer.record(EV_CH_CORRUPTED, pdu_processed.count, pdu_processed.sdu_id)
 
             # 3. Duplication
             # Duplicates are added to the buffer along with the original (if not lost)
             self.channel_internal_buffer.append(pdu_processed)
-            if random.random() < self.duplication_rate:
-                duplicate_pdu = dataclasses.replace(pdu_processed) # Copy the (potentially corrupted) PDU
+            if u_dup < self.duplication_rate:
+                # The duplicate is the same (potentially corrupted) PDU object; the receiver never mutates PDUs.
                 # Note: A duplicated corrupted packet is still a corrupted packet.
-                self.channel_internal_buffer.append(duplicate_pdu)
+                # Delay-scheduled copies may be stamped with different arrival times (early release), so they get their own object.
+                self.channel_internal_buffer.append(dataclasses.replace(pdu_processed) if self.scheduled else pdu_processed)
                 self.stats["total_duplicated"] += 1
-                logger.debug(f"CHANNEL: PDU SDU_ID={pdu_processed.sdu_id} (SN={pdu_processed.sn}) DUPLICATED.")
-        
+                if self.tracer.debug and self.tracer.sampled():
+                    logger.debug(f"CHANNEL: PDU SDU_ID={pdu_processed.sdu_id} (SN={pdu_processed.sn}) DUPLICATED.")
+                if self.tracer.recording:
+                    self.tracer.record(EV_CH_DUPLICATED, pdu_processed.count, pdu_processed.sdu_id)
+
+            if self.scheduled:
+                # Original and duplicate leave together, at send time + jitter
+                release_ms = now_ms + self._jitter_delay(u_jitter)
+                for pdu_copy in self.channel_internal_buffer:
+                    heapq.heappush(self._in_flight, (release_ms, self._next_seq, pdu_copy))
+                    self._next_seq += 1
+                self.channel_internal_buffer.clear()
+
+        if self.scheduled:
+            return self._deliver(self._release(now_ms))
+
         # 4. Reordering logic based on channel_internal_buffer
         # This reordering model: if reordering event occurs, shuffle the current buffer.
         # More advanced: delay some packets, release others.
-        if self.channel_internal_buffer and random.random() < self.reordering_rate:
+        u_reorder = uniform()
+        if self.channel_internal_buffer and u_reorder < self.reordering_rate:
             if len(self.channel_internal_buffer) > 1:
-                random.shuffle(self.channel_internal_buffer)
+                self._shuffle_rng.shuffle(self.channel_internal_buffer)
                 self.stats["total_reordered_events"] += 1
-                logger.debug(f"CHANNEL: Reordering event triggered. Internal buffer (size {len(self.channel_internal_buffer)}) shuffled.")
+                if self.tracer.debug and self.tracer.sampled():
+                    logger.debug(f"CHANNEL: Reordering event triggered. Internal buffer (size {len(self.channel_internal_buffer)}) shuffled.")
+                if self.tracer.recording:
+                    self.tracer.record(EV_CH_REORDERED, self.channel_internal_buffer[0].count, self.channel_internal_buffer[0].sdu_id)
 
         # Decide what to release from the channel_internal_buffer
         # Simple model: release all packets currently in buffer.
         # This means reordering only happens among packets that arrive "close" together.
         if self.channel_internal_buffer:
+            if now_ms is not None:
+                for pdu_out in self.channel_internal_buffer:
+                    pdu_out.arrival_time = now_ms + self.propagation_delay_ms
             output_pdus_from_channel.extend(self.channel_internal_buffer)
             self.stats["total_passed_through"] += len(self.channel_internal_buffer)
             self.channel_internal_buffer.clear()
             
         return output_pdus_from_channel
 
+    def _step_burst_state(self, u: float) -> float:
+        # One Gilbert-Elliott step; returns the loss probability for the PDU in the new state
+        p_good_to_bad, p_bad_to_good, loss_rate_in_bad = self.burst_loss
+        if self._burst_bad:
+            self._burst_bad = u >= p_bad_to_good
+        else:
+            self._burst_bad = u < p_good_to_bad
+        if self._burst_bad:
+            self.stats["total_bad_state_pdus"] += 1
+            return loss_rate_in_bad
+        return self.loss_rate
+
+    def _burst_states(self, u: np.ndarray) -> np.ndarray:
+        # Vectorized _step_burst_state() over a block: True where the PDU is sent in the bad state.
+        # Only the state changes are walked in Python, so the cost is per burst rather than per PDU.
+        p_good_to_bad, p_bad_to_good, _ = self.burst_loss
+        to_bad = np.flatnonzero(u < p_good_to_bad)
+        to_good = np.flatnonzero(u < p_bad_to_good)
+        states = np.empty(len(u), dtype=bool)
+        bad, i = self._burst_bad, 0
+        while i < len(u):
+            changes = to_good if bad else to_bad
+            k = np.searchsorted(changes, i)
+            j = int(changes[k]) if k < len(changes) else len(u)
+            states[i:j] = bad
+            if j < len(u):
+                bad = not bad
+                states[j] = bad
+            i = j + 1
+        self._burst_bad = bad
+        self.stats["total_bad_state_pdus"] += int(np.count_nonzero(states))
+        return states
+
+    def _jitter_delay(self, u: float) -> float:
+        # Inverse CDF: a `reordering_rate` fraction of PDUs gets a jitter with mean jitter_ms, the rest none.
+        # Scalar math (not NumPy) so the per-PDU and batch paths compute bit-identical release times.
+        if u >= self.reordering_rate:
+            return 0.0
+        u /= self.reordering_rate # Uniform on [0, 1) again
+        if self.jitter_distribution == "uniform":
+            return 2.0 * self.jitter_ms * u
+        if self.jitter_distribution == "pareto":
+            # Lomax (Pareto type II, starts at 0): heavy tail, occasional very late PDUs
+            return self.jitter_ms * (_PARETO_SHAPE - 1) * ((1.0 - u) ** (-1.0 / _PARETO_SHAPE) - 1.0)
+        return -self.jitter_ms * math.log1p(-u)
+
+    def _release(self, now_ms: float) -> list:
+        """
+        Pops every in-flight PDU due by `now_ms` in delivery order, then, while more than
+        reorder_buffer_size are still held, the earliest due ones (released at `now_ms`).
+        Returns [(release_ms, item, overtaken)]; `overtaken` marks a PDU that leaves after one
+        sent later than it, i.e. a reordering.
+        """
+        heap = self._in_flight
+        due = []
+        while heap and heap[0][0] <= now_ms:
+            due.append(heapq.heappop(heap))
+        while len(heap) > self.reorder_buffer_size:
+            _, seq, item = heapq.heappop(heap)
+            due.append((now_ms, seq, item))
+            self.stats["total_forced_releases"] += 1
+        released = []
+        for release_ms, seq, item in due:
+            overtaken = seq < self._max_released_seq
+            if overtaken:
+                self.stats["total_reordered_events"] += 1
+            else:
+                self._max_released_seq = seq
+            released.append((release_ms, item, overtaken))
+        self.stats["total_passed_through"] += len(released)
+        return released
+
+    def flush(self) -> list[PDCP_PDU]:
+        """
+        Delay-scheduled mode: releases every PDU still in flight, in delivery order, each stamped
+        with its own delivery time. Call once the last PDU has been sent. Returns [] otherwise.
+        """
+        return self._deliver(self._release(math.inf))
+
+    def _deliver(self, released: list) -> list[PDCP_PDU]:
+        # Stamps PDUs coming off the delay heap with their arrival time
+        output_pdus_from_channel = []
+        for release_ms, pdu_out, overtaken in released:
+            pdu_out.arrival_time = release_ms + self.propagation_delay_ms
+            if overtaken:
+                if self.tracer.debug and self.tracer.sampled():
+                    logger.debug(f"CHANNEL: PDU SDU_ID={pdu_out.sdu_id} (SN={pdu_out.sn}) overtaken, arrives at {pdu_out.arrival_time:.3f} ms.")
+                if self.tracer.recording:
+                    self.tracer.record(EV_CH_REORDERED, pdu_out.count, pdu_out.sdu_id)
+            output_pdus_from_channel.append(pdu_out)
+        return output_pdus_from_channel
+
+    def _next_uniform(self) -> float:
+        if self._uniform_pos == len(self._uniforms):
+            self._uniforms = self._np_rng.random(_UNIFORM_BLOCK).tolist()
+            self._uniform_pos = 0
+        u = self._uniforms[self._uniform_pos]
+        self._uniform_pos += 1
+        return u
+
+    def transmit_batch(self, num_pdus: int, send_times_ms=None):
+        """
+        Vectorized equivalent of calling transmit([pdu]) once per PDU for a block of `num_pdus`
+        consecutive PDUs. Loss, corruption, duplication and reorder masks are drawn for the whole
+        block from this channel's Generator (one row of four uniforms per PDU, the same layout
+        the seeded scalar path uses), and stats are updated by the same amounts.
+        The PDUs themselves are not touched: returns (indices, corrupted_mask, arrival_times),
+        where `indices` lists the input positions in arrival order (a duplicated PDU appears
+        twice in a row), `corrupted_mask` flags each output, and `arrival_times` is
+        send_times_ms[indices] + propagation delay (None if no send times were given).
+        Feed sns[indices] etc. straight into PDCPReceiver.receive_batch().
+
+        In delay-scheduled mode `send_times_ms` is required and PDUs held back by one block can come
+        out of a later one: `indices` are then relative to the start of this block, and negative
+        for PDUs of earlier blocks (-1 = the previous block's last PDU). Derive per-PDU values
+        arithmetically (e.g. SDU_ID = block start + index) rather than by indexing the block's arrays.
+        """
+        width = 5 if self.burst_loss is not None else 4
+        draws = self._take_uniforms(num_pdus * width).reshape(num_pdus, width)
+        loss_rate = self.loss_rate
+        if self.burst_loss is not None:
+            loss_rate = np.where(self._burst_states(draws[:, 0]), self.burst_loss[2], self.loss_rate)
+            draws = draws[:, 1:]
+        kept = draws[:, 0] >= loss_rate
+        corrupted = kept & (draws[:, 1] < self.corruption_rate)
+        duplicated = kept & (draws[:, 2] < self.duplication_rate)
+
+        num_kept = int(np.count_nonzero(kept))
+        num_duplicated = int(np.count_nonzero(duplicated))
+        self.stats["total_lost"] += num_pdus - num_kept
+        self.stats["total_corrupted"] += int(np.count_nonzero(corrupted))
+        self.stats["total_duplicated"] += num_duplicated
+        if self.tracer.debug and self.tracer.sampled():
+            logger.debug(f"CHANNEL: Batch of {num_pdus} PDUs: {num_pdus - num_kept} lost, {num_duplicated} duplicated, {int(np.count_nonzero(corrupted))} corrupted.")
+        if self.scheduled:
+            if send_times_ms is None:
+                raise ValueError("transmit_batch() needs send_times_ms when the channel schedules PDUs by delay")
+            return self._schedule_batch(np.asarray(send_times_ms, dtype=np.float64), kept, corrupted, duplicated, draws[:, 3])
+
+        # A single-PDU transmit() only holds more than one packet when it duplicated, so only
+        # then can the reorder draw trigger a (no-op) shuffle of the two copies.
+        reordered = duplicated & (draws[:, 3] < self.reordering_rate)
+        indices = np.repeat(np.arange(num_pdus), kept.astype(np.int64) + duplicated)
+        corrupted_mask = corrupted[indices]
+        arrival_times = None
+        if send_times_ms is not None:
+            arrival_times = np.asarray(send_times_ms, dtype=np.float64)[indices] + self.propagation_delay_ms
+        self.stats["total_reordered_events"] += int(np.count_nonzero(reordered))
+        self.stats["total_passed_through"] += num_kept + num_duplicated
+        return indices, corrupted_mask, arrival_times
+
+    def _schedule_batch(self, send_times_ms, kept, corrupted, duplicated, u_jitter):
+        # Same outcome as transmit() in delay-scheduled mode once per PDU, with (stream position,
+        # corrupted) pairs in place of PDU objects. Per-PDU calls release everything due in
+        # (release time, seq) order, so unless the in-flight limit forces early releases the
+        # block's output is simply the held and new PDUs sorted by that key up to the last send
+        # time, and the rest stays in flight: one sort per block instead of a heap walk per PDU.
+        self._batch_base = base = self._batch_sent
+        self._batch_sent += len(send_times_ms)
+        kept_idx = np.flatnonzero(kept)
+        copies = 1 + duplicated[kept_idx].astype(np.int64)
+        delays = np.zeros(len(kept_idx))
+        jittered = u_jitter[kept_idx] < self.reordering_rate
+        # Python math per jittered PDU keeps release times bit-identical to the per-PDU path
+        delays[jittered] = [self._jitter_delay(u) for u in u_jitter[kept_idx][jittered].tolist()]
+        kept_send = send_times_ms[kept_idx]
+        expand = np.repeat(np.arange(len(kept_idx)), copies)
+        new_count = len(expand)
+
+        held = self._in_flight
+        keys = np.concatenate([np.fromiter((e[0] for e in held), dtype=np.float64, count=len(held)),
+                               (kept_send + delays)[expand]])
+        seqs = np.concatenate([np.fromiter((e[1] for e in held), dtype=np.int64, count=len(held)),
+                               self._next_seq + np.arange(new_count)])
+        positions = np.concatenate([np.fromiter((e[2][0] for e in held), dtype=np.int64, count=len(held)),
+                                    base + kept_idx[expand]])
+        corrupted_all = np.concatenate([np.fromiter((e[2][1] for e in held), dtype=bool, count=len(held)),
+                                        corrupted[kept_idx][expand]])
+
+        sorted_keys = np.sort(keys)
+        # PDUs held right after each surviving PDU's call, if nothing were released early
+        in_flight = len(held) + np.cumsum(copies) - np.searchsorted(sorted_keys, kept_send, side="right")
+        if (len(in_flight) and in_flight.max() > self.reorder_buffer_size) or np.any(np.diff(send_times_ms) <= 0):
+            return self._schedule_batch_per_pdu(send_times_ms, kept_idx, corrupted, duplicated, delays)
+
+        order = np.lexsort((seqs, keys))
+        cut = int(np.searchsorted(keys[order], send_times_ms[-1], side="right")) if len(send_times_ms) else 0
+        released, remaining = order[:cut], order[cut:]
+        self._next_seq += new_count
+        # Already sorted, so a valid heap as it is
+        self._in_flight = list(zip(keys[remaining].tolist(), seqs[remaining].tolist(),
+                                   zip(positions[remaining].tolist(), corrupted_all[remaining].tolist())))
+
+        released_seqs = seqs[released]
+        if cut:
+            running_max = np.maximum.accumulate(np.concatenate([[self._max_released_seq], released_seqs]))
+            self.stats["total_reordered_events"] += int(np.count_nonzero(released_seqs < running_max[:-1]))
+            self._max_released_seq = int(running_max[-1])
+        self.stats["total_passed_through"] += cut
+        return (positions[released] - base, corrupted_all[released],
+                keys[released] + self.propagation_delay_ms)
+
+    def _schedule_batch_per_pdu(self, send_times_ms, kept_idx, corrupted, duplicated, delays):
+        # Heap walk for blocks where the in-flight limit is reached. Only surviving PDUs are walked:
+        # a call for a lost PDU adds nothing, and what it would release comes out identically
+        # stamped at the next call.
+        heap = self._in_flight
+        released = []
+        send_list = send_times_ms.tolist()
+        for i, delay in zip(kept_idx.tolist(), delays.tolist()):
+            now_ms = send_list[i]
+            item = (self._batch_base + i, bool(corrupted[i]))
+            heapq.heappush(heap, (now_ms + delay, self._next_seq, item))
+            self._next_seq += 1
+            if duplicated[i]:
+                heapq.heappush(heap, (now_ms + delay, self._next_seq, item))
+                self._next_seq += 1
+            released.extend(self._release(now_ms))
+        if send_list:
+            released.extend(self._release(send_list[-1])) # Calls for lost PDUs at the end of the block
+        return self._batch_arrays(released)
+
+    def flush_batch(self):
+        """
+        transmit_batch() counterpart of flush(): (indices, corrupted_mask, arrival_times) of every
+        PDU still in flight, with indices relative to the start of the last block.
+        """
+        return self._batch_arrays(self._release(math.inf))
+
+    def _batch_arrays(self, released: list):
+        count = len(released)
+        positions = np.fromiter((item[0] for _, item, _ in released), dtype=np.int64, count=count)
+        corrupted_mask = np.fromiter((item[1] for _, item, _ in released), dtype=bool, count=count)
+        arrival_times = np.fromiter((release_ms for release_ms, _, _ in released), dtype=np.float64, count=count)
+        return positions - self._batch_base, corrupted_mask, arrival_times + self.propagation_delay_ms
+
+    def _take_uniforms(self, n: int) -> np.ndarray:
+        # Hands out the scalar path's unused pre-drawn uniforms first so both paths share one stream
+        leftover = []
+        if self._uniform_pos < len(self._uniforms):
+            leftover = self._uniforms[self._uniform_pos:self._uniform_pos + n]
+            self._uniform_pos += len(leftover)
+        if not leftover:
+            return self._np_rng.random(n)
+        return np.concatenate([np.asarray(leftover), self._np_rng.random(n - len(leftover))])
+
     def get_stats(self):
         return self.stats
\ No newline at end of file
@@ -0,0 +1,74 @@
+COUNT_MODULUS = 2**32
+
+
+class DuplicateDetector:
+    """
+    Fixed-size bitmap of received COUNT values, anchored at RX_DELIV.
+
+    HFN derivation (Clause 5.2.2.1 of 38.323) only ever reconstructs COUNTs in
+    [RX_DELIV - Window_Size, RX_DELIV + Window_Size), so remembering exactly that range
+    (2 * Window_Size = 2**SN_LENGTH bits) classifies duplicates the same way as keeping
+    every COUNT ever seen, while memory stays flat for any run length.
+    Bit positions are COUNT mod 2**SN_LENGTH, which divides 2**32, so the bitmap is
+    unaffected by the 32-bit COUNT wrap.
+    """
+
+    def __init__(self, window_size: int, anchor: int = 0):
+        self.window_size = window_size
+        self.span = 2 * window_size  # Number of COUNTs tracked
+        self._index_mask = self.span - 1
+        self._bits = bytearray(max(1, self.span // 8))
+        self.anchor = anchor % COUNT_MODULUS
+
+    def _in_window(self, count: int) -> bool:
+        offset = (count - self.anchor) % COUNT_MODULUS
+        return offset < self.window_size or offset >= COUNT_MODULUS - self.window_size
+
+    def __contains__(self, count: int) -> bool:
+        if not self._in_window(count):
+            return False
+        idx = count & self._index_mask
+        return bool(self._bits[idx >> 3] & (1 << (idx & 7)))
+
+    def add(self, count: int):
+        if not self._in_window(count):
+            raise ValueError(f"COUNT {count} outside duplicate window anchored at {self.anchor}")
+        idx = count & self._index_mask
+        self._bits[idx >> 3] |= 1 << (idx & 7)
+
+    def advance(self, new_anchor: int):
+        """Moves the window so it is anchored at `new_anchor` (the new RX_DELIV)."""
+        new_anchor %= COUNT_MODULUS
+        delta = (new_anchor - self.anchor) % COUNT_MODULUS
+        if delta == 0:
+            return
+        if delta >= self.span or delta >= COUNT_MODULUS // 2:
+            # Jumped past the whole window (or moved backwards): nothing remembered is still valid
+            self._bits[:] = bytes(len(self._bits))
+        else:
+            # COUNTs [anchor - W, anchor - W + delta) fall out of the window. Their slots are the
+            # ones reused by the COUNTs entering at the top, so clear them.
+            self._clear_slots((self.anchor - self.window_size) & self._index_mask, delta)
+        self.anchor = new_anchor
+
+    def _clear_slots(self, start: int, n: int):
+        while n > 0:
+            run = min(n, self.span - start)  # Split at the end of the ring
+            end = start + run
+            first_byte, last_byte = start >> 3, end >> 3
+            if first_byte == last_byte:
+                self._bits[first_byte] &= ~(((1 << run) - 1) << (start & 7)) & 0xFF
+            else:
+                self._bits[first_byte] &= (1 << (start & 7)) - 1
+                self._bits[first_byte + 1:last_byte] = bytes(last_byte - first_byte - 1)
+                if end & 7:
+                    self._bits[last_byte] &= ~((1 << (end & 7)) - 1) & 0xFF
+            n -= run
+            start = 0
+
+    def clear(self):
+        self._bits[:] = bytes(len(self._bits))
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
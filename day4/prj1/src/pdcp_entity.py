@@ -1,47 +1,92 @@
 import collections
 import logging
-from .pdcp_packet import PDCP_SDU, PDCP_PDU
+import numpy as np
+from .pdcp_packet import PDCP_PDU
+from .pdu_codec import PDUCodec
+from .duplicate_detector import DuplicateDetector
+from .reordering_buffer import ReorderingBuffer
+from .sdu_id_set import SduIdSet
+from .stage_timing import (StageTimers, perf_counter_ns, STAGE_RX_HFN_DERIVATION, STAGE_RX_BUFFERING,
+                           STAGE_RX_DELIVERY, STAGE_RX_T_REORDERING, STAGE_RX_T_REORDERING_EXPIRY)
+from .timer_wheel import TimerWheel
+from .tracing import (Tracer, EV_TX_SEND, EV_RX_CORRUPTED, EV_RX_INVALID, EV_RX_DUPLICATE, EV_RX_OLD,
+                      EV_RX_BUFFERED, EV_RX_DELIVERED, EV_RX_DELIVERED_OUT_OF_ORDER,
+                      EV_T_REORDERING_START, EV_T_REORDERING_EXPIRED, EV_T_REORDERING_STOP)
 
 # Setup basic logging
 logger = logging.getLogger(__name__)
 
+# Per-PDU outcomes returned by PDCPReceiver.receive_pdu() and receive_batch()
+RX_ACCEPTED = 0     # Passed all checks: delivered in-order or held in the reordering buffer
+RX_DUPLICATE = 1    # Discarded, COUNT already received
+RX_OLD = 2          # Discarded, COUNT < RX_DELIV
+RX_CORRUPTED = 3    # Discarded, flagged corrupted by the channel
+RX_INVALID = 4      # Discarded, SN out of range / HFN derivation failed
+RX_CONTROL = 5      # Not a data PDU (D/C bit 0); control PDUs are not handled by the receive path
+
 class PDCPTransmitter:
-    def __init__(self, sn_length: int):
+    def __init__(self, sn_length: int, tracer: Tracer = None, initial_count: int = 0):
         if sn_length not in [12, 18]:
             raise ValueError("SN_LENGTH_BITS must be 12 or 18")
         self.sn_length = sn_length
-        self.tx_next = 0  # 32-bit internal COUNT, initial value 0
+        self.tracer = tracer if tracer is not None else Tracer()
+        self.tx_next = initial_count % (2**32)  # 32-bit internal COUNT, initial value 0 unless fast-forwarded
         self.max_sn_value = (2**self.sn_length) - 1
         self.modulus = 2**self.sn_length
         self.hfn_bits = 32 - sn_length
-        logger.info(f"PDCPTransmitter initialized with SN length: {sn_length} bits, Max SN: {self.max_sn_value}")
+        logger.info(f"PDCPTransmitter initialized with SN length: {sn_length} bits, Max SN: {self.max_sn_value}, TX_NEXT: {self.tx_next}")
 
-    def send_sdu(self, sdu_id: int, sdu_payload: str) -> PDCP_PDU:
-        sdu = PDCP_SDU(id=sdu_id, payload=sdu_payload)
-        
+    def fast_forward(self, count: int):
+        """Continues numbering at COUNT `count` (mod 2**32), as if the SDUs before it had been sent."""
+        self.tx_next = count % (2**32)
+        logger.info(f"TX: Fast-forwarded to TX_NEXT={self.tx_next} (SN={self.tx_next % self.modulus}, HFN={self.tx_next >> self.sn_length})")
+
+    def send_sdu(self, sdu_id: int, sdu_payload: str = None) -> PDCP_PDU:
+        # sdu_payload=None for payload-free runs: only the SDU_ID travels with the PDU
         sdu_count = self.tx_next
         pdcp_sn = sdu_count % self.modulus
         hfn = sdu_count >> self.sn_length
         
         pdu = PDCP_PDU(
-            sdu_id=sdu.id,
+            sdu_id=sdu_id,
             sn=pdcp_sn,
             count=sdu_count, # Full COUNT for reference/logging
             hfn=hfn,         # HFN for reference/logging
-            original_sdu_payload=sdu.payload
+            original_sdu_payload=sdu_payload
         )
         
-        logger.debug(f"TX: Sending SDU_ID={sdu.id}, Assigned COUNT={sdu_count}, SN={pdcp_sn}, HFN={hfn}")
+        if self.tracer.debug and self.tracer.sampled():
+            logger.debug(f"TX: Sending SDU_ID={sdu_id}, Assigned COUNT={sdu_count}, SN={pdcp_sn}, HFN={hfn}")
+        if self.tracer.recording:
+            self.tracer.record(EV_TX_SEND, sdu_count, sdu_id)
         
         self.tx_next = (self.tx_next + 1) % (2**32) # Increment and wrap around 32-bit COUNT
 
         return pdu
 
+    def send_batch(self, num_sdus: int):
+        """
+        Assigns COUNTs to the next `num_sdus` SDUs in one step, without creating PDU objects.
+        Returns (counts, sns) as int64 arrays, for ImpairedChannel.transmit_batch() / PDCPReceiver.receive_batch().
+        """
+        counts = (self.tx_next + np.arange(num_sdus, dtype=np.int64)) % (2**32)
+        sns = counts & self.max_sn_value
+        if self.tracer.debug and self.tracer.sampled():
+            logger.debug(f"TX: Sending {num_sdus} SDUs, COUNT {self.tx_next}..{(self.tx_next + num_sdus - 1) % (2**32)}")
+        self.tx_next = (self.tx_next + num_sdus) % (2**32)
+        return counts, sns
+
 class PDCPReceiver:
-    def __init__(self, sn_length: int, t_reordering_threshold: int):
+    def __init__(self, sn_length: int, t_reordering_threshold: int,
+                 t_reordering_ms: float = None, timer_wheel: TimerWheel = None, tracer: Tracer = None,
+                 timers: StageTimers = None, initial_count: int = 0):
         if sn_length not in [12, 18]:
             raise ValueError("SN_LENGTH_BITS must be 12 or 18")
         self.sn_length = sn_length
+        # Level/sampling guard for per-PDU logging (see src/tracing.py)
+        self.tracer = tracer if tracer is not None else Tracer()
+        # Per-stage timing counters, off unless an enabled StageTimers is passed (see src/stage_timing.py)
+        self.timers = timers if timers is not None else StageTimers()
         self.modulus = 2**self.sn_length
         self.max_sn_value = self.modulus - 1
         
@@ -49,26 +94,55 @@ class PDCPReceiver:
         # "Window_Size = 2^(PDCP_SN_Size – 1)"
         self.window_size_hfn_calc = 2**(self.sn_length - 1)
 
-        self.rx_deliv = 0  # COUNT of the first SDU not yet delivered to upper layers
-        self.rx_next = 0   # Next expected COUNT from lower layers (highest received COUNT + 1)
+        # COUNTs are compared relative to RX_DELIV modulo 2**32 throughout, so the receiver keeps
+        # working across the 32-bit COUNT wrap (initial_count near 2**32 exercises it quickly).
+        self.rx_deliv = initial_count % (2**32)  # COUNT of the first SDU not yet delivered to upper layers
+        self.rx_next = self.rx_deliv  # Next expected COUNT from lower layers (highest received COUNT + 1)
         
-        self.reordering_buffer = {}  # Key: COUNT, Value: PDCP_PDU
-        self.received_counts_for_duplicate_check = set() # To quickly check for duplicates (already processed/buffered)
+        # Ring buffer keyed by COUNT (value: SDU_ID). Buffered COUNTs always lie in
+        # [RX_DELIV, RX_DELIV + Window_Size), so Window_Size slots are enough.
+        self.reordering_buffer = ReorderingBuffer(self.window_size_hfn_calc)
+        # Bitmap of received COUNTs in [RX_DELIV - Window_Size, RX_DELIV + Window_Size), for duplicate checks.
+        # Fixed size (2**SN_LENGTH bits) regardless of how many PDUs are processed.
+        self.duplicate_detector = DuplicateDetector(self.window_size_hfn_calc, anchor=self.rx_deliv)
+        # Header parser for receive_encoded()
+        self.codec = PDUCodec(self.sn_length)
 
         # t-Reordering timer related attributes
         self.t_reordering_threshold = t_reordering_threshold # Max PDUs to wait if gap
         self.t_reordering_timer_active = False
         self.t_reordering_start_rx_reord = 0 # COUNT that was rx_deliv when timer started (RX_REORD in spec)
         self.pdus_processed_since_timer_start = 0
+        # Time-based t-Reordering: if t_reordering_ms is set, the timer runs on a simulated clock
+        # (driven by PDU arrival_time) instead of expiring after t_reordering_threshold PDUs.
+        self.t_reordering_ms = t_reordering_ms
+        self.timer_wheel = timer_wheel if timer_wheel is not None else (TimerWheel() if t_reordering_ms is not None else None)
+        self._t_reordering_handle = None
 
         # Stats
-        self.delivered_sdu_ids = set()
+        self.delivered_sdu_ids = SduIdSet() # Bitmap: one bit per SDU_ID instead of a set entry
         self.discarded_duplicates_count = 0
         self.discarded_old_count = 0
         self.discarded_corrupted_count = 0
         self.out_of_order_deliveries = 0 # Due to t-Reordering expiry
 
-        logger.info(f"PDCPReceiver initialized with SN length: {sn_length} bits, HFN Calc Window: {self.window_size_hfn_calc}, t-Reordering Threshold: {t_reordering_threshold}")
+        t_reordering_desc = f"{t_reordering_ms} ms" if t_reordering_ms is not None else f"{t_reordering_threshold} PDUs"
+        logger.info(f"PDCPReceiver initialized with SN length: {sn_length} bits, HFN Calc Window: {self.window_size_hfn_calc}, t-Reordering: {t_reordering_desc}, RX_DELIV: {self.rx_deliv}")
+
+    def fast_forward(self, count: int):
+        """
+        Moves RX_DELIV and RX_NEXT to COUNT `count` (mod 2**32), as if every SDU before it had been
+        handled. PDUs still waiting in the reordering buffer are dropped and t-Reordering is stopped;
+        the statistics counters are kept.
+        """
+        dropped = len(self.reordering_buffer)
+        if dropped:
+            logger.warning(f"RX: Fast-forward drops {dropped} PDUs still in the reordering buffer.")
+        self._stop_t_reordering()
+        self.rx_deliv = self.rx_next = count % (2**32)
+        self.reordering_buffer = ReorderingBuffer(self.window_size_hfn_calc)
+        self.duplicate_detector = DuplicateDetector(self.window_size_hfn_calc, anchor=self.rx_deliv)
+        logger.info(f"RX: Fast-forwarded to RX_DELIV={self.rx_deliv} (SN={self.rx_deliv % self.modulus}, HFN={self.rx_deliv >> self.sn_length})")
 
     def _calculate_hfn_from_rcvd_sn(self, rcvd_sn: int) -> int:
         # Implements HFN estimation logic from Clause 5.2.2.1 of 3GPP TS 38.323
@@ -95,80 +169,260 @@ class PDCPReceiver:
         # The resulting COUNT calculation will handle this with 32-bit unsigned arithmetic.
         return derived_hfn
 
-    def receive_pdu(self, pdu: PDCP_PDU):
-        logger.debug(f"RX: Received PDU: SN={pdu.sn}, SDU_ID={pdu.sdu_id}, (TX COUNT={pdu.count})")
+    def _calculate_hfn_batch(self, rcvd_sns) -> np.ndarray:
+        # Vectorized form of _calculate_hfn_from_rcvd_sn(): same Clause 5.2.2.1 window rules,
+        # evaluated against the current RX_DELIV for a whole array of SNs at once.
+        sns = np.asarray(rcvd_sns, dtype=np.int64)
+        hfn_rx_deliv = self.rx_deliv >> self.sn_length
+        sn_rx_deliv = self.rx_deliv % self.modulus
+
+        derived_hfn = np.full(sns.shape, hfn_rx_deliv, dtype=np.int64)
+        derived_hfn[sns < (sn_rx_deliv - self.window_size_hfn_calc)] += 1
+        derived_hfn[sns >= (sn_rx_deliv + self.window_size_hfn_calc)] -= 1
+        # Invalid SNs get the same -1 error marker as the scalar path
+        derived_hfn[(sns < 0) | (sns > self.max_sn_value)] = -1
+        return derived_hfn
+
+    def advance_time(self, now_ms: float):
+        """Moves the simulated clock forward, firing t-Reordering if it expires on the way (time-based mode only)."""
+        if self.timer_wheel is not None:
+            self.timer_wheel.advance_to(now_ms)
+
+    def receive_pdu(self, pdu: PDCP_PDU) -> int:
+        if self.tracer.debug and self.tracer.sampled():
+            logger.debug(f"RX: Received PDU: SN={pdu.sn}, SDU_ID={pdu.sdu_id}, (TX COUNT={pdu.count})")
+        timers = self.timers
+        if self.timer_wheel is not None:
+            t0 = perf_counter_ns() if timers.enabled else 0
+            self.timer_wheel.advance_to(pdu.arrival_time)
+            if t0:
+                timers.add(STAGE_RX_T_REORDERING, perf_counter_ns() - t0)
 
         if pdu.is_corrupted:
             self.discarded_corrupted_count += 1
-            logger.warning(f"RX: Discarding corrupted PDU with SN={pdu.sn}, SDU_ID={pdu.sdu_id}")
-            return
-
-        derived_hfn = self._calculate_hfn_from_rcvd_sn(pdu.sn)
-        if derived_hfn == -1: # Error from HFN calculation (e.g. invalid SN)
-            logger.error(f"RX: HFN calculation failed for PDU SN={pdu.sn}. Discarding.")
+            if self.tracer.warning and self.tracer.sampled():
+                logger.warning(f"RX: Discarding corrupted PDU with SN={pdu.sn}, SDU_ID={pdu.sdu_id}")
+            if self.tracer.recording:
+                self.tracer.record(EV_RX_CORRUPTED, pdu.count, pdu.sdu_id)
+            return RX_CORRUPTED
+
+        if not (0 <= pdu.sn <= self.max_sn_value):
+            logger.error(f"RX: Received invalid SN {pdu.sn}. Max SN is {self.max_sn_value}. Discarding.")
+            if self.tracer.recording:
+                self.tracer.record(EV_RX_INVALID, pdu.count, pdu.sdu_id)
+                self.tracer.dump()
             # This might be another category of discard.
-            return
+            return RX_INVALID
 
+        t0 = perf_counter_ns() if timers.enabled else 0
+        derived_hfn = self._calculate_hfn_from_rcvd_sn(pdu.sn)
+        if t0:
+            timers.add(STAGE_RX_HFN_DERIVATION, perf_counter_ns() - t0)
         # Reconstruct COUNT: (HFN << SN_len) | SN. Ensure it's 32-bit unsigned.
+        # A derived HFN of -1 (RX_DELIV in HFN 0, SN from the previous cycle) masks to the last
+        # HFN before the 32-bit wrap, i.e. a late PDU from before the wrap.
         rcvd_count = ((derived_hfn << self.sn_length) | pdu.sn) & 0xFFFFFFFF
-        logger.debug(f"RX: PDU SN={pdu.sn}. RX_DELIV={self.rx_deliv} (SN={self.rx_deliv % self.modulus}, HFN={self.rx_deliv >> self.sn_length}). Derived HFN={derived_hfn}. Reconstructed COUNT={rcvd_count}.")
+        if self.tracer.debug and self.tracer.sampled():
+            logger.debug(f"RX: PDU SN={pdu.sn}. RX_DELIV={self.rx_deliv} (SN={self.rx_deliv % self.modulus}, HFN={self.rx_deliv >> self.sn_length}). Derived HFN={derived_hfn}. Reconstructed COUNT={rcvd_count}.")
+
+        return self._process_rcvd_count(rcvd_count, pdu.sn, pdu.sdu_id)
+
+    def receive_batch(self, sns, corrupted_mask=None, sdu_ids=None, arrival_times=None) -> np.ndarray:
+        """
+        Batch equivalent of calling receive_pdu() for each PDU in arrival order.
+        HFN and COUNT are derived for the whole SN array in one vectorized pass against the
+        RX_DELIV at batch start; a PDU's COUNT is only re-derived if RX_DELIV has since moved
+        far enough for the window rule to give a different answer. Counters and state end up
+        identical to the scalar path. `sdu_ids` defaults to the reconstructed COUNT.
+        `arrival_times` (ms) drive the simulated clock in time-based t-Reordering mode.
+        Returns an array of per-PDU outcomes (RX_ACCEPTED, RX_DUPLICATE, RX_OLD, ...).
+        """
+        sns = np.asarray(sns, dtype=np.int64)
+        outcomes = np.full(sns.shape, RX_ACCEPTED, dtype=np.uint8)
+        if corrupted_mask is None:
+            corrupted_mask = np.zeros(sns.shape, dtype=bool)
+        else:
+            corrupted_mask = np.asarray(corrupted_mask, dtype=bool)
+        outcomes[corrupted_mask] = RX_CORRUPTED
+        self.discarded_corrupted_count += int(np.count_nonzero(corrupted_mask))
+        corrupted_list = corrupted_mask.tolist()
+        time_list = None
+        if self.timer_wheel is not None and arrival_times is not None:
+            time_list = np.asarray(arrival_times, dtype=np.float64).tolist()
+
+        t0 = perf_counter_ns() if self.timers.enabled else 0
+        derived_hfn = self._calculate_hfn_batch(sns)
+        if t0:
+            self.timers.add(STAGE_RX_HFN_DERIVATION, perf_counter_ns() - t0)
+        invalid_sn = ((sns < 0) | (sns > self.max_sn_value)).tolist()
+        # Unmasked COUNT: only valid while it lies within [RX_DELIV - Window_Size, RX_DELIV + Window_Size)
+        counts = (derived_hfn << self.sn_length) | sns
+
+        window = self.window_size_hfn_calc
+        sn_list = sns.tolist()
+        count_list = counts.tolist()
+        id_list = sdu_ids.tolist() if isinstance(sdu_ids, np.ndarray) else sdu_ids
+        timers = self.timers
+        for i in range(len(sn_list)):
+            if time_list is not None:
+                t0 = perf_counter_ns() if timers.enabled else 0
+                self.timer_wheel.advance_to(time_list[i])
+                if t0:
+                    timers.add(STAGE_RX_T_REORDERING, perf_counter_ns() - t0)
+            sn = sn_list[i]
+            if corrupted_list[i]:
+                # Already counted above; the clock still moves to its arrival time, as in receive_pdu()
+                if self.tracer.warning and self.tracer.sampled():
+                    logger.warning(f"RX: Discarding corrupted PDU with SN={sn}")
+                if self.tracer.recording:
+                    count = count_list[i] & 0xFFFFFFFF
+                    self.tracer.record(EV_RX_CORRUPTED, count, id_list[i] if id_list is not None else count)
+                continue
+            if invalid_sn[i]:
+                logger.error(f"RX: Received invalid SN {sn}. Max SN is {self.max_sn_value}. Discarding.")
+                if self.tracer.recording:
+                    self.tracer.record(EV_RX_INVALID, sn, -1)
+                    self.tracer.dump()
+                outcomes[i] = RX_INVALID
+                continue
+
+            count = count_list[i]
+            if not (self.rx_deliv - window <= count < self.rx_deliv + window):
+                # RX_DELIV moved since the batch derivation; fall back to the scalar rule
+                t0 = perf_counter_ns() if timers.enabled else 0
+                count = (self._calculate_hfn_from_rcvd_sn(sn) << self.sn_length) | sn
+                if t0:
+                    timers.add(STAGE_RX_HFN_DERIVATION, perf_counter_ns() - t0)
+            rcvd_count = count & 0xFFFFFFFF # Derived HFN of -1 masks to before the wrap, as in the scalar path
+            sdu_id = id_list[i] if id_list is not None else rcvd_count
+            outcomes[i] = self._process_rcvd_count(rcvd_count, sn, sdu_id)
+        return outcomes
+
+    def receive_encoded(self, buffer, pdu_lengths, corrupted_mask=None, sdu_ids=None, arrival_times=None,
+                        pdu_offsets=None):
+        """
+        Receives PDUs in their 38.323 binary form, laid back to back in `buffer` with the given
+        `pdu_lengths` (or at `pdu_offsets`, see src/pdu_codec.py). Headers are parsed in bulk
+        without copying the buffer, then the data PDUs go through receive_batch(); control PDUs
+        get RX_CONTROL. Returns (outcomes, decoded) so the caller can reach the payloads of accepted PDUs.
+        """
+        decoded = self.codec.decode_batch(buffer, pdu_lengths, offsets=pdu_offsets)
+        is_data = decoded.is_data
+        if is_data.all():
+            outcomes = self.receive_batch(decoded.sns, corrupted_mask=corrupted_mask, sdu_ids=sdu_ids,
+                                          arrival_times=arrival_times)
+            return outcomes, decoded
+        logger.debug(f"RX: Skipping {len(decoded) - int(is_data.sum())} control PDUs in encoded batch")
+
+        def data_only(values):
+            return None if values is None else np.asarray(values)[is_data]
+
+        outcomes = np.full(len(decoded), RX_CONTROL, dtype=np.uint8)
+        outcomes[is_data] = self.receive_batch(decoded.sns[is_data], corrupted_mask=data_only(corrupted_mask),
+                                               sdu_ids=data_only(sdu_ids), arrival_times=data_only(arrival_times))
+        return outcomes, decoded
+
+    def _process_rcvd_count(self, rcvd_count: int, sn: int, sdu_id: int) -> int:
+        timers = self.timers
+        t0 = perf_counter_ns() if timers.enabled else 0
+        # Keep the duplicate window anchored at the current RX_DELIV
+        self.duplicate_detector.advance(self.rx_deliv)
 
         # Duplicate Check (Clause 5.2.2.2.3 from 38.323)
         # "if the SDU corresponding to the received PDCP PDU has already been received"
         # We check based on rcvd_count. If this COUNT was already delivered or is in buffer.
-        if rcvd_count in self.received_counts_for_duplicate_check:
+        if rcvd_count in self.duplicate_detector:
             self.discarded_duplicates_count += 1
-            logger.info(f"RX: Discarding duplicate PDU with reconstructed COUNT={rcvd_count} (SN={pdu.sn}, SDU_ID={pdu.sdu_id})")
-            return
+            if self.tracer.info and self.tracer.sampled():
+                logger.info(f"RX: Discarding duplicate PDU with reconstructed COUNT={rcvd_count} (SN={sn}, SDU_ID={sdu_id})")
+            if self.tracer.recording:
+                self.tracer.record(EV_RX_DUPLICATE, rcvd_count, sdu_id)
+            if t0:
+                timers.add(STAGE_RX_BUFFERING, perf_counter_ns() - t0)
+            return RX_DUPLICATE
 
         # Old Packet Check (Clause 5.2.2.2.3)
         # "if the COUNT value of the received PDCP PDU < RX_DELIV"
-        if rcvd_count < self.rx_deliv:
+        # Compared modulo 2**32: reconstructed COUNTs lie within Window_Size of RX_DELIV, so "behind
+        # RX_DELIV" is a negative offset, also when RX_DELIV has just wrapped to a small value.
+        if (rcvd_count - self.rx_deliv) & 0xFFFFFFFF >= 0x80000000:
             self.discarded_old_count += 1
-            logger.info(f"RX: Discarding old PDU: rcvd_count={rcvd_count} < RX_DELIV={self.rx_deliv} (SN={pdu.sn}, SDU_ID={pdu.sdu_id})")
-            return
+            if self.tracer.info and self.tracer.sampled():
+                logger.info(f"RX: Discarding old PDU: rcvd_count={rcvd_count} < RX_DELIV={self.rx_deliv} (SN={sn}, SDU_ID={sdu_id})")
+            if self.tracer.recording:
+                self.tracer.record(EV_RX_OLD, rcvd_count, sdu_id)
+            if t0:
+                timers.add(STAGE_RX_BUFFERING, perf_counter_ns() - t0)
+            return RX_OLD
         
         # Optional: Check for too far ahead (outside reordering window, 38.323 Clause 5.2.2.2.3)
         # Reordering_Window is typically 2**SN_LENGTH.
         # if rcvd_count >= self.rx_deliv + self.modulus: # self.modulus acts as Reordering_Window here
-        #     logger.warning(f"RX: Discarding PDU too far ahead: rcvd_count={rcvd_count}, RX_DELIV={self.rx_deliv}. (SN={pdu.sn})")
+        #     logger.warning(f"RX: Discarding PDU too far ahead: rcvd_count={rcvd_count}, RX_DELIV={self.rx_deliv}. (SN={sn})")
         #     self.discarded_old_count += 1 # Or a different counter
         #     return
 
         # Add to reordering buffer and mark as seen
         if rcvd_count not in self.reordering_buffer :
-             self.reordering_buffer[rcvd_count] = pdu
-             self.received_counts_for_duplicate_check.add(rcvd_count) # Add here to prevent re-adding if processing stalls
-             logger.debug(f"RX: Buffered PDU with COUNT={rcvd_count}, SN={pdu.sn}. Buffer size: {len(self.reordering_buffer)}")
-        else: # Should be caught by "received_counts_for_duplicate_check" earlier, but as a safeguard.
+             self.reordering_buffer[rcvd_count] = sdu_id
+             self.duplicate_detector.add(rcvd_count) # Add here to prevent re-adding if processing stalls
+             if self.tracer.debug and self.tracer.sampled():
+                 logger.debug(f"RX: Buffered PDU with COUNT={rcvd_count}, SN={sn}. Buffer size: {len(self.reordering_buffer)}")
+             if self.tracer.recording:
+                 self.tracer.record(EV_RX_BUFFERED, rcvd_count, sdu_id)
+        else: # Should be caught by "duplicate_detector" earlier, but as a safeguard.
             self.discarded_duplicates_count += 1
-            logger.info(f"RX: Discarding duplicate PDU (already in buffer) with COUNT={rcvd_count}")
-            return
-
-
-        # Update RX_NEXT (highest received PDU COUNT + 1)
-        self.rx_next = max(self.rx_next, (rcvd_count + 1) % (2**32))
+            if self.tracer.info and self.tracer.sampled():
+                logger.info(f"RX: Discarding duplicate PDU (already in buffer) with COUNT={rcvd_count}")
+            if self.tracer.recording:
+                self.tracer.record(EV_RX_DUPLICATE, rcvd_count, sdu_id)
+            if t0:
+                timers.add(STAGE_RX_BUFFERING, perf_counter_ns() - t0)
+            return RX_DUPLICATE
+
+
+        # Update RX_NEXT (highest received PDU COUNT + 1). Wrap-safe form of max(RX_NEXT, COUNT + 1):
+        # both are at or ahead of RX_DELIV, so the one further ahead wins.
+        next_count = (rcvd_count + 1) & 0xFFFFFFFF
+        if (next_count - self.rx_deliv) & 0xFFFFFFFF > (self.rx_next - self.rx_deliv) & 0xFFFFFFFF:
+            self.rx_next = next_count
+
+        if t0:
+            now = perf_counter_ns()
+            timers.add(STAGE_RX_BUFFERING, now - t0)
+            t0 = now
 
         # In-order delivery
         self._try_in_order_delivery()
+        if t0:
+            now = perf_counter_ns()
+            timers.add(STAGE_RX_DELIVERY, now - t0)
+            t0 = now
 
         # t-Reordering timer logic
         self._manage_t_reordering_timer()
+        if t0:
+            timers.add(STAGE_RX_T_REORDERING, perf_counter_ns() - t0)
         
         # If timer is active, increment counter for PDUs processed
         if self.t_reordering_timer_active:
             self.pdus_processed_since_timer_start +=1
 
+        return RX_ACCEPTED
+
 
     def _try_in_order_delivery(self):
         # Deliver PDUs that are now in-sequence
         while self.rx_deliv in self.reordering_buffer:
-            pdu_to_deliver = self.reordering_buffer.pop(self.rx_deliv)
+            sdu_id = self.reordering_buffer.pop(self.rx_deliv)
             # "Deliver SDU to upper layers"
-            self.delivered_sdu_ids.add(pdu_to_deliver.sdu_id)
-            logger.info(f"RX: Delivered SDU_ID={pdu_to_deliver.sdu_id} (COUNT={self.rx_deliv}, SN={pdu_to_deliver.sn}) in-order.")
+            self.delivered_sdu_ids.add(sdu_id)
+            if self.tracer.info and self.tracer.sampled():
+                logger.info(f"RX: Delivered SDU_ID={sdu_id} (COUNT={self.rx_deliv}, SN={self.rx_deliv % self.modulus}) in-order.")
+            if self.tracer.recording:
+                self.tracer.record(EV_RX_DELIVERED, self.rx_deliv, sdu_id)
             
-            # self.received_counts_for_duplicate_check.remove(self.rx_deliv) # No, keep it to detect future duplicates
+            # COUNT stays marked in duplicate_detector to detect future duplicates
             
             self.rx_deliv = (self.rx_deliv + 1) % (2**32)
             
@@ -183,13 +437,29 @@ class PDCPReceiver:
         if self.reordering_buffer:
             # Check if the current rx_deliv is the smallest key in buffer
             # and if there are other packets up to rx_next that are missing
-            if self.rx_deliv < self.rx_next and self.rx_deliv not in self.reordering_buffer:
+            if self.rx_deliv != self.rx_next and self.rx_deliv not in self.reordering_buffer: # RX_DELIV never passes RX_NEXT
                  is_gap_present = True
         
         if not is_gap_present and self.t_reordering_timer_active:
-            logger.debug(f"RX: No gap detected or buffer empty. Stopping t-Reordering timer. RX_DELIV={self.rx_deliv}")
-            self.t_reordering_timer_active = False
-            self.pdus_processed_since_timer_start = 0
+            if self.tracer.debug and self.tracer.sampled():
+                logger.debug(f"RX: No gap detected or buffer empty. Stopping t-Reordering timer. RX_DELIV={self.rx_deliv}")
+            if self.tracer.recording:
+                self.tracer.record(EV_T_REORDERING_STOP, self.rx_deliv)
+            self._stop_t_reordering()
+
+    def _stop_t_reordering(self):
+        self.t_reordering_timer_active = False
+        self.pdus_processed_since_timer_start = 0
+        if self._t_reordering_handle is not None:
+            self.timer_wheel.cancel(self._t_reordering_handle)
+            self._t_reordering_handle = None
+
+    def _on_t_reordering_timer(self):
+        # Timer wheel callback (time-based mode)
+        self._t_reordering_handle = None
+        if self.t_reordering_timer_active:
+            self._t_reordering_expired()
+            self._manage_t_reordering_timer() # Restart if a gap is still pending
 
 
     def _manage_t_reordering_timer(self):
@@ -199,7 +469,7 @@ class PDCPReceiver:
             # A gap exists if rx_deliv is not the next item in buffer AND rx_deliv < rx_next
             # More simply: if rx_deliv is not in buffer, but rx_deliv < min(reordering_buffer.keys())
             # Or, if rx_deliv is not in buffer and rx_deliv < rx_next (meaning we expect something)
-            if self.rx_deliv not in self.reordering_buffer and self.rx_deliv < self.rx_next:
+            if self.rx_deliv not in self.reordering_buffer and self.rx_deliv != self.rx_next: # RX_DELIV never passes RX_NEXT
                 gap_exists = True
 
         if gap_exists:
@@ -207,70 +477,82 @@ class PDCPReceiver:
                 self.t_reordering_timer_active = True
                 self.t_reordering_start_rx_reord = self.rx_deliv # RX_REORD in spec: COUNT of first SDU not delivered
                 self.pdus_processed_since_timer_start = 0
-                logger.info(f"RX: Gap detected. RX_DELIV={self.rx_deliv}, RX_NEXT={self.rx_next}. t-Reordering timer started. RX_REORD set to {self.t_reordering_start_rx_reord}.")
-            elif self.pdus_processed_since_timer_start >= self.t_reordering_threshold:
-                logger.warning(f"RX: t-Reordering timer expired! RX_DELIV={self.rx_deliv}, RX_REORD={self.t_reordering_start_rx_reord}, Threshold={self.t_reordering_threshold} met.")
-                # Deliver buffered PDUs up to RX_NEXT, even if out of order relative to RX_DELIV
-                # The spec (TS 38.323, 5.2.2.2.2 t-Reordering) says:
-                # - update RX_DELIV to the COUNT value of the first PDCP SDU that has not been received;
-                # - deliver the PDCP SDUs that have not been delivered to upper layers and discard the remaining PDCP SDUs.
-                # This means delivering from t_reordering_start_rx_reord up to rx_next, if available.
-                
-                # Simplified: deliver whatever is in buffer up to rx_next in COUNT order.
-                counts_to_deliver_on_expiry = sorted([
-                    c for c in self.reordering_buffer.keys() if c < self.rx_next
-                ])
-
-                last_delivered_count = self.rx_deliv -1 # if rx_deliv is 0, this is -1
-                if last_delivered_count < 0 and self.rx_deliv == 0 : last_delivered_count = -1 # to handle initial state correctly
-
-                for count_val in counts_to_deliver_on_expiry:
-                    pdu_to_deliver = self.reordering_buffer.pop(count_val)
-                    self.delivered_sdu_ids.add(pdu_to_deliver.sdu_id)
-                    # self.received_counts_for_duplicate_check.remove(count_val) # No, keep for future checks
-                    
-                    if count_val != (last_delivered_count + 1) % (2**32) and count_val >= self.rx_deliv : # Check if it's out of the current rx_deliv sequence
-                        self.out_of_order_deliveries += 1
-                        logger.warning(f"RX: Delivering SDU_ID={pdu_to_deliver.sdu_id} (COUNT={count_val}) OUT OF ORDER due to t-Reordering expiry.")
-                    else:
-                        logger.info(f"RX: Delivering SDU_ID={pdu_to_deliver.sdu_id} (COUNT={count_val}) due to t-Reordering expiry.")
-                    last_delivered_count = count_val
-
-                # Update RX_DELIV: "to the COUNT value of the first PDCP SDU that has not been received"
-                # This generally means advancing RX_DELIV past the gap that triggered the timer, up to RX_NEXT.
-                # Or find the new lowest COUNT not yet delivered.
-                # If everything up to rx_next was delivered or not present, rx_deliv becomes rx_next
-                
-                # A robust way:
-                # Start searching from the original RX_REORD value
-                new_rx_deliv = self.t_reordering_start_rx_reord
-                while new_rx_deliv < self.rx_next and new_rx_deliv not in self.reordering_buffer:
-                    # If new_rx_deliv was delivered (check delivered_sdu_ids by mapping back to PDU if needed)
-                    # or simply assume anything not in buffer up to rx_next is "handled" (lost or delivered)
-                    new_rx_deliv = (new_rx_deliv + 1) % (2**32)
-                
-                # If buffer is now empty or remaining items are all >= rx_next
-                if not self.reordering_buffer or min(self.reordering_buffer.keys()) >= self.rx_next:
-                    self.rx_deliv = self.rx_next
-                else: # There are still items in buffer < rx_next
-                    self.rx_deliv = min(self.reordering_buffer.keys())
-
-
-                logger.info(f"RX: After t-Reordering expiry processing, new RX_DELIV={self.rx_deliv}. Buffer size: {len(self.reordering_buffer)}")
-                
-                self.t_reordering_timer_active = False
-                self.pdus_processed_since_timer_start = 0
-                
-                # Attempt in-order delivery again with new rx_deliv
-                self._try_in_order_delivery()
+                if self.t_reordering_ms is not None:
+                    self._t_reordering_handle = self.timer_wheel.schedule(self.t_reordering_ms, self._on_t_reordering_timer)
+                if self.tracer.info and self.tracer.sampled():
+                    logger.info(f"RX: Gap detected. RX_DELIV={self.rx_deliv}, RX_NEXT={self.rx_next}. t-Reordering timer started. RX_REORD set to {self.t_reordering_start_rx_reord}.")
+                if self.tracer.recording:
+                    self.tracer.record(EV_T_REORDERING_START, self.rx_deliv)
+            elif self.t_reordering_ms is None and self.pdus_processed_since_timer_start >= self.t_reordering_threshold:
+                self._t_reordering_expired()
         
         # If timer is active, but the condition that started it (gap) is no longer true
         # (e.g. rx_deliv caught up, or buffer became empty)
         # This is handled in _try_in_order_delivery's end.
 
+    def _t_reordering_expired(self):
+        t0 = perf_counter_ns() if self.timers.enabled else 0
+        tracer = self.tracer
+        if tracer.recording:
+            tracer.record(EV_T_REORDERING_EXPIRED, self.rx_deliv)
+        if tracer.warning and tracer.sampled():
+            if self.t_reordering_ms is not None:
+                logger.warning(f"RX: t-Reordering timer expired at t={self.timer_wheel.now_ms:.3f} ms! RX_DELIV={self.rx_deliv}, RX_REORD={self.t_reordering_start_rx_reord}, t-Reordering={self.t_reordering_ms} ms.")
+            else:
+                logger.warning(f"RX: t-Reordering timer expired! RX_DELIV={self.rx_deliv}, RX_REORD={self.t_reordering_start_rx_reord}, Threshold={self.t_reordering_threshold} met.")
+        # Deliver buffered PDUs up to RX_NEXT, even if out of order relative to RX_DELIV
+        # The spec (TS 38.323, 5.2.2.2.2 t-Reordering) says:
+        # - update RX_DELIV to the COUNT value of the first PDCP SDU that has not been received;
+        # - deliver the PDCP SDUs that have not been delivered to upper layers and discard the remaining PDCP SDUs.
+        # This means delivering from t_reordering_start_rx_reord up to rx_next, if available.
+        
+        # Simplified: deliver whatever is in buffer up to rx_next in COUNT order.
+        # Everything buffered is >= rx_deliv, so this is an ordered drain of [rx_deliv, rx_next).
+        last_delivered_count = (self.rx_deliv - 1) % (2**32)
+
+        for count_val, sdu_id in self.reordering_buffer.drain(self.rx_deliv, self.rx_next):
+            self.delivered_sdu_ids.add(sdu_id)
+            # COUNT stays marked in duplicate_detector for future checks
+            
+            # drain() only yields COUNTs in [rx_deliv, rx_next), so any jump means a gap was skipped
+            if count_val != (last_delivered_count + 1) % (2**32): # Check if it's out of the current rx_deliv sequence
+                self.out_of_order_deliveries += 1
+                if tracer.warning and tracer.sampled():
+                    logger.warning(f"RX: Delivering SDU_ID={sdu_id} (COUNT={count_val}) OUT OF ORDER due to t-Reordering expiry.")
+                if tracer.recording:
+                    tracer.record(EV_RX_DELIVERED_OUT_OF_ORDER, count_val, sdu_id)
+            else:
+                if tracer.info and tracer.sampled():
+                    logger.info(f"RX: Delivering SDU_ID={sdu_id} (COUNT={count_val}) due to t-Reordering expiry.")
+                if tracer.recording:
+                    tracer.record(EV_RX_DELIVERED, count_val, sdu_id)
+            last_delivered_count = count_val
+
+        # Update RX_DELIV: "to the COUNT value of the first PDCP SDU that has not been received"
+        # This generally means advancing RX_DELIV past the gap that triggered the timer, up to RX_NEXT.
+        # Or find the new lowest COUNT not yet delivered.
+        # If everything up to rx_next was delivered or not present, rx_deliv becomes rx_next
+        
+        # If buffer is now empty or remaining items are all >= rx_next
+        next_buffered = self.reordering_buffer.next_present(self.rx_deliv, self.rx_next)
+        if next_buffered is None:
+            self.rx_deliv = self.rx_next
+        else: # There are still items in buffer < rx_next
+            self.rx_deliv = next_buffered
+
+
+        if tracer.info and tracer.sampled():
+            logger.info(f"RX: After t-Reordering expiry processing, new RX_DELIV={self.rx_deliv}. Buffer size: {len(self.reordering_buffer)}")
+        
+        self._stop_t_reordering()
+        
+        # Attempt in-order delivery again with new rx_deliv
+        self._try_in_order_delivery()
+        if t0:
+            self.timers.add(STAGE_RX_T_REORDERING_EXPIRY, perf_counter_ns() - t0)
 
     def get_status(self):
-        return {
+        status = {
             "delivered_sdu_count": len(self.delivered_sdu_ids),
             "buffered_pdu_count": len(self.reordering_buffer),
             "discarded_duplicates": self.discarded_duplicates_count,
@@ -279,27 +561,29 @@ class PDCPReceiver:
             "out_of_order_deliveries": self.out_of_order_deliveries,
             "rx_deliv": self.rx_deliv,
             "rx_next": self.rx_next,
-            "reordering_buffer_keys": sorted(list(self.reordering_buffer.keys()))[:10] # First 10 keys for brevity
+            "reordering_buffer_keys": self.reordering_buffer.keys(self.rx_deliv, limit=10) # First 10 keys for brevity
         }
+        if self.timers.enabled:
+            status["stage_timing"] = self.timers.snapshot()
+        return status
 
     def flush_buffer(self):
         """Called at the end of simulation to process remaining buffered packets."""
         logger.info("RX: Flushing reordering buffer at end of simulation.")
         # Similar to t-Reordering expiry, but deliver everything in order
-        counts_to_deliver = sorted(self.reordering_buffer.keys())
-        for count_val in counts_to_deliver:
-            if count_val == self.rx_deliv : # Deliver in order
-                pdu_to_deliver = self.reordering_buffer.pop(count_val)
-                self.delivered_sdu_ids.add(pdu_to_deliver.sdu_id)
-                logger.info(f"RX: Delivered SDU_ID={pdu_to_deliver.sdu_id} (COUNT={self.rx_deliv}) during flush.")
-                self.rx_deliv = (self.rx_deliv + 1) % (2**32)
-            elif count_val > self.rx_deliv : # A gap still exists
-                logger.warning(f"RX: SDU for COUNT={self.rx_deliv} missing. SDU for COUNT={count_val} (SDU_ID {self.reordering_buffer[count_val].sdu_id}) remains in buffer or is lost.")
-                # For simplicity, we just deliver what's next in order.
-                # If we want to deliver out of order, change logic here.
-                # For now, this means only contiguous delivery from rx_deliv.
-                break # Stop if there is a gap.
-        
+        while self.rx_deliv in self.reordering_buffer: # Deliver in order
+            sdu_id = self.reordering_buffer.pop(self.rx_deliv)
+            self.delivered_sdu_ids.add(sdu_id)
+            logger.info(f"RX: Delivered SDU_ID={sdu_id} (COUNT={self.rx_deliv}) during flush.")
+            self.rx_deliv = (self.rx_deliv + 1) % (2**32)
+
+        next_buffered = self.reordering_buffer.next_present(self.rx_deliv)
+        if next_buffered is not None: # A gap still exists
+            logger.warning(f"RX: SDU for COUNT={self.rx_deliv} missing. SDU for COUNT={next_buffered} (SDU_ID {self.reordering_buffer[next_buffered]}) remains in buffer or is lost.")
+            # For simplicity, we just deliver what's next in order.
+            # If we want to deliver out of order, change logic here.
+            # For now, this means only contiguous delivery from rx_deliv.
+
         remaining_in_buffer = len(self.reordering_buffer)
         if remaining_in_buffer > 0:
             logger.warning(f"RX: {remaining_in_buffer} PDUs remain in buffer after flush, likely due to preceding losses.")
\ No newline at end of file
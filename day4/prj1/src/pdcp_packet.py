@@ -1,22 +1,25 @@
 import dataclasses
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class PDCP_SDU:
     id: int  # Unique identifier for the SDU
     payload: str  # Actual data (simple string for simulation)
 
-@dataclasses.dataclass
+# slots=True: no per-instance __dict__, so a PDU is a handful of pointers. Long runs create one per SDU.
+@dataclasses.dataclass(slots=True)
 class PDCP_PDU:
     sdu_id: int  # Reference to the original SDU's id
     sn: int  # PDCP Sequence Number (12-bit or 18-bit)
     count: int  # Full 32-bit COUNT value (for internal tracking at Tx, and verification)
     hfn: int  # HFN part of the COUNT (for internal tracking/display)
-    original_sdu_payload: str  # The original SDU payload
+    original_sdu_payload: str = None  # The original SDU payload (None in payload-free mode)
     is_corrupted: bool = False
+    arrival_time: float = 0.0  # Simulated time (ms) the PDU reaches the receiver, set by the channel
 
     def __str__(self):
         return f"PDU(sdu_id={self.sdu_id}, SN={self.sn}, COUNT={self.count}, HFN={self.hfn}, corrupted={self.is_corrupted})"
 
-    # For duplicate checking in sets if needed, though we primarily use COUNT
+    # For duplicate checking in sets if needed, though we primarily use COUNT.
+    # The payload is left out: (sdu_id, COUNT) already identifies the PDU and hashing strings is not free.
     def __hash__(self):
-        return hash((self.sdu_id, self.sn, self.count, self.original_sdu_payload, self.is_corrupted))
\ No newline at end of file
+        return hash((self.sdu_id, self.sn, self.count, self.is_corrupted))
@@ -0,0 +1,148 @@
+import numpy as np
+
+DC_BIT = 0x80  # First octet, most significant bit: 1 = data PDU, 0 = control PDU
+
+
+class DecodedPDUs:
+    """
+    Result of PDUCodec.decode_batch(): header fields as arrays plus zero-copy access to the payloads.
+    payload(i) is a memoryview into the original buffer, so nothing is copied until the caller does.
+    """
+
+    def __init__(self, buffer, offsets: np.ndarray, lengths: np.ndarray, sns: np.ndarray,
+                 is_data: np.ndarray, header_size: int):
+        self._view = memoryview(buffer).cast("B")
+        self.offsets = offsets      # Start of each PDU in the buffer
+        self.lengths = lengths      # Total length of each PDU (header + payload)
+        self.sns = sns              # SN from each header (int64)
+        self.is_data = is_data      # D/C bit set
+        self.header_size = header_size
+
+    def __len__(self) -> int:
+        return len(self.sns)
+
+    def payload(self, i: int) -> memoryview:
+        start = int(self.offsets[i]) + self.header_size
+        return self._view[start:int(self.offsets[i] + self.lengths[i])]
+
+    def payloads(self):
+        for i in range(len(self)):
+            yield self.payload(i)
+
+
+class PDUCodec:
+    """
+    TS 38.323 clause 6.2.2 PDCP data PDU for DRBs, without MAC-I:
+
+        12-bit SN: | D/C | R | R | R | SN (4 MSBs) |  SN (8 LSBs) | Data ...
+        18-bit SN: | D/C | R x 5 | SN (2 MSBs) | SN (8 bits) | SN (8 LSBs) | Data ...
+
+    The batch methods work on many PDUs back to back in one buffer, with header fields written
+    and read as NumPy array operations rather than per PDU. Framing (where one PDU ends and the
+    next starts) comes from the lower layer, so it is passed alongside as an array of PDU lengths.
+    """
+
+    def __init__(self, sn_length: int):
+        if sn_length not in [12, 18]:
+            raise ValueError("SN_LENGTH_BITS must be 12 or 18")
+        self.sn_length = sn_length
+        self.header_size = 2 if sn_length == 12 else 3
+        self.max_sn_value = 2**sn_length - 1
+        self._buffer = bytearray() # Reused by encode_batch() unless the caller passes its own
+
+    def _header_bytes(self, sns: np.ndarray) -> list:
+        # One array per header octet, D/C bit set, R bits zero
+        if self.sn_length == 12:
+            return [DC_BIT | (sns >> 8), sns & 0xFF]
+        return [DC_BIT | (sns >> 16), (sns >> 8) & 0xFF, sns & 0xFF]
+
+    def encode(self, sn: int, payload=b"") -> bytes:
+        """One data PDU as bytes."""
+        if not (0 <= sn <= self.max_sn_value):
+            raise ValueError(f"SN {sn} does not fit in {self.sn_length} bits")
+        header = (DC_BIT << (8 * (self.header_size - 1))) | sn
+        return header.to_bytes(self.header_size, "big") + bytes(payload)
+
+    def decode(self, pdu) -> tuple:
+        """(is_data, sn, payload memoryview) of one PDU."""
+        view = memoryview(pdu).cast("B")
+        if len(view) < self.header_size:
+            raise ValueError(f"PDU of {len(view)} bytes is shorter than the {self.header_size}-byte header")
+        header = int.from_bytes(view[:self.header_size], "big")
+        return bool(view[0] & DC_BIT), header & self.max_sn_value, view[self.header_size:]
+
+    def encode_batch(self, sns, payloads=None, payload_size: int = 0, out: bytearray = None):
+        """
+        Encodes data PDUs back to back into one preallocated bytearray (`out`, or a buffer owned by
+        the codec, grown as needed and reused by the next call). `payloads` is a 2-D uint8 array
+        (one row per PDU), a list of bytes-like objects, or None for `payload_size` zero bytes each.
+        Returns (memoryview of the encoded bytes, PDU lengths array). The view is only valid
+        until the buffer is next written.
+        """
+        sns = np.asarray(sns, dtype=np.int64)
+        if sns.size and (sns.min() < 0 or sns.max() > self.max_sn_value):
+            raise ValueError(f"SNs must fit in {self.sn_length} bits")
+        n = len(sns)
+        ragged = payloads is not None and not isinstance(payloads, np.ndarray)
+        if ragged:
+            payload_lengths = np.fromiter((len(p) for p in payloads), dtype=np.int64, count=n)
+        else:
+            if payloads is not None:
+                payloads = np.asarray(payloads, dtype=np.uint8).reshape(n, -1)
+                payload_size = payloads.shape[1]
+            payload_lengths = np.full(n, payload_size, dtype=np.int64)
+        lengths = payload_lengths + self.header_size
+        total = int(lengths.sum())
+
+        if out is not None:
+            if len(out) < total:
+                raise ValueError(f"Output buffer holds {len(out)} bytes; {total} needed")
+            buffer = out
+        else:
+            if len(self._buffer) < total:
+                # Replaced rather than resized: views handed out earlier may still reference the old one
+                self._buffer = bytearray(max(total, 2 * len(self._buffer)))
+            buffer = self._buffer
+        data = np.frombuffer(buffer, dtype=np.uint8, count=total)
+
+        if not ragged:
+            # Fixed-size PDUs: the buffer is an (n, pdu_size) matrix
+            rows = data.reshape(n, self.header_size + payload_size) if n else data.reshape(0, self.header_size)
+            for k, octet in enumerate(self._header_bytes(sns)):
+                rows[:, k] = octet
+            rows[:, self.header_size:] = payloads if payloads is not None else 0
+        else:
+            offsets = np.zeros(n, dtype=np.int64)
+            np.cumsum(lengths[:-1], out=offsets[1:])
+            is_payload = np.ones(total, dtype=bool)
+            for k, octet in enumerate(self._header_bytes(sns)):
+                data[offsets + k] = octet
+                is_payload[offsets + k] = False
+            data[is_payload] = np.frombuffer(b"".join(payloads), dtype=np.uint8)
+        return memoryview(buffer)[:total], lengths
+
+    def decode_batch(self, buffer, lengths, offsets=None) -> DecodedPDUs:
+        """
+        Parses PDUs of the given `lengths` laid back to back in `buffer` (bytes, bytearray,
+        memoryview or mmap), or starting at the given `offsets` if there is other data between
+        them (e.g. trace record headers). Only the header octets are read; payloads stay in the buffer.
+        """
+        lengths = np.asarray(lengths, dtype=np.int64)
+        data = np.frombuffer(buffer, dtype=np.uint8)
+        if offsets is None:
+            offsets = np.zeros(len(lengths), dtype=np.int64)
+            if len(lengths):
+                np.cumsum(lengths[:-1], out=offsets[1:])
+        else:
+            offsets = np.asarray(offsets, dtype=np.int64)
+        if len(lengths):
+            if lengths.min() < self.header_size:
+                raise ValueError(f"PDU shorter than the {self.header_size}-byte header")
+            end = int((offsets + lengths).max())
+            if end > len(data):
+                raise ValueError(f"PDUs extend to byte {end}; buffer has {len(data)}")
+        first = data[offsets].astype(np.int64)
+        sns = first & (self.max_sn_value >> (8 * (self.header_size - 1)))
+        for k in range(1, self.header_size):
+            sns = (sns << 8) | data[offsets + k]
+        return DecodedPDUs(buffer, offsets, lengths, sns, (first & DC_BIT) != 0, self.header_size)
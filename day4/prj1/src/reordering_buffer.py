@@ -0,0 +1,116 @@
+COUNT_MODULUS = 2**32
+_WORD_BITS = 64
+
+
+def _lowest_bit(x: int) -> int:
+    return (x & -x).bit_length() - 1
+
+
+class ReorderingBuffer:
+    """
+    Ring-array PDCP reordering buffer, indexed by COUNT mod capacity.
+
+    The receiver only ever buffers COUNTs in [RX_DELIV, RX_DELIV + Window_Size), so a ring of
+    Window_Size slots holds every possible entry without collisions. A two-level occupancy
+    bitmap (64-bit words plus a summary of non-empty words) makes "next buffered COUNT" a
+    couple of integer operations instead of a sorted()/min() scan over all keys.
+    Supports the subset of the dict API the receiver uses (in, [], pop, len).
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0 or capacity & (capacity - 1):
+            raise ValueError("ReorderingBuffer capacity must be a power of two")
+        self.capacity = capacity
+        self._slot_mask = capacity - 1
+        self._counts = [None] * capacity  # COUNT held in each slot (None if empty)
+        self._values = [None] * capacity
+        self._words = [0] * max(1, capacity // _WORD_BITS)  # Occupancy bitmap
+        self._summary = 0  # Bit i set if _words[i] != 0
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __contains__(self, count: int) -> bool:
+        return self._counts[count & self._slot_mask] == count
+
+    def __getitem__(self, count: int):
+        slot = count & self._slot_mask
+        if self._counts[slot] != count:
+            raise KeyError(count)
+        return self._values[slot]
+
+    def __setitem__(self, count: int, value):
+        slot = count & self._slot_mask
+        held = self._counts[slot]
+        if held is None:
+            word = slot >> 6
+            self._words[word] |= 1 << (slot & 63)
+            self._summary |= 1 << word
+            self._len += 1
+        elif held != count:
+            raise ValueError(f"COUNT {count} collides with buffered COUNT {held}; outside reordering window")
+        self._counts[slot] = count
+        self._values[slot] = value
+
+    def pop(self, count: int):
+        slot = count & self._slot_mask
+        if self._counts[slot] != count:
+            raise KeyError(count)
+        value = self._values[slot]
+        self._counts[slot] = None
+        self._values[slot] = None
+        word = slot >> 6
+        self._words[word] &= ~(1 << (slot & 63))
+        if not self._words[word]:
+            self._summary &= ~(1 << word)
+        self._len -= 1
+        return value
+
+    def _next_occupied_slot(self, slot: int):
+        # First occupied slot at or after `slot`, wrapping around the ring. None if empty.
+        if not self._len:
+            return None
+        word = slot >> 6
+        bits = self._words[word] >> (slot & 63)
+        if bits:
+            return slot + _lowest_bit(bits)
+        later_words = self._summary >> (word + 1)
+        if later_words:
+            word += 1 + _lowest_bit(later_words)
+        else:
+            word = _lowest_bit(self._summary) # Wrap to the start of the ring
+        return (word << 6) + _lowest_bit(self._words[word])
+
+    def next_present(self, start: int, end: int = None):
+        """Lowest buffered COUNT in [start, end) (modulo 2**32), or None. `end` defaults to start + capacity."""
+        span = self.capacity if end is None else min((end - start) % COUNT_MODULUS, self.capacity)
+        if not span:
+            return None
+        start_slot = start & self._slot_mask
+        slot = self._next_occupied_slot(start_slot)
+        if slot is None:
+            return None
+        distance = (slot - start_slot) & self._slot_mask
+        if distance >= span:
+            return None
+        return (start + distance) % COUNT_MODULUS
+
+    def drain(self, start: int, end: int):
+        """Removes and yields (COUNT, value) for every buffered COUNT in [start, end), in COUNT order."""
+        count = self.next_present(start, end)
+        while count is not None:
+            yield count, self.pop(count)
+            count = self.next_present(count, end)
+
+    def keys(self, start: int, limit: int = None) -> list:
+        """Buffered COUNTs in order starting from `start` (normally RX_DELIV), at most `limit` of them."""
+        keys = []
+        count = self.next_present(start)
+        while count is not None and (limit is None or len(keys) < limit):
+            keys.append(count)
+            nxt = (count + 1) % COUNT_MODULUS
+            if (nxt - start) % COUNT_MODULUS >= self.capacity:
+                break
+            count = self.next_present(nxt, start + self.capacity)
+        return keys
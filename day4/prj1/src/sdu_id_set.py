@@ -0,0 +1,72 @@
+import operator
+
+_PAGE_BITS = 1 << 16  # IDs per bitmap page (8 KiB)
+
+
+class SduIdSet:
+    """
+    Set of non-negative integer SDU IDs stored as a paged bitmap.
+
+    The receiver records every delivered SDU_ID; with a Python set that costs ~60 bytes per
+    ID, which dominates memory on multi-million packet runs. Here an ID costs one bit, and
+    pages are only allocated for ID ranges that are actually used, so IDs near 2**32 (e.g.
+    COUNT-valued IDs after a wrap) stay cheap. Supports add, in, len, iteration (ascending)
+    and equality with another SduIdSet or a plain set.
+    """
+
+    def __init__(self, ids=()):
+        self._pages = {}  # page index -> bytearray bitmap
+        self._len = 0
+        for sdu_id in ids:
+            self.add(sdu_id)
+
+    def add(self, sdu_id: int):
+        sdu_id = operator.index(sdu_id)  # Any integer type (e.g. NumPy ints), as in __contains__
+        page_idx, bit = divmod(sdu_id, _PAGE_BITS)
+        page = self._pages.get(page_idx)
+        if page is None:
+            if sdu_id < 0:
+                raise ValueError(f"SDU_ID must be non-negative, got {sdu_id}")
+            page = self._pages[page_idx] = bytearray(_PAGE_BITS // 8)
+        mask = 1 << (bit & 7)
+        if not page[bit >> 3] & mask:
+            page[bit >> 3] |= mask
+            self._len += 1
+
+    def __contains__(self, sdu_id) -> bool:
+        try:
+            sdu_id = operator.index(sdu_id)
+        except TypeError:
+            return False
+        if sdu_id < 0:
+            return False
+        page_idx, bit = divmod(sdu_id, _PAGE_BITS)
+        page = self._pages.get(page_idx)
+        return page is not None and bool(page[bit >> 3] & (1 << (bit & 7)))
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self):
+        for page_idx in sorted(self._pages):
+            page = self._pages[page_idx]
+            base = page_idx * _PAGE_BITS
+            for byte_idx, byte in enumerate(page):
+                while byte:
+                    low = byte & -byte
+                    yield base + (byte_idx << 3) + low.bit_length() - 1
+                    byte ^= low
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, SduIdSet):
+            return self._len == other._len and set(self) == set(other)
+        if isinstance(other, (set, frozenset)):
+            return self._len == len(other) and all(sdu_id in self for sdu_id in other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"SduIdSet(len={self._len})"
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._pages) * (_PAGE_BITS // 8)
@@ -0,0 +1,114 @@
+import math
+
+
+class Timer:
+    """Handle returned by TimerWheel.schedule(); pass it to TimerWheel.cancel()."""
+    __slots__ = ("expiry_tick", "callback", "_slot")
+
+    def __init__(self, expiry_tick: int, callback):
+        self.expiry_tick = expiry_tick
+        self.callback = callback
+        self._slot = None  # The set currently holding this timer (None once fired/cancelled)
+
+    @property
+    def active(self) -> bool:
+        return self._slot is not None
+
+
+class TimerWheel:
+    """
+    Simulated clock with a hierarchical timing wheel (times in milliseconds).
+
+    Level L has `slots_per_level` slots, each covering slots_per_level**L ticks. A timer is
+    placed on the lowest level whose range still contains its expiry, and is cascaded down
+    when the clock reaches that slot, so schedule() and cancel() are O(1) regardless of how
+    many timers are pending. Timers further out than the top level wait in an overflow set.
+    The clock only moves forward, via advance_to(), firing expired callbacks in tick order.
+    """
+
+    def __init__(self, tick_ms: float = 1.0, slots_per_level: int = 64, levels: int = 4):
+        if slots_per_level <= 0 or slots_per_level & (slots_per_level - 1):
+            raise ValueError("slots_per_level must be a power of two")
+        self.tick_ms = tick_ms
+        self.now_ms = 0.0
+        self.now_tick = 0
+        self._bits = slots_per_level.bit_length() - 1
+        self._slot_mask = slots_per_level - 1
+        self._levels = [[set() for _ in range(slots_per_level)] for _ in range(levels)]
+        self._overflow = set()
+        self._due = set()  # Timers scheduled at or before the current tick
+        self._pending = 0
+        self.fired_count = 0
+
+    def __len__(self) -> int:
+        return self._pending
+
+    def schedule(self, delay_ms: float, callback) -> Timer:
+        """Arms a timer that calls `callback()` once the clock reaches now_ms + delay_ms."""
+        expiry_tick = math.ceil((self.now_ms + delay_ms) / self.tick_ms)
+        timer = Timer(expiry_tick, callback)
+        self._place(timer)
+        self._pending += 1
+        return timer
+
+    def cancel(self, timer: Timer):
+        if timer._slot is not None:
+            timer._slot.discard(timer)
+            timer._slot = None
+            self._pending -= 1
+
+    def _place(self, timer: Timer):
+        expiry = timer.expiry_tick
+        if expiry <= self.now_tick:
+            slot = self._due
+        else:
+            slot = self._overflow
+            for level, slots in enumerate(self._levels):
+                shift = self._bits * (level + 1)
+                # Lowest level on which expiry and now agree on all higher-order bits
+                if (expiry >> shift) == (self.now_tick >> shift):
+                    slot = slots[(expiry >> (self._bits * level)) & self._slot_mask]
+                    break
+        slot.add(timer)
+        timer._slot = slot
+
+    def _fire(self, slot: set):
+        while slot:
+            timer = slot.pop()
+            timer._slot = None
+            self._pending -= 1
+            self.fired_count += 1
+            timer.callback()
+
+    def _cascade(self):
+        # Re-place timers from every higher level whose slot boundary the clock just crossed,
+        # highest first so they can fall through several levels in one step.
+        for level in range(len(self._levels), 0, -1):
+            if self.now_tick & ((1 << (self._bits * level)) - 1):
+                continue
+            if level == len(self._levels):
+                slot = self._overflow
+            else:
+                slot = self._levels[level][(self.now_tick >> (self._bits * level)) & self._slot_mask]
+            if slot:
+                timers = list(slot)
+                slot.clear()
+                for timer in timers:
+                    self._place(timer)
+
+    def advance_to(self, now_ms: float):
+        """Moves the clock forward to `now_ms`, firing every timer that expires on the way."""
+        if now_ms < self.now_ms:
+            return
+        target_tick = math.floor(now_ms / self.tick_ms)
+        self._fire(self._due)
+        while self.now_tick < target_tick:
+            if not self._pending:
+                self.now_tick = target_tick # Nothing armed: jump straight there
+                break
+            self.now_tick += 1
+            self.now_ms = self.now_tick * self.tick_ms # Callbacks observe the expiry time
+            self._cascade()
+            self._fire(self._levels[0][self.now_tick & self._slot_mask])
+            self._fire(self._due) # Zero-delay timers armed by the callbacks above
+        self.now_ms = now_ms
@@ -0,0 +1,86 @@
+import logging
+import struct
+
+# Event codes stored in the trace ring buffer
+EV_TX_SEND = 1
+EV_CH_LOST = 2
+EV_CH_CORRUPTED = 3
+EV_CH_DUPLICATED = 4
+EV_CH_REORDERED = 5
+EV_RX_CORRUPTED = 6
+EV_RX_INVALID = 7
+EV_RX_DUPLICATE = 8
+EV_RX_OLD = 9
+EV_RX_BUFFERED = 10
+EV_RX_DELIVERED = 11
+EV_RX_DELIVERED_OUT_OF_ORDER = 12
+EV_T_REORDERING_START = 13
+EV_T_REORDERING_EXPIRED = 14
+EV_T_REORDERING_STOP = 15
+
+EVENT_NAMES = {code: name for name, code in globals().items() if name.startswith("EV_")}
+
+_RECORD = struct.Struct("<BxxxIq")  # event code, COUNT, SDU_ID
+
+
+class Tracer:
+    """
+    Guard for hot-path logging, shared by the PDCP entities and the channel.
+
+    The level flags (`debug`, `info`, `warning`) are plain attributes snapshotted from the
+    logger when the tracer is created, so a disabled level costs one attribute check and
+    no message formatting. Call refresh() after changing logger levels.
+    `sample_every=N` lets only 1 in N per-packet events through to the logger.
+    `ring_capacity` > 0 additionally keeps the most recent events as fixed-size binary
+    records in a preallocated ring buffer, which dump() writes to the log on error.
+    """
+
+    def __init__(self, logger: logging.Logger = None, sample_every: int = 1, ring_capacity: int = 0):
+        self.logger = logger if logger is not None else logging.getLogger(__package__)
+        self.sample_every = max(1, sample_every)
+        self._sample_countdown = 1
+        self.ring_capacity = ring_capacity
+        self.recording = ring_capacity > 0
+        self._ring = bytearray(ring_capacity * _RECORD.size)
+        self._ring_pos = 0
+        self._ring_records = 0
+        self.refresh()
+
+    def refresh(self):
+        self.debug = self.logger.isEnabledFor(logging.DEBUG)
+        self.info = self.logger.isEnabledFor(logging.INFO)
+        self.warning = self.logger.isEnabledFor(logging.WARNING)
+
+    def sampled(self) -> bool:
+        """True for 1 in every `sample_every` calls. Check the level flag first."""
+        self._sample_countdown -= 1
+        if self._sample_countdown:
+            return False
+        self._sample_countdown = self.sample_every
+        return True
+
+    def record(self, event: int, count: int, sdu_id: int = -1):
+        _RECORD.pack_into(self._ring, self._ring_pos * _RECORD.size, event, count & 0xFFFFFFFF, sdu_id)
+        self._ring_pos += 1
+        if self._ring_pos == self.ring_capacity:
+            self._ring_pos = 0
+        if self._ring_records < self.ring_capacity:
+            self._ring_records += 1
+
+    def recent_events(self) -> list:
+        """Recorded events, oldest first, as (event_name, COUNT, SDU_ID) tuples."""
+        start = (self._ring_pos - self._ring_records) % self.ring_capacity if self.ring_capacity else 0
+        events = []
+        for i in range(self._ring_records):
+            event, count, sdu_id = _RECORD.unpack_from(self._ring, ((start + i) % self.ring_capacity) * _RECORD.size)
+            events.append((EVENT_NAMES.get(event, str(event)), count, sdu_id))
+        return events
+
+    def dump(self, level: int = logging.ERROR):
+        """Writes the recorded events to the log (e.g. when an error is detected)."""
+        if not self.recording:
+            return
+        events = self.recent_events()
+        self.logger.log(level, f"Trace ring buffer: last {len(events)} events")
+        for name, count, sdu_id in events:
+            self.logger.log(level, f"  {name} COUNT={count} SDU_ID={sdu_id}")
@@ -11,6 +11,16 @@ document.addEventListener('DOMContentLoaded', function() {
     const spinner = document.getElementById('spinner');
     const errorMessageDiv = document.getElementById('error-message');
     const runButton = document.getElementById('run-simulation-btn');
+    const cancelButton = document.getElementById('cancel-simulation-btn');
+    const liveProgress = document.getElementById('live-progress');
+    let cancelUrl = null;
+
+    cancelButton.addEventListener('click', async function() {
+        if (cancelUrl) {
+            cancelButton.disabled = true;
+            await fetch(cancelUrl, { method: 'POST' });
+        }
+    });
 
     form.addEventListener('submit', async function(event) {
         event.preventDefault();
@@ -34,12 +44,30 @@ document.addEventListener('DOMContentLoaded', function() {
                 body: formData
             });
 
-            const data = await response.json();
+            const submitted = await response.json();
+            if (!submitted.success) {
+                throw new Error(submitted.error || 'Unknown error occurred.');
+            }
+
+            // Cached results come back at once; otherwise the simulation runs as a
+            // background job: follow its live progress stream until it finishes
+            let data = submitted;
+            if (submitted.status !== 'done') {
+                cancelUrl = submitted.cancel_url;
+                cancelButton.disabled = false;
+                cancelButton.style.display = 'inline-block';
+                data = window.EventSource
+                    ? await streamJob(submitted.events_url)
+                    : await pollJob(submitted.status_url);
+            }
             spinner.style.display = 'none';
 
-            if (data.success) {
-                displayMetrics(data.metrics);
-                displayPlots(data.plots);
+            if (data.status === 'done') {
+                displayMetrics(data.result.metrics);
+                displayPlots(data.result.plots);
+            } else if (data.status === 'cancelled') {
+                errorMessageDiv.textContent = 'Simulation cancelled.';
+                errorMessageDiv.style.display = 'block';
             } else {
                 errorMessageDiv.textContent = 'Error: ' + (data.error || 'Unknown error occurred.');
                 errorMessageDiv.style.display = 'block';
@@ -53,9 +81,55 @@ document.addEventListener('DOMContentLoaded', function() {
         } finally {
             runButton.disabled = false;
             runButton.textContent = 'Run Simulation';
+            cancelButton.style.display = 'none';
+            liveProgress.textContent = '';
+            cancelUrl = null;
         }
     });
 
+    function streamJob(eventsUrl) {
+        // Server-Sent Events: "progress" while running, then one of "done" / "failed" / "cancelled"
+        return new Promise((resolve, reject) => {
+            const source = new EventSource(eventsUrl);
+            source.addEventListener('progress', function(event) {
+                const p = JSON.parse(event.data);
+                runButton.textContent = 'Running... ' + Math.round(100 * p.time / p.sdus_total) + '%';
+                liveProgress.textContent = `SDU ${p.time}/${p.sdus_total} | delivered ${p.delivered_sdu_count}`
+                    + ` | RX_DELIV ${p.rx_deliv} | RX_NEXT ${p.rx_next} | buffered ${p.buffer_size}`
+                    + ` | discarded dup/old/corrupt ${p.discarded_duplicates}/${p.discarded_old}/${p.discarded_corrupted}`;
+            });
+            for (const finalEvent of ['done', 'failed', 'cancelled']) {
+                source.addEventListener(finalEvent, function(event) {
+                    source.close();
+                    resolve(JSON.parse(event.data));
+                });
+            }
+            source.onerror = function() {
+                // EventSource reconnects by itself (resuming after the last event id) unless closed
+                if (source.readyState === EventSource.CLOSED) {
+                    reject(new Error('Progress stream closed unexpectedly.'));
+                }
+            };
+        });
+    }
+
+    async function pollJob(statusUrl) {
+        while (true) {
+            const response = await fetch(statusUrl);
+            const job = await response.json();
+            if (response.status === 404) {
+                throw new Error(job.error || 'Job not found.');
+            }
+            if (job.status === 'done' || job.status === 'failed' || job.status === 'cancelled') {
+                return job;
+            }
+            runButton.textContent = job.status === 'queued'
+                ? 'Queued...'
+                : 'Running... ' + Math.round(job.progress * 100) + '%';
+            await new Promise(resolve => setTimeout(resolve, 500));
+        }
+    }
+
     function displayMetrics(metrics) {
         const friendlyNames = {
             "total_sdu_sent": "Total SDUs Sent by TX",
@@ -0,0 +1,224 @@
+import argparse
+import dataclasses
+import hashlib
+import itertools
+import json
+import logging
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import config # Default simulation parameters
+from main import run_simulation, setup_logging
+from cell_simulation import simulation_params, init_worker, SUMMARY_ONLY_OVERRIDES
+
+logger = logging.getLogger(__name__)
+
+# Per-run stats aggregated across replicates
+SWEEP_METRICS = ["delivered_sdu_count", "discarded_duplicates", "discarded_old",
+                 "discarded_corrupted", "out_of_order_deliveries", "calculated_lost_sdu"]
+
+# Two-sided 95% Student-t critical values by degrees of freedom; 1.96 (normal) beyond the table
+_T_95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262,
+         10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086, 25: 2.060, 30: 2.042, 40: 2.021, 60: 2.000, 120: 1.980}
+
+
+@dataclasses.dataclass
+class SweepSpec:
+    """A parameter grid swept with `replicates` independently seeded runs per grid point."""
+    grid: dict # PARAM -> list of values, e.g. {"LOSS_RATE": [0.01, 0.05], "SN_LENGTH_BITS": [12, 18]}
+    replicates: int = 5
+    base_seed: int = 0
+    base_overrides: dict = dataclasses.field(default_factory=lambda: {"PAYLOAD_FREE": True}) # Applied to every run
+
+    def run_key(self) -> str:
+        """Identifies the settings shared by all runs, so a results file from a different sweep is not resumed."""
+        return json.dumps({"base_seed": self.base_seed, "base_overrides": self.base_overrides}, sort_keys=True)
+
+    def points(self) -> list:
+        names = list(self.grid)
+        return [dict(zip(names, values)) for values in itertools.product(*(self.grid[n] for n in names))]
+
+
+def point_key(point: dict) -> str:
+    """Canonical string for a grid point (used in the results file and to derive seeds)."""
+    return json.dumps(point, sort_keys=True)
+
+
+def run_seed(base_seed: int, point: dict, replicate: int) -> int:
+    """
+    Deterministic seed for one run. Derived from the point's values rather than its position in
+    the grid, so extending the grid later does not change the seeds of points already run.
+    """
+    digest = hashlib.sha256(point_key(point).encode()).digest()
+    words = [int.from_bytes(digest[i:i + 4], "little") for i in range(0, 16, 4)]
+    return int(np.random.SeedSequence([base_seed, *words, replicate]).generate_state(1)[0])
+
+
+def sweep_params(spec: SweepSpec, point: dict, seed: int):
+    """Simulation parameters for one run: config.py defaults + sweep-wide overrides + the grid point."""
+    return simulation_params(SUMMARY_ONLY_OVERRIDES, spec.base_overrides, point, seed=seed)
+
+
+def run_point(spec: SweepSpec, point: dict, replicate: int) -> dict:
+    """Runs one replicate of one grid point and keeps only its summary stats."""
+    seed = run_seed(spec.base_seed, point, replicate)
+    results = run_simulation(sweep_params(spec, point, seed))
+    stats = {k: results["rx_status"][k] for k in SWEEP_METRICS if k in results["rx_status"]}
+    stats["calculated_lost_sdu"] = results["calculated_lost_sdu"]
+    return {
+        "sweep": spec.run_key(),
+        "point": point,
+        "replicate": replicate,
+        "seed": seed,
+        "stats": stats,
+        "channel_stats": dict(results["channel_stats"]),
+        "duration_seconds": results["duration_seconds"],
+    }
+
+
+def load_completed(results_path: str) -> list:
+    """Reads finished runs from a JSON Lines results file. A torn last line (interrupted write) is ignored."""
+    if not results_path or not os.path.exists(results_path):
+        return []
+    completed = []
+    with open(results_path) as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                completed.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(f"Ignoring unreadable line {line_no} in {results_path} (interrupted write?)")
+    return completed
+
+
+def _drop_torn_tail(results_path: str):
+    # An interrupted write can leave a partial last line; cut it off so new runs append cleanly
+    if not results_path or not os.path.exists(results_path):
+        return
+    with open(results_path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def confidence_interval(values: list) -> dict:
+    """Mean, sample std and 95% Student-t confidence interval of the mean."""
+    n = len(values)
+    mean = sum(values) / n if n else float("nan")
+    if n < 2:
+        return {"n": n, "mean": mean, "std": 0.0, "ci95_low": mean, "ci95_high": mean}
+    std = math.sqrt(sum((v - mean) ** 2 for v in values) / (n - 1))
+    df = n - 1
+    # Largest tabulated df not above ours: slightly conservative between table entries
+    t = 1.96 if df > max(_T_95) else _T_95[max(d for d in _T_95 if d <= df)]
+    half_width = t * std / math.sqrt(n)
+    return {"n": n, "mean": mean, "std": std, "ci95_low": mean - half_width, "ci95_high": mean + half_width}
+
+
+def aggregate_sweep(runs: list) -> list:
+    """Groups runs by grid point and summarizes every metric across replicates."""
+    by_point = {}
+    for run in runs:
+        by_point.setdefault(point_key(run["point"]), []).append(run)
+    summary = []
+    for key in sorted(by_point):
+        point_runs = sorted(by_point[key], key=lambda r: r["replicate"])
+        summary.append({
+            "point": point_runs[0]["point"],
+            "replicates": len(point_runs),
+            "metrics": {m: confidence_interval([r["stats"][m] for r in point_runs]) for m in SWEEP_METRICS},
+        })
+    return summary
+
+
+def run_sweep(spec: SweepSpec, results_path: str = None, workers: int = None, log_level: str = "ERROR") -> dict:
+    """
+    Runs every (grid point, replicate) of `spec` on a process pool and returns the aggregated
+    summary. Each finished run is appended to `results_path` (JSON Lines) as soon as it
+    completes; runs already in that file are not redone, so an interrupted sweep resumes
+    where it stopped.
+    """
+    completed = [r for r in load_completed(results_path)
+                 if r.get("sweep") == spec.run_key() and r["replicate"] < spec.replicates]
+    done = {(point_key(r["point"]), r["replicate"]) for r in completed}
+    todo = [(point, rep) for point in spec.points() for rep in range(spec.replicates)
+            if (point_key(point), rep) not in done]
+    workers = workers or os.cpu_count() or 1
+    logger.info(f"Sweep: {len(spec.points())} points x {spec.replicates} replicates, {len(done)} already done, {len(todo)} to run on {workers} workers")
+
+    start_time = time.time()
+    new_runs = []
+    _drop_torn_tail(results_path)
+    out = open(results_path, "a") if results_path else None
+    try:
+        def record(run):
+            new_runs.append(run)
+            if out:
+                out.write(json.dumps(run) + "\n")
+                out.flush()
+
+        if workers == 1:
+            init_worker(log_level)
+            for point, rep in todo:
+                record(run_point(spec, point, rep))
+        elif todo:
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(log_level,)) as pool:
+                futures = [pool.submit(run_point, spec, point, rep) for point, rep in todo]
+                for future in as_completed(futures):
+                    record(future.result())
+    finally:
+        if out:
+            out.close()
+    wall_seconds = time.time() - start_time
+
+    return {
+        "points": aggregate_sweep(completed + new_runs),
+        "run": {"workers": workers, "runs_resumed": len(completed), "runs_executed": len(new_runs),
+                "wall_seconds": wall_seconds},
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Monte Carlo parameter sweep of the PDCP simulation")
+    parser.add_argument("--grid", type=str, required=True,
+                        help='JSON (or path to a JSON file): {"LOSS_RATE": [0.01, 0.05], "SN_LENGTH_BITS": [12, 18]}')
+    parser.add_argument("--replicates", type=int, default=5)
+    parser.add_argument("--packets", type=int, default=None, help="SDUs per run (default: config.SIMULATION_PACKETS)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--results", type=str, default=os.path.join("data", "sweep_runs.jsonl"),
+                        help="Per-run JSON Lines file; re-running with the same file resumes the sweep")
+    parser.add_argument("--output", type=str, default=None, help="Write the aggregated summary JSON here")
+    args = parser.parse_args()
+
+    setup_logging(config.LOG_LEVEL)
+    if os.path.exists(args.grid):
+        with open(args.grid) as f:
+            grid = json.load(f)
+    else:
+        grid = json.loads(args.grid)
+    spec = SweepSpec(grid=grid, replicates=args.replicates, base_seed=args.seed)
+    if args.packets is not None:
+        spec.base_overrides["SIMULATION_PACKETS"] = args.packets
+
+    results_dir = os.path.dirname(args.results)
+    if results_dir and not os.path.exists(results_dir):
+        os.makedirs(results_dir)
+    summary = run_sweep(spec, results_path=args.results, workers=args.workers)
+    for entry in summary["points"]:
+        delivered = entry["metrics"]["delivered_sdu_count"]
+        logger.info(f"{entry['point']}: delivered {delivered['mean']:.1f} (95% CI {delivered['ci95_low']:.1f}..{delivered['ci95_high']:.1f}, n={delivered['n']})")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f)
+        logger.info(f"Sweep summary saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main_cli()
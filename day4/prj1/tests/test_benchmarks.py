@@ -0,0 +1,36 @@
+import copy
+import unittest
+from benchmarks.bench_pdcp import PROFILES, run_benchmarks, compare_to_baseline
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def setUp(self):
+        profiles = [p for p in PROFILES if p.name in ("clean_sn12", "count_wrap_sn18")]
+        self.results = run_benchmarks(profiles, packets=2000, repeat=1)
+
+    def test_profiles_measured(self):
+        clean = self.results["results"]["clean_sn12"]
+        self.assertEqual(clean["delivered"], 2000)
+        for rate in clean["throughput_pdus_per_s"].values():
+            self.assertGreater(rate, 0)
+        wrap = self.results["results"]["count_wrap_sn18"]
+        self.assertGreater(wrap["delivered"], 0.9 * wrap["arrivals"]) # Delivery keeps going across the COUNT wrap
+
+    def test_compare_to_baseline(self):
+        self.assertEqual(compare_to_baseline(self.results, self.results), [])
+        slower = copy.deepcopy(self.results)
+        slower["results"]["clean_sn12"]["throughput_pdus_per_s"]["receive_pdu"] *= 0.5
+        slower["results"]["count_wrap_sn18"]["receive_peak_memory_bytes"] = 10 * self.results["results"]["count_wrap_sn18"]["receive_peak_memory_bytes"] + 1
+        regressions = compare_to_baseline(slower, self.results, tolerance=0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("clean_sn12.receive_pdu"))
+        self.assertTrue(regressions[1].startswith("count_wrap_sn18.receive_peak_memory"))
+        # Within tolerance, and profiles only in one of the files, are not regressions
+        self.assertEqual(compare_to_baseline(slower, self.results, tolerance=100), [])
+        del slower["results"]["clean_sn12"]
+        self.assertEqual(len(compare_to_baseline(slower, self.results, tolerance=0.2)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from cell_simulation import PopulationSpec, run_cell_simulation, run_bearer, bearer_params
+from main import run_simulation
+
+
+def _without_timing(result):
+    return {k: v for k, v in result.items() if k != "duration_seconds"}
+
+
+class TestCellSimulation(unittest.TestCase):
+
+    def setUp(self):
+        self.population = PopulationSpec(num_ues=3, bearers_per_ue=2, packets_per_bearer=300, base_seed=7)
+
+    def test_sharded_bearers_match_single_bearer_runs(self):
+        report = run_cell_simulation(self.population, workers=2)
+        self.assertEqual(report["run"]["num_bearers"], 6)
+
+        expected = {(b.ue_id, b.bearer_id): _without_timing(run_bearer(b)) for b in self.population.bearers()}
+        for result in report["bearers"]:
+            self.assertEqual(_without_timing(result), expected[(result["ue_id"], result["bearer_id"])])
+
+    def test_cell_totals_are_sums_of_bearers(self):
+        report = run_cell_simulation(self.population, workers=1)
+        cell = report["cell"]
+        self.assertEqual(cell["bearers"], 6)
+        self.assertEqual(cell["total_sdu_sent"], 6 * 300)
+        self.assertEqual(cell["delivered_sdu_count"],
+                         sum(r["rx_status"]["delivered_sdu_count"] for r in report["bearers"]))
+        self.assertEqual(sum(ue["bearers"] for ue in report["per_ue"].values()), 6)
+        # Clean profile bearers lose nothing
+        self.assertEqual(report["per_profile"]["clean"]["calculated_lost_sdu"], 0)
+
+    def test_seeds_are_independent_of_worker_count(self):
+        one = run_cell_simulation(self.population, workers=1)
+        three = run_cell_simulation(self.population, workers=3)
+        self.assertEqual([_without_timing(r) for r in one["bearers"]],
+                         [_without_timing(r) for r in three["bearers"]])
+
+    def test_bearers_skip_plot_sampling(self):
+        bearer = self.population.bearers()[0]
+        params = bearer_params(bearer)
+        self.assertEqual(params.PLOT_MAX_POINTS, 0)
+        self.assertEqual(params.SIMULATION_PACKETS, 300) # Bearer overrides still applied on top
+        self.assertEqual(len(run_simulation(params)["plot_data"]["time"]), 2) # First and last SDU only
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+import logging
+import numpy as np
+from src.pdcp_entity import PDCPTransmitter, PDCPReceiver, RX_ACCEPTED, RX_DUPLICATE, RX_OLD
+from src.channel_simulator import ImpairedChannel
+from src.pdcp_packet import PDCP_PDU
+import main as sim_main
+from cell_simulation import simulation_params
+from count_scenarios import CountRegion, regions_of_interest, run_count_scenario
+
+WRAP = 2**32
+
+
+def _params(**overrides):
+    return simulation_params({"PAYLOAD_FREE": True}, overrides, seed=4)
+
+
+class TestCountWrap(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def _pdu(self, count, sn_length=12):
+        return PDCP_PDU(sdu_id=count, sn=count % 2**sn_length, count=count, hfn=count >> sn_length)
+
+    def test_clean_run_across_wrap(self):
+        for sn_length in (12, 18):
+            tx = PDCPTransmitter(sn_length, initial_count=WRAP - 100)
+            rx = PDCPReceiver(sn_length, t_reordering_threshold=10, initial_count=WRAP - 100)
+            for i in range(200):
+                rx.receive_pdu(tx.send_sdu(i))
+            self.assertEqual(tx.tx_next, 100)
+            self.assertEqual((rx.rx_deliv, rx.rx_next), (100, 100))
+            self.assertEqual(len(rx.delivered_sdu_ids), 200)
+
+    def test_reordering_around_last_count(self):
+        rx = PDCPReceiver(12, t_reordering_threshold=10, initial_count=WRAP - 2)
+        outcomes = [rx.receive_pdu(self._pdu(c)) for c in (WRAP - 2, 0, WRAP - 1, 1)]
+        self.assertEqual(outcomes, [RX_ACCEPTED] * 4)
+        self.assertEqual(rx.rx_next, 2) # Not stuck at 2**32 - 1
+        self.assertEqual((rx.rx_deliv, len(rx.delivered_sdu_ids), rx.discarded_old_count), (2, 4, 0))
+
+    def test_late_pdus_from_before_wrap(self):
+        rx = PDCPReceiver(12, t_reordering_threshold=10, initial_count=WRAP - 2)
+        for count in (WRAP - 2, WRAP - 1, 0, 1, 2):
+            rx.receive_pdu(self._pdu(count))
+        self.assertEqual(rx.receive_pdu(self._pdu(WRAP - 1)), RX_DUPLICATE)
+        self.assertEqual(rx.receive_pdu(self._pdu(WRAP - 50)), RX_OLD) # HFN derives to -1: before the wrap, not invalid
+
+    def test_t_reordering_expiry_across_wrap(self):
+        rx = PDCPReceiver(12, t_reordering_threshold=3, initial_count=WRAP - 3)
+        for count in (WRAP - 3, 0, 1, 2, 3, 4): # COUNT 2**32 - 2 and 2**32 - 1 lost
+            rx.receive_pdu(self._pdu(count))
+        self.assertEqual(rx.out_of_order_deliveries, 1)
+        self.assertEqual((rx.rx_deliv, rx.rx_next), (5, 5))
+        self.assertEqual(len(rx.delivered_sdu_ids), 6)
+
+    def _receive_all(self, sn_length, initial_count):
+        # Same seeded channel decisions for any starting COUNT
+        tx = PDCPTransmitter(sn_length, initial_count=initial_count)
+        channel = ImpairedChannel(0.02, 0.3, 0.05, 0.01, seed=8)
+        arrivals = []
+        for i in range(0, 6000, 8):
+            arrivals.extend(channel.transmit([tx.send_sdu(j) for j in range(i, i + 8)]))
+        scalar = PDCPReceiver(sn_length, t_reordering_threshold=16, initial_count=initial_count)
+        batch = PDCPReceiver(sn_length, t_reordering_threshold=16, initial_count=initial_count)
+        for pdu in arrivals:
+            scalar.receive_pdu(pdu)
+        batch.receive_batch(np.array([p.sn for p in arrivals]), corrupted_mask=np.array([p.is_corrupted for p in arrivals]),
+                            sdu_ids=np.array([p.sdu_id for p in arrivals]))
+        return scalar.get_status(), batch.get_status()
+
+    def test_wrap_behaves_like_count_zero(self):
+        counters = ["delivered_sdu_count", "buffered_pdu_count", "discarded_duplicates", "discarded_old",
+                    "discarded_corrupted", "out_of_order_deliveries"]
+        for sn_length in (12, 18):
+            reference, _ = self._receive_all(sn_length, 0)
+            scalar, batch = self._receive_all(sn_length, WRAP - 3000)
+            self.assertEqual(batch, scalar)
+            self.assertEqual({k: scalar[k] for k in counters}, {k: reference[k] for k in counters})
+            self.assertEqual(scalar["rx_deliv"], (reference["rx_deliv"] - 3000) % WRAP)
+            self.assertEqual(scalar["rx_next"], (reference["rx_next"] - 3000) % WRAP)
+
+    def test_fast_forward_drops_buffer(self):
+        rx = PDCPReceiver(12, t_reordering_threshold=10)
+        rx.receive_pdu(self._pdu(1)) # Buffered behind the missing COUNT 0
+        rx.fast_forward(WRAP - 1)
+        self.assertEqual((rx.rx_deliv, rx.rx_next, len(rx.reordering_buffer)), (WRAP - 1, WRAP - 1, 0))
+        self.assertFalse(rx.t_reordering_timer_active)
+        self.assertEqual(rx.receive_pdu(self._pdu(WRAP - 1)), RX_ACCEPTED)
+        self.assertEqual(rx.rx_deliv, 0)
+
+    def test_run_simulation_initial_count(self):
+        reference = sim_main.run_simulation(_params(SIMULATION_PACKETS=3000))
+        results = sim_main.run_simulation(_params(SIMULATION_PACKETS=3000, INITIAL_COUNT=WRAP - 1500))
+        self.assertEqual(results["tx_status"]["tx_next_final"], 1500)
+        self.assertEqual(results["rx_status"]["rx_deliv"], (reference["rx_status"]["rx_deliv"] - 1500) % WRAP)
+        self.assertEqual(results["calculated_lost_sdu"], reference["calculated_lost_sdu"])
+        self.assertEqual(results["rx_status"]["discarded_old"], reference["rx_status"]["discarded_old"])
+
+
+class TestCountScenario(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def test_regions_of_interest(self):
+        params = _params(LOSS_RATE=0.0, REORDERING_RATE=0.3, DUPLICATION_RATE=0.1, CORRUPTION_RATE=0.0)
+        results = run_count_scenario(params, regions_of_interest(12, sdus_per_region=2000))
+        self.assertEqual([r["label"] for r in results["regions"]], ["session_start", "first_hfn_increment", "count_bit31", "count_wrap"])
+        for region in results["regions"]:
+            self.assertEqual(region["delivered_sdu_count"], 2000, region["label"])
+            self.assertEqual(region["discarded_old"], 0, region["label"])
+            self.assertEqual(region["rx_deliv"], region["end_count"], region["label"])
+        self.assertTrue(results["regions"][-1]["crosses_count_wrap"])
+        self.assertEqual(results["rx_status"]["delivered_sdu_count"], 8000)
+
+    def test_custom_regions_jump_backwards(self):
+        results = run_count_scenario(_params(LOSS_RATE=0.0, REORDERING_RATE=0.0, DUPLICATION_RATE=0.0, CORRUPTION_RATE=0.0),
+                                     [CountRegion(WRAP - 10, 20, "wrap"), CountRegion(5, 10, "restart")])
+        self.assertEqual([r["end_count"] for r in results["regions"]], [10, 15])
+        self.assertEqual(results["rx_status"]["rx_deliv"], 15)
+        self.assertEqual(results["rx_status"]["delivered_sdu_count"], 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
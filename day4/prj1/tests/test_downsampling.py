@@ -0,0 +1,47 @@
+import unittest
+import main as sim_main
+from cell_simulation import simulation_params
+from downsampling import MinMaxDownsampler
+
+
+def _feed(downsampler, values):
+    for t, v in enumerate(values):
+        downsampler.append(time=t, buffer_size=v)
+
+
+class TestMinMaxDownsampler(unittest.TestCase):
+
+    def test_short_stream_kept_exactly(self):
+        downsampler = MinMaxDownsampler(max_points=100)
+        _feed(downsampler, [3, 1, 4, 1, 5])
+        self.assertEqual(downsampler.data(), {"time": [0, 1, 2, 3, 4], "buffer_size": [3, 1, 4, 1, 5]})
+
+    def test_spikes_survive_and_output_is_bounded(self):
+        values = [10] * 200000
+        values[123457] = 999 # One-sample spike
+        values[54321] = 0    # One-sample dip
+        downsampler = MinMaxDownsampler(max_points=200)
+        _feed(downsampler, values)
+
+        data = downsampler.data()
+        self.assertLessEqual(len(data["time"]), 200)
+        self.assertIn(999, data["buffer_size"])
+        self.assertIn(0, data["buffer_size"])
+        self.assertEqual(data["time"], sorted(data["time"]))
+        self.assertEqual(data["time"][-1], len(values) - 1)
+        self.assertLessEqual(len(downsampler._buckets), 200 // 2) # Memory bounded by max_points
+
+    def test_run_simulation_keeps_buffer_peak(self):
+        params = simulation_params({"SIMULATION_PACKETS": 20000, "LOSS_RATE": 0.02,
+                                    "PLOT_MAX_POINTS": 0, "PLOT_GRANULARITY": 1}, seed=4)
+        full = sim_main.run_simulation(params)["plot_data"]
+        params.PLOT_MAX_POINTS = 100
+        reduced = sim_main.run_simulation(params)["plot_data"]
+
+        self.assertLessEqual(len(reduced["time"]), 100)
+        self.assertEqual(max(reduced["buffer_size"]), max(full["buffer_size"]))
+        self.assertEqual(reduced["rx_deliv"][-1], full["rx_deliv"][-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import threading
+import time
+import unittest
+import main as sim_main
+import json
+from cell_simulation import simulation_params
+from jobs import JobManager, QueueFullError, JOB_DONE, JOB_FAILED, JOB_CANCELLED
+
+
+def _params(**overrides):
+    return simulation_params({"LOG_LEVEL": "ERROR"}, overrides, seed=overrides["SEED"])
+
+
+def _wait(manager, job_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.status(job_id)
+        if job is None or job["status"] in (JOB_DONE, JOB_FAILED, JOB_CANCELLED): # None: finished and already evicted
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+class TestJobManager(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = JobManager(max_workers=2, max_pending=4, max_finished=3)
+
+    def tearDown(self):
+        self.manager.shutdown()
+
+    def test_concurrent_runs_keep_separate_plot_data(self):
+        small = _params(SIMULATION_PACKETS=500, SEED=1, PLOT_GRANULARITY=1, PLOT_MAX_POINTS=0)
+        large = _params(SIMULATION_PACKETS=3000, SEED=2, PLOT_GRANULARITY=1, PLOT_MAX_POINTS=0)
+        ids = [self.manager.submit(sim_main.run_simulation, p) for p in (small, large)]
+        jobs = [_wait(self.manager, job_id) for job_id in ids]
+
+        self.assertEqual([j["status"] for j in jobs], [JOB_DONE, JOB_DONE])
+        self.assertEqual(len(jobs[0]["result"]["plot_data"]["time"]), 500)
+        self.assertEqual(len(jobs[1]["result"]["plot_data"]["time"]), 3000)
+        self.assertEqual(jobs[1]["progress"], 1.0)
+        self.assertEqual(jobs[1]["result"]["rx_status"], sim_main.run_simulation(large)["rx_status"])
+
+    def test_failure_and_bounded_queue(self):
+        release = threading.Event()
+
+        def blocked(progress_callback=None):
+            release.wait(10)
+
+        def broken(progress_callback=None):
+            raise ValueError("bad parameters")
+
+        blockers = [self.manager.submit(blocked) for _ in range(4)]
+        with self.assertRaises(QueueFullError):
+            self.manager.submit(blocked)
+        self.assertEqual(self.manager.status(blockers[-1])["status"], "queued")
+        release.set()
+        for job_id in blockers:
+            _wait(self.manager, job_id)
+
+        job = _wait(self.manager, self.manager.submit(broken))
+        self.assertEqual(job["status"], JOB_FAILED)
+        self.assertIn("bad parameters", job["error"])
+        # Only the 3 most recent finished jobs are retained
+        self.assertEqual(len(self.manager.list_jobs()), 3)
+        self.assertIsNone(self.manager.status(blockers[0]))
+
+    def test_progress_events_and_cancel(self):
+        job_id = self.manager.submit(sim_main.run_simulation, _params(SIMULATION_PACKETS=5000, SEED=3))
+        job = _wait(self.manager, job_id)
+        events = self.manager.progress_events(job_id)
+        self.assertEqual(job["status"], JOB_DONE)
+        self.assertEqual([e["seq"] for e in events], list(range(len(events))))
+        self.assertEqual(events[-1]["time"], 5000)
+        self.assertEqual(events[-1]["delivered_sdu_count"], job["result"]["rx_status"]["delivered_sdu_count"])
+
+        long_run = self.manager.submit(sim_main.run_simulation, _params(SIMULATION_PACKETS=10**7, SEED=3))
+        while not self.manager.progress_events(long_run):
+            time.sleep(0.01)
+        self.assertTrue(self.manager.cancel(long_run))
+        job = _wait(self.manager, long_run)
+        self.assertEqual(job["status"], JOB_CANCELLED)
+        self.assertLess(job["sdus_done"], 10**7)
+        self.assertFalse(self.manager.cancel(long_run)) # Already finished
+
+
+class TestJobEventStream(unittest.TestCase):
+
+    def test_sse_stream_ends_with_result(self):
+        import app as web_app
+        client = web_app.app.test_client()
+        submitted = client.post('/run_simulation', data={"simulation_packets": "3000", "seed": ""}).json
+        body = client.get(submitted["events_url"]).get_data(as_text=True)
+
+        events = []
+        for message in body.strip().split("\n\n"):
+            fields = dict(line.split(": ", 1) for line in message.split("\n") if not line.startswith(":"))
+            events.append((fields["event"], json.loads(fields["data"])))
+        names = [name for name, _ in events]
+        self.assertEqual(names[-1], "done")
+        self.assertGreater(names.count("progress"), 10)
+        self.assertIn("metrics", events[-1][1]["result"])
+        progress_times = [data["time"] for name, data in events if name == "progress"]
+        self.assertEqual(progress_times, sorted(progress_times))
+        self.assertEqual(client.post(submitted["cancel_url"]).status_code, 409) # Finished jobs cannot be cancelled
+
+    def test_shared_job_cancelled_by_last_requester(self):
+        import app as web_app
+        client = web_app.app.test_client()
+        form = {"simulation_packets": "2000000", "seed": str(time.time_ns() % 2**31)} # Seeded: identical requests share a job
+        first = client.post('/run_simulation', data=form).json
+        second = client.post('/run_simulation', data=form).json
+        self.assertEqual(first["job_id"], second["job_id"])
+
+        response = client.post(first["cancel_url"]).json
+        self.assertEqual((response["cancelled"], response["requesters"]), (False, 1))
+        self.assertFalse(web_app.job_manager.status(first["job_id"])["cancel_requested"])
+        self.assertTrue(client.post(second["cancel_url"]).json["cancelled"])
+        self.assertEqual(_wait(web_app.job_manager, first["job_id"])["status"], JOB_CANCELLED)
+
+        # A new identical request starts a fresh run instead of joining the cancelled one
+        third = client.post('/run_simulation', data=form).json
+        self.assertNotEqual(third["job_id"], first["job_id"])
+        client.post(third["cancel_url"])
+        _wait(web_app.job_manager, third["job_id"])
+
+    def test_non_integer_last_event_id(self):
+        import app as web_app
+        client = web_app.app.test_client()
+        submitted = client.post('/run_simulation', data={"simulation_packets": "1000", "seed": ""}).json
+        self.assertEqual(client.get(submitted["events_url"], headers={"Last-Event-ID": "abc"}).status_code, 400)
+        self.assertEqual(client.get(submitted["events_url"] + "?last_seq=x").status_code, 400)
+        _wait(web_app.job_manager, submitted["job_id"])
+
+
+if __name__ == '__main__':
+    unittest.main()
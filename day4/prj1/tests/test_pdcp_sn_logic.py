@@ -1,5 +1,9 @@
 import unittest
+import numpy as np
 from src.pdcp_entity import PDCPReceiver
+from src.duplicate_detector import DuplicateDetector
+from src.reordering_buffer import ReorderingBuffer
+from src.sdu_id_set import SduIdSet
 
 class TestPDCPReceiverHFNCalculation(unittest.TestCase):
 
@@ -114,5 +118,127 @@ class TestPDCPReceiverHFNCalculation(unittest.TestCase):
         self.receiver_18bit.rx_deliv = rx_deliv_val # reset rx_deliv for next sub-test
         self._test_hfn_calc(self.receiver_18bit, rx_deliv_val, rcvd_sn_val=self.max_18bit_sn - 500, expected_hfn_offset=-1)
 
+
+class TestPDCPReceiverHFNCalculationBatch(TestPDCPReceiverHFNCalculation):
+    """Runs every HFN case above through the vectorized receive_batch() derivation."""
+
+    def _test_hfn_calc(self, receiver, rx_deliv_val, rcvd_sn_val, expected_hfn_offset):
+        receiver.rx_deliv = rx_deliv_val
+        hfn_rx_deliv = rx_deliv_val >> receiver.sn_length
+
+        derived_hfn = int(receiver._calculate_hfn_batch([rcvd_sn_val])[0])
+        expected_full_hfn = hfn_rx_deliv + expected_hfn_offset
+        self.assertEqual(derived_hfn, expected_full_hfn,
+                         f"RX_DELIV={rx_deliv_val}, Rcvd SN={rcvd_sn_val}. "
+                         f"Expected HFN {expected_full_hfn}, Got {derived_hfn} (batch)")
+        # The batch result must agree with the scalar path for the same state
+        self.assertEqual(derived_hfn, receiver._calculate_hfn_from_rcvd_sn(rcvd_sn_val))
+
+class TestDuplicateDetector(unittest.TestCase):
+
+    def test_window_slides_with_rx_deliv(self):
+        detector = DuplicateDetector(window_size=2**11)
+        for count in range(100):
+            detector.add(count)
+        detector.advance(100)
+        self.assertIn(0, detector)   # Still within RX_DELIV - Window_Size
+        self.assertIn(99, detector)
+        self.assertNotIn(100, detector)
+
+        detector.advance(2**11 + 10) # COUNTs 0..9 fall out of the window
+        for count in range(10):
+            self.assertNotIn(count, detector)
+        self.assertIn(10, detector)
+        # The slots of the expired COUNTs are reused for COUNTs entering at the top
+        self.assertNotIn(2**12, detector)
+
+    def test_safe_across_32bit_count_wrap(self):
+        detector = DuplicateDetector(window_size=2**11, anchor=2**32 - 5)
+        for count in [2**32 - 5, 2**32 - 1, 0, 3]:
+            detector.add(count)
+        detector.advance(4)
+        for count in [2**32 - 5, 2**32 - 1, 0, 3]:
+            self.assertIn(count, detector)
+        self.assertNotIn(2**32 - 4, detector)
+        self.assertNotIn(1, detector)
+
+    def test_memory_stays_flat(self):
+        receiver = PDCPReceiver(sn_length=12, t_reordering_threshold=10)
+        size_before = receiver.duplicate_detector.nbytes
+        num_packets = 5 * 2**12
+        receiver.receive_batch([count % 2**12 for count in range(num_packets)])
+        self.assertEqual(receiver.duplicate_detector.nbytes, size_before)
+        self.assertEqual(len(receiver.delivered_sdu_ids), num_packets)
+        # A duplicate of a recently delivered PDU is still recognised
+        receiver.receive_batch([(num_packets - 1) % 2**12])
+        self.assertEqual(receiver.discarded_duplicates_count, 1)
+
+class TestReorderingBuffer(unittest.TestCase):
+
+    def test_ordered_drain_and_next_present(self):
+        buffer = ReorderingBuffer(capacity=2**11)
+        for count in [1500, 1003, 1200, 1001]:
+            buffer[count] = f"sdu_{count}"
+        self.assertEqual(len(buffer), 4)
+        self.assertEqual(buffer.next_present(1000), 1001)
+        self.assertEqual(buffer.next_present(1002, 1003), None)
+        self.assertEqual(buffer.keys(1000, limit=3), [1001, 1003, 1200])
+
+        drained = list(buffer.drain(1000, 1300))
+        self.assertEqual(drained, [(1001, "sdu_1001"), (1003, "sdu_1003"), (1200, "sdu_1200")])
+        self.assertNotIn(1200, buffer)
+        self.assertEqual(buffer.pop(1500), "sdu_1500")
+        self.assertEqual(len(buffer), 0)
+        self.assertIsNone(buffer.next_present(0))
+
+    def test_ring_wraps_with_count(self):
+        buffer = ReorderingBuffer(capacity=2**11)
+        rx_deliv = 2**32 - 10
+        for count in [2**32 - 3, 5, 2**32 - 9]:
+            buffer[count] = count
+        self.assertEqual(buffer.keys(rx_deliv), [2**32 - 9, 2**32 - 3, 5])
+        self.assertEqual([c for c, _ in buffer.drain(rx_deliv, 6)], [2**32 - 9, 2**32 - 3, 5])
+
+    def test_collision_outside_window_rejected(self):
+        buffer = ReorderingBuffer(capacity=2**11)
+        buffer[10] = "a"
+        with self.assertRaises(ValueError):
+            buffer[10 + 2**11] = "b"
+        with self.assertRaises(KeyError):
+            buffer.pop(11)
+
+class TestSduIdSet(unittest.TestCase):
+
+    def test_behaves_like_a_set(self):
+        ids = [5, 0, 70000, 5, 2**32 - 1, 65535, 65536]
+        sdu_ids = SduIdSet(ids)
+        self.assertEqual(len(sdu_ids), len(set(ids)))
+        self.assertEqual(list(sdu_ids), sorted(set(ids)))
+        self.assertEqual(sdu_ids, set(ids))
+        self.assertEqual(sdu_ids, SduIdSet(reversed(ids)))
+        self.assertNotEqual(sdu_ids, {5, 0})
+        self.assertIn(2**32 - 1, sdu_ids)
+        self.assertNotIn(6, sdu_ids)
+        self.assertNotIn(-1, sdu_ids)
+        with self.assertRaises(ValueError):
+            sdu_ids.add(-1)
+
+    def test_numpy_ints_added_and_found(self):
+        sdu_ids = SduIdSet(np.array([3, 70000], dtype=np.int64))
+        sdu_ids.add(np.uint32(2**32 - 1))
+        self.assertEqual(list(sdu_ids), [3, 70000, 2**32 - 1])
+        self.assertIn(np.int64(70000), sdu_ids)
+        self.assertIn(3, sdu_ids)
+        self.assertNotIn(np.int32(4), sdu_ids)
+        self.assertNotIn(3.0, sdu_ids)
+        self.assertNotIn("3", sdu_ids)
+        with self.assertRaises(TypeError):
+            sdu_ids.add(3.0)
+
+    def test_pages_allocated_on_demand(self):
+        sdu_ids = SduIdSet(range(100000))
+        self.assertEqual(len(sdu_ids), 100000)
+        self.assertEqual(sdu_ids.nbytes, 2 * 8192)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
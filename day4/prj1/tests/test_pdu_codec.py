@@ -0,0 +1,131 @@
+import os
+import tempfile
+import time
+import unittest
+import logging
+from unittest import mock
+import numpy as np
+from src.pdcp_entity import PDCPTransmitter, PDCPReceiver, RX_ACCEPTED, RX_CONTROL
+from src.channel_simulator import ImpairedChannel
+from src.pdu_codec import PDUCodec
+from pdu_trace import TraceWriter
+import main as sim_main
+from cell_simulation import simulation_params
+
+
+class TestPDUCodec(unittest.TestCase):
+
+    def test_header_layout(self):
+        # D/C = 1, reserved bits 0, SN big-endian in the low bits
+        self.assertEqual(PDUCodec(12).encode(0xABC, b"xy"), bytes([0x8A, 0xBC]) + b"xy")
+        self.assertEqual(PDUCodec(18).encode(0x2BCDE, b""), bytes([0x82, 0xBC, 0xDE]))
+        is_data, sn, payload = PDUCodec(18).decode(bytes([0x03, 0xFF, 0xFF, 0x01]))
+        self.assertEqual((is_data, sn, bytes(payload)), (False, 2**18 - 1, b"\x01"))
+        with self.assertRaises(ValueError):
+            PDUCodec(12).encode(4096)
+
+    def test_batch_round_trip_fixed_size(self):
+        for sn_length in (12, 18):
+            codec = PDUCodec(sn_length)
+            sns = np.random.default_rng(sn_length).integers(0, 2**sn_length, size=500)
+            payloads = np.random.default_rng(1).integers(0, 256, size=(500, 33), dtype=np.uint8)
+            buffer, lengths = codec.encode_batch(sns, payloads)
+            self.assertEqual(len(buffer), 500 * (codec.header_size + 33))
+            pdu_size = codec.header_size + 33
+            self.assertEqual(bytes(buffer[pdu_size:2 * pdu_size]), codec.encode(int(sns[1]), payloads[1].tobytes()))
+            decoded = codec.decode_batch(buffer, lengths)
+            np.testing.assert_array_equal(decoded.sns, sns)
+            self.assertTrue(decoded.is_data.all())
+            for i in (0, 250, 499):
+                self.assertEqual(bytes(decoded.payload(i)), payloads[i].tobytes())
+
+    def test_batch_round_trip_ragged_and_scalar_equivalence(self):
+        codec = PDUCodec(12)
+        payloads = [bytes(range(i % 7)) for i in range(100)]
+        sns = np.arange(100) * 41 % 4096
+        buffer, lengths = codec.encode_batch(sns, payloads)
+        self.assertEqual(bytes(buffer), b"".join(codec.encode(int(s), p) for s, p in zip(sns, payloads)))
+        decoded = codec.decode_batch(bytes(buffer), lengths)
+        self.assertEqual([bytes(p) for p in decoded.payloads()], payloads)
+
+    def test_decode_is_zero_copy(self):
+        codec = PDUCodec(12)
+        buffer = bytearray(codec.encode(5, b"abc") + codec.encode(6, b"de"))
+        decoded = codec.decode_batch(buffer, [5, 4])
+        buffer[-1] = ord("z") # Views see later writes to the buffer
+        self.assertEqual(bytes(decoded.payload(1)), b"dz")
+
+    def test_decode_rejects_bad_framing(self):
+        codec = PDUCodec(18)
+        with self.assertRaises(ValueError):
+            codec.decode_batch(bytes(10), [2, 3]) # Shorter than the 3-byte header
+        with self.assertRaises(ValueError):
+            codec.decode_batch(bytes(5), [3, 3])
+
+    def test_reuses_preallocated_buffer(self):
+        codec = PDUCodec(12)
+        out = bytearray(64)
+        buffer, _ = codec.encode_batch([1, 2], payload_size=3, out=out)
+        self.assertEqual(bytes(out[:10]), bytes(buffer))
+        with self.assertRaises(ValueError):
+            codec.encode_batch(range(20), payload_size=3, out=out)
+
+
+class TestReceiveEncoded(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def test_matches_receive_batch(self):
+        for sn_length in (12, 18):
+            tx = PDCPTransmitter(sn_length)
+            counts, sns = tx.send_batch(20000)
+            channel = ImpairedChannel(0.02, 0.1, 0.05, 0.01, seed=3)
+            indices, corrupted, arrivals = channel.transmit_batch(len(sns))
+            reference = PDCPReceiver(sn_length, t_reordering_threshold=16)
+            reference.receive_batch(sns[indices], corrupted_mask=corrupted, sdu_ids=counts[indices])
+            rx = PDCPReceiver(sn_length, t_reordering_threshold=16)
+            buffer, lengths = PDUCodec(sn_length).encode_batch(sns[indices], payload_size=8)
+            rx.receive_encoded(buffer, lengths, corrupted_mask=corrupted, sdu_ids=counts[indices])
+            self.assertEqual(rx.get_status(), reference.get_status())
+
+    def test_control_pdus_skipped(self):
+        codec = PDUCodec(12)
+        buffer = codec.encode(0, b"a") + bytes([0x00, 0x00]) + codec.encode(1, b"b") # Middle one: D/C = 0
+        rx = PDCPReceiver(12, t_reordering_threshold=5)
+        outcomes, decoded = rx.receive_encoded(buffer, [3, 2, 3])
+        self.assertEqual(outcomes.tolist(), [RX_ACCEPTED, RX_CONTROL, RX_ACCEPTED])
+        self.assertEqual(rx.rx_deliv, 2)
+        self.assertEqual(bytes(decoded.payload(2)), b"b")
+
+    def test_simulation_with_encoded_pdus(self):
+        params = simulation_params({"SIMULATION_PACKETS": 5000, "PAYLOAD_FREE": True, "BATCH_SIZE": 512}, seed=9)
+        reference = sim_main.run_simulation(params)
+        params.ENCODE_PDUS, params.PDU_PAYLOAD_BYTES, params.STAGE_TIMING = True, 100, True
+        encoded = sim_main.run_simulation(params)
+        self.assertEqual(encoded["rx_status"]["delivered_sdu_count"], reference["rx_status"]["delivered_sdu_count"])
+        self.assertEqual(encoded["rx_status"]["discarded_duplicates"], reference["rx_status"]["discarded_duplicates"])
+        self.assertEqual(encoded["stage_timing"]["encode"]["calls"], 10)
+        self.assertNotIn("trace_write", encoded["stage_timing"])
+
+    def test_encode_and_trace_write_timed_apart_from_channel(self):
+        params = simulation_params({"SIMULATION_PACKETS": 5000, "PAYLOAD_FREE": True, "BATCH_SIZE": 512}, seed=9)
+        params.ENCODE_PDUS, params.PDU_PAYLOAD_BYTES, params.STAGE_TIMING = True, 100, True
+        original_encode_batch = PDUCodec.encode_batch
+        def slow_encode_batch(codec, *args, **kwargs):
+            time.sleep(0.01)
+            return original_encode_batch(codec, *args, **kwargs)
+        with tempfile.TemporaryDirectory() as tmpdir, mock.patch.object(PDUCodec, "encode_batch", slow_encode_batch):
+            writer = TraceWriter(os.path.join(tmpdir, "run.pdcptrace"), params.SN_LENGTH_BITS)
+            timing = sim_main.run_simulation(params, pdu_trace_writer=writer)["stage_timing"]
+            writer.close()
+        self.assertGreaterEqual(timing["encode"]["total_ns"], 10 * 10_000_000)
+        self.assertLess(timing["channel"]["total_ns"], 10 * 10_000_000) # Encoding is not counted twice
+        self.assertEqual(timing["trace_write"]["calls"], 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import os
+import struct
+import tempfile
+import time
+import unittest
+from unittest import mock
+import logging
+import numpy as np
+from src.pdcp_entity import PDCPReceiver
+from src.pdu_codec import PDUCodec
+import main as sim_main
+from cell_simulation import simulation_params
+from pdu_trace import TraceWriter, TraceReader, replay_trace
+
+RX_COUNTERS = ["delivered_sdu_count", "discarded_duplicates", "discarded_old", "discarded_corrupted",
+               "out_of_order_deliveries", "rx_deliv", "rx_next"]
+
+
+class TestPduTrace(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def _simulate(self, fmt, batch_size, **overrides):
+        params = simulation_params({"SIMULATION_PACKETS": 5000, "BATCH_SIZE": batch_size, "PAYLOAD_FREE": batch_size > 0,
+                                    "CORRUPTION_RATE": 0.02}, overrides, seed=6)
+        path = os.path.join(self.tmpdir.name, f"run_{batch_size}.{fmt}")
+        writer = TraceWriter(path, params.SN_LENGTH_BITS, fmt=fmt, payload_bytes=16)
+        results = sim_main.run_simulation(params, pdu_trace_writer=writer)
+        writer.close()
+        return params, path, writer, results
+
+    def _replay(self, path, params, **kwargs):
+        receiver = PDCPReceiver(params.SN_LENGTH_BITS, params.T_REORDERING_THRESHOLD, t_reordering_ms=params.T_REORDERING_MS)
+        with TraceReader(path, sn_length=params.SN_LENGTH_BITS) as reader:
+            summary = replay_trace(reader, receiver, **kwargs)
+        receiver.flush_buffer()
+        return summary, receiver.get_status()
+
+    def test_replay_reproduces_simulation(self):
+        for batch_size in (0, 512):
+            params, path, writer, results = self._simulate("pdcptrace", batch_size, T_REORDERING_MS=2.0)
+            summary, status = self._replay(path, params, max_records=300)
+            self.assertEqual(summary["records"], writer.records_written)
+            self.assertEqual(summary["records"], results["channel_stats"]["total_passed_through"])
+            self.assertEqual({k: status[k] for k in RX_COUNTERS}, {k: results["rx_status"][k] for k in RX_COUNTERS})
+
+    def test_scalar_payloads_written(self):
+        params, path, _, _ = self._simulate("pdcptrace", 0, LOSS_RATE=0.0, REORDERING_RATE=0.0,
+                                            DUPLICATION_RATE=0.0, CORRUPTION_RATE=0.0)
+        with TraceReader(path) as reader:
+            batch = next(reader.batches(10))
+            decoded = PDUCodec(reader.sn_length).decode_batch(batch.buffer, batch.lengths, offsets=batch.offsets)
+            self.assertEqual(bytes(decoded.payload(3)), b"SDU_data_3")
+            self.assertEqual(decoded.sns.tolist(), list(range(10)))
+
+    def test_pcap_round_trip(self):
+        params, path, writer, results = self._simulate("pcap", 512)
+        self.assertEqual(writer.skipped_corrupted, results["channel_stats"]["total_corrupted"])
+        with open(path, "rb") as f:
+            self.assertEqual(struct.unpack("<IHHiIII", f.read(24))[0::6], (0xA1B2C3D4, 147))
+        summary, status = self._replay(path, params)
+        self.assertEqual(status["discarded_corrupted"], 0)
+        self.assertEqual(status["delivered_sdu_count"], results["rx_status"]["delivered_sdu_count"])
+
+    def test_pcap_with_pdu_offset_and_big_endian(self):
+        # Two packets, each with a 4-byte encapsulation header before the PDCP PDU
+        codec = PDUCodec(18)
+        path = os.path.join(self.tmpdir.name, "be.pcap")
+        with open(path, "wb") as f:
+            f.write(struct.pack(">IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, 1))
+            for sn in (0, 1):
+                frame = b"ENCP" + codec.encode(sn, b"payload")
+                f.write(struct.pack(">IIII", 1, 500 * sn, len(frame), len(frame)) + frame)
+        with TraceReader(path, sn_length=18, pdu_offset=4) as reader:
+            batch = next(reader.batches())
+            self.assertEqual(batch.arrival_times.tolist(), [1000.0, 1000.5])
+            receiver = PDCPReceiver(18, 10)
+            receiver.receive_encoded(batch.buffer, batch.lengths, pdu_offsets=batch.offsets)
+            self.assertEqual(receiver.rx_deliv, 2)
+
+    def test_truncated_tail_and_bad_files(self):
+        path = os.path.join(self.tmpdir.name, "t.pdcptrace")
+        writer = TraceWriter(path, 12)
+        writer.write_batch(np.arange(5), np.arange(5) * 1.0)
+        writer.close()
+        with open(path, "ab") as f:
+            f.write(struct.pack("<dIB3x", 9.0, 50, 0) + b"\x80") # Interrupted write: 1 of 50 bytes
+        with TraceReader(path) as reader:
+            self.assertEqual(sum(len(b) for b in reader.batches(2)), 5)
+        with self.assertRaises(ValueError):
+            TraceReader(path, sn_length=18)
+        junk = os.path.join(self.tmpdir.name, "junk.bin")
+        with open(junk, "wb") as f:
+            f.write(b"not a trace at all")
+        with self.assertRaises(ValueError):
+            TraceReader(junk)
+
+    def test_rejected_file_is_closed(self):
+        path = os.path.join(self.tmpdir.name, "t.pdcptrace")
+        writer = TraceWriter(path, 12)
+        writer.write_batch(np.arange(3), np.arange(3) * 1.0)
+        writer.close()
+        pcap = os.path.join(self.tmpdir.name, "t.pcap")
+        with open(pcap, "wb") as f:
+            f.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, 147))
+        opened = []
+        def tracking_open(*args, **kwargs):
+            opened.append(open(*args, **kwargs))
+            return opened[-1]
+        with mock.patch("pdu_trace.open", tracking_open, create=True):
+            for bad, kwargs in ((path, {"sn_length": 18}), (pcap, {})):
+                with self.assertRaises(ValueError):
+                    TraceReader(bad, **kwargs)
+        self.assertEqual(len(opened), 2)
+        self.assertTrue(all(f.closed for f in opened))
+
+    def test_paced_replay_follows_timestamps(self):
+        path = os.path.join(self.tmpdir.name, "paced.pdcptrace")
+        writer = TraceWriter(path, 12)
+        writer.write_batch(np.arange(50), np.arange(50) * 2.0) # 100 ms of traffic
+        writer.close()
+        with TraceReader(path) as reader:
+            start = time.perf_counter()
+            summary = replay_trace(reader, PDCPReceiver(12, 10), paced=True, speed=2.0, max_records=16)
+            elapsed = time.perf_counter() - start
+        self.assertGreaterEqual(elapsed, 0.045) # 98 ms of timestamps at 2x speed
+        self.assertEqual(summary["rx_status"]["delivered_sdu_count"], 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
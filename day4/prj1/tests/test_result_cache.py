@@ -0,0 +1,69 @@
+import os
+import tempfile
+import time
+import types
+import unittest
+from result_cache import ResultCache, cache_key
+
+
+def _params(**values):
+    base = {"SN_LENGTH_BITS": 12, "LOSS_RATE": 0.01, "SEED": 1, "LOG_LEVEL": "INFO"}
+    base.update(values)
+    return types.SimpleNamespace(**base)
+
+
+class TestResultCache(unittest.TestCase):
+
+    def test_cache_key(self):
+        self.assertEqual(cache_key(_params()), cache_key(_params(LOG_LEVEL="ERROR")))
+        self.assertNotEqual(cache_key(_params()), cache_key(_params(SEED=2)))
+        self.assertNotEqual(cache_key(_params()), cache_key(_params(LOSS_RATE=0.02)))
+        self.assertIsNone(cache_key(_params(SEED=None)))
+
+    def test_lru_eviction_by_bytes(self):
+        cache = ResultCache(max_bytes=80) # Room for two 32-byte entries
+        cache.put("a", "x" * 30) # 32 bytes as JSON
+        cache.put("b", "x" * 30)
+        cache.get("a") # b is now least recently used
+        cache.put("c", "x" * 30)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "x" * 30)
+        self.assertEqual(cache.get("c"), "x" * 30)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"], stats["bytes"]), (3, 1, 2, 64))
+
+    def test_persisted_entries_survive_restart(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            ResultCache(persist_dir=cache_dir).put("k", {"metrics": {"delivered_sdu_count": 5}})
+            self.assertEqual(os.listdir(cache_dir), ["k.json"])
+            restarted = ResultCache(persist_dir=cache_dir)
+            self.assertEqual(restarted.get("k"), {"metrics": {"delivered_sdu_count": 5}})
+            restarted.get("k")
+            self.assertEqual((restarted.stats()["disk_hits"], restarted.stats()["hits"]), (1, 1))
+
+
+class TestWebResultCache(unittest.TestCase):
+
+    def test_repeat_request_served_from_cache(self):
+        import app as web_app
+        client = web_app.app.test_client()
+        form = {"simulation_packets": "500", "seed": "123", "loss_rate": "0.02"}
+
+        first = client.post('/run_simulation', data=form)
+        self.assertEqual(first.status_code, 202)
+        deadline = time.time() + 30
+        while client.get(first.json["status_url"]).json["status"] != "done":
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.02)
+        computed = client.get(first.json["status_url"]).json["result"]
+
+        repeat = client.post('/run_simulation', data=form)
+        self.assertEqual(repeat.status_code, 200)
+        self.assertTrue(repeat.json["cached"])
+        self.assertEqual(repeat.json["result"], computed)
+        self.assertGreaterEqual(client.get('/cache/stats').json["hits"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
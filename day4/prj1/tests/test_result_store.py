@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import main as sim_main
+from cell_simulation import simulation_params
+from result_store import ColumnarResultWriter, ColumnarResultReader, ChunkedColumn
+
+
+class TestColumnarResultStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.run_dir = os.path.join(self.tmpdir.name, "run")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_streamed_samples_read_back_memory_mapped(self):
+        writer = ColumnarResultWriter(self.run_dir, columns={"time": "<i8", "value": "<u4"}, chunk_size=7)
+        for i in range(20): # Crosses several chunk boundaries
+            writer.append(time=i, value=2**32 - 1 - i)
+        writer.append_chunk(time=np.arange(20, 36), value=np.arange(16)) # Split into chunks of 7 too
+        writer.close({"total_sdu_sent": 36})
+
+        reader = ColumnarResultReader(self.run_dir)
+        self.assertEqual(len(reader), 36)
+        self.assertEqual(reader.summary, {"total_sdu_sent": 36})
+        value = reader.column("value")
+        self.assertIsInstance(value, ChunkedColumn)
+        self.assertEqual(len(value), 36)
+        self.assertEqual(value.num_chunks, 6) # 7 + 7 + 6 (flushed at append_chunk) + 7 + 7 + 2
+        self.assertEqual(value[:3].tolist(), [2**32 - 1, 2**32 - 2, 2**32 - 3])
+        self.assertEqual(value[5:16:3].tolist(), [2**32 - 1 - i for i in range(5, 16, 3)]) # Spans chunks
+        self.assertEqual((value[-1], value[19], value[20]), (15, 2**32 - 20, 0))
+        self.assertEqual(np.asarray(value).dtype, np.dtype("<u4"))
+        self.assertEqual(reader.column("time").tolist(), list(range(36)))
+        with self.assertRaises(IndexError):
+            value[36]
+        with self.assertRaises(KeyError):
+            reader.column("missing")
+
+    def test_compressed_on_disk_and_readable_while_writing(self):
+        writer = ColumnarResultWriter(self.run_dir, chunk_size=1000)
+        for i in range(2500):
+            writer.append(time=i, tx_count=i, rx_deliv=i, rx_next=i + 1, buffer_size=0)
+        self.assertLess(os.path.getsize(os.path.join(self.run_dir, "time.zcol")), 2000 * 8 // 4)
+        # Complete chunks are visible before close(); the last 500 samples are still buffered
+        self.assertEqual(len(ChunkedColumn(os.path.join(self.run_dir, "tx_count.zcol"), "<u4")), 2000)
+        writer.close()
+        self.assertEqual(ColumnarResultReader(self.run_dir).column("rx_next")[2499], 2500)
+
+    def test_stored_without_compression(self):
+        writer = ColumnarResultWriter(self.run_dir, compress_level=0)
+        writer.append(time=0, tx_count=1, rx_deliv=0, rx_next=1, buffer_size=1)
+        writer.close()
+        self.assertEqual(ColumnarResultReader(self.run_dir).plot_data()["tx_count"], [1])
+
+    def test_empty_run(self):
+        ColumnarResultWriter(self.run_dir).close()
+        reader = ColumnarResultReader(self.run_dir)
+        self.assertEqual(reader.plot_data()["time"], [])
+        self.assertEqual(reader.column("time")[:].tolist(), [])
+
+    def test_run_simulation_streams_same_samples(self):
+        params = simulation_params({"SIMULATION_PACKETS": 3000, "PLOT_GRANULARITY": 10}, seed=3)
+        in_memory = sim_main.run_simulation(params)
+
+        writer = ColumnarResultWriter(self.run_dir, chunk_size=64)
+        streamed = sim_main.run_simulation(params, sample_writer=writer)
+        sim_main.save_results_columnar(streamed, writer)
+
+        self.assertEqual(streamed["plot_data"]["time"], [])
+        reader = ColumnarResultReader(self.run_dir)
+        self.assertEqual(reader.plot_data(), in_memory["plot_data"])
+        self.assertEqual(reader.summary["rx_status"], in_memory["rx_status"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,15 @@
 import dataclasses
+import random
 import unittest
 import logging
-from src.pdcp_entity import PDCPTransmitter, PDCPReceiver
+import numpy as np
+from src.pdcp_entity import PDCPTransmitter, PDCPReceiver, RX_ACCEPTED, RX_DUPLICATE, RX_CORRUPTED
 from src.channel_simulator import ImpairedChannel
 from src.pdcp_packet import PDCP_PDU
+from src.tracing import Tracer
 import config as sim_config # Default config
+import main as sim_main
+from cell_simulation import simulation_params
 
 # Suppress INFO/DEBUG logs from src during tests for cleaner output, unless specifically debugging tests.
 # logging.getLogger('src.pdcp_entity').setLevel(logging.WARNING)
@@ -193,6 +198,28 @@ class TestPDCPSimulationScenarios(unittest.TestCase):
         # RX_DELIV should be TX_NEXT because all subsequent packets were delivered after timer expiry
         self.assertEqual(self.rx.rx_deliv, self.tx.tx_next, "RX_DELIV should advance to TX_NEXT after expiry and flush")
 
+    def test_t_reordering_time_based_expiry(self):
+        # t-Reordering of 5 ms on the simulated clock; one SDU per ms, SDU 2 lost
+        self.rx = PDCPReceiver(sn_length=self.sn_length, t_reordering_threshold=1000, t_reordering_ms=5)
+        num_packets = 12
+        lost_sdu_id = 2
+        for i in range(num_packets):
+            pdu = self.tx.send_sdu(sdu_id=i, sdu_payload=f"data_{i}")
+            if pdu.sdu_id == lost_sdu_id:
+                continue
+            for p_out_ch in self.channel.transmit([pdu], now_ms=float(i)):
+                self.rx.receive_pdu(p_out_ch)
+            if lost_sdu_id < i < 8:
+                # Gap at COUNT 2 detected at t=3 ms; timer must not fire before t=8 ms
+                self.assertEqual(self.rx.rx_deliv, lost_sdu_id)
+
+        stats = self.rx.get_status()
+        self.assertNotIn(lost_sdu_id, self.rx.delivered_sdu_ids)
+        self.assertEqual(stats["delivered_sdu_count"], num_packets - 1)
+        self.assertTrue(stats["out_of_order_deliveries"] > 0)
+        self.assertEqual(self.rx.rx_deliv, self.tx.tx_next)
+        self.assertFalse(self.rx.t_reordering_timer_active)
+
     def test_loss_reorder_across_wrap_around(self):
         # This is a complex scenario. We need enough packets for SN wrap.
         # And specific loss/reordering around the wrap point.
@@ -269,6 +296,193 @@ class TestPDCPSimulationScenarios(unittest.TestCase):
         self.assertEqual(stats["delivered_sdu_count"], num_total_packets -1 ) # -1 because the late one was discarded and not redelivered.
         self.assertEqual(self.rx.rx_deliv, num_total_packets)
 
+    def test_batch_receive_matches_scalar(self):
+        # Same impaired arrival sequence fed through receive_pdu() and receive_batch()
+        random.seed(1234)
+        channel = ImpairedChannel(loss_rate=0.05, reordering_rate=0.3, duplication_rate=0.05, corruption_rate=0.02)
+        arrivals = []
+        for i in range(3 * (2**self.sn_length)):
+            arrivals.extend(channel.transmit([self.tx.send_sdu(sdu_id=i, sdu_payload=f"data_{i}")]))
+
+        rx_batch = PDCPReceiver(sn_length=self.sn_length, t_reordering_threshold=sim_config.T_REORDERING_THRESHOLD)
+        scalar_outcomes = [self.rx.receive_pdu(p) for p in arrivals]
+        batch_outcomes = []
+        for start in range(0, len(arrivals), 500):
+            chunk = arrivals[start:start + 500]
+            batch_outcomes.extend(rx_batch.receive_batch(
+                [p.sn for p in chunk],
+                corrupted_mask=[p.is_corrupted for p in chunk],
+                sdu_ids=[p.sdu_id for p in chunk]).tolist())
+        self.rx.flush_buffer()
+        rx_batch.flush_buffer()
+
+        self.assertEqual(batch_outcomes, scalar_outcomes)
+        self.assertEqual(rx_batch.get_status(), self.rx.get_status())
+        self.assertEqual(rx_batch.delivered_sdu_ids, self.rx.delivered_sdu_ids)
+        self.assertGreater(scalar_outcomes.count(RX_ACCEPTED), 0)
+        self.assertGreater(scalar_outcomes.count(RX_DUPLICATE), 0)
+        self.assertGreater(scalar_outcomes.count(RX_CORRUPTED), 0)
+
+    def test_batch_ending_in_corrupted_pdu_matches_scalar(self):
+        # SDU 2 lost, t-Reordering of 5 ms; only the trailing corrupted PDU's arrival (t=20 ms) is late enough to expire it
+        arrivals = [PDCP_PDU(sdu_id=i, sn=i, count=i, hfn=0, arrival_time=float(i)) for i in range(6) if i != 2]
+        arrivals.append(PDCP_PDU(sdu_id=6, sn=6, count=6, hfn=0, is_corrupted=True, arrival_time=20.0))
+        scalar, batch = (PDCPReceiver(sn_length=12, t_reordering_threshold=1000, t_reordering_ms=5,
+                                      tracer=Tracer(ring_capacity=32)) for _ in range(2))
+        scalar_outcomes = [scalar.receive_pdu(p) for p in arrivals]
+        batch_outcomes = batch.receive_batch([p.sn for p in arrivals], corrupted_mask=[p.is_corrupted for p in arrivals],
+                                             sdu_ids=[p.sdu_id for p in arrivals],
+                                             arrival_times=[p.arrival_time for p in arrivals]).tolist()
+
+        self.assertEqual(batch_outcomes, scalar_outcomes)
+        self.assertEqual(scalar_outcomes[-1], RX_CORRUPTED)
+        self.assertEqual(scalar.rx_deliv, 6) # The timer fired at t=20 ms
+        self.assertEqual(batch.get_status(), scalar.get_status())
+        self.assertEqual(batch.tracer.recent_events(), scalar.tracer.recent_events())
+
+
+class TestImpairedChannelBatch(unittest.TestCase):
+
+    def _scalar_run(self, channel, num_pdus):
+        tx = PDCPTransmitter(sn_length=12)
+        arrivals = []
+        for i in range(num_pdus):
+            arrivals.extend(channel.transmit([tx.send_sdu(sdu_id=i)], now_ms=i * 0.5))
+        return arrivals
+
+    def _channel(self, seed):
+        return ImpairedChannel(loss_rate=0.1, reordering_rate=0.5, duplication_rate=0.1, corruption_rate=0.05, seed=seed)
+
+    def test_batch_matches_per_pdu_transmit(self):
+        num_pdus = 5000
+        scalar_channel, batch_channel = self._channel(42), self._channel(42)
+        arrivals = self._scalar_run(scalar_channel, num_pdus)
+
+        indices, corrupted_mask, arrival_times = [], [], []
+        for start in range(0, num_pdus, 777): # Uneven block size
+            n = min(777, num_pdus - start)
+            idx, corrupted, times = batch_channel.transmit_batch(n, send_times_ms=(start + np.arange(n)) * 0.5)
+            indices.extend((idx + start).tolist())
+            corrupted_mask.extend(corrupted.tolist())
+            arrival_times.extend(times.tolist())
+
+        self.assertEqual(indices, [p.sdu_id for p in arrivals])
+        self.assertEqual(corrupted_mask, [p.is_corrupted for p in arrivals])
+        self.assertEqual(arrival_times, [p.arrival_time for p in arrivals])
+        self.assertEqual(batch_channel.get_stats(), scalar_channel.get_stats())
+        self.assertGreater(batch_channel.get_stats()["total_reordered_events"], 0)
+
+    def test_scalar_and_batch_calls_share_one_stream(self):
+        mixed, reference = self._channel(3), self._channel(3)
+        self._scalar_run(mixed, 10)
+        mixed.transmit_batch(100)
+        reference.transmit_batch(110)
+        self.assertEqual(mixed.get_stats(), reference.get_stats())
+
+    def test_streams_are_per_instance(self):
+        a, b = self._channel(1), self._channel(2)
+        a_again = self._channel(1)
+        first = a.transmit_batch(1000)[0].tolist()
+        b.transmit_batch(1000) # Another channel drawing in between must not disturb a_again
+        self.assertEqual(first, a_again.transmit_batch(1000)[0].tolist())
+        self.assertNotEqual(a.get_stats(), b.get_stats())
+
+    def test_batched_simulation_matches_per_sdu_loop(self):
+        params = simulation_params({"SIMULATION_PACKETS": 6000, "PAYLOAD_FREE": True, "LOSS_RATE": 0.05,
+                                    "DUPLICATION_RATE": 0.05, "CORRUPTION_RATE": 0.02}, seed=11)
+        scalar = sim_main.run_simulation(params)
+        params.BATCH_SIZE = 1024
+        batched = sim_main.run_simulation(params)
+        self.assertEqual(batched["rx_status"], scalar["rx_status"])
+        self.assertEqual(batched["channel_stats"], scalar["channel_stats"])
+        self.assertEqual(batched["calculated_lost_sdu"], scalar["calculated_lost_sdu"])
+
+
+class TestDelayScheduledChannel(unittest.TestCase):
+
+    def _channel(self, seed, reorder_buffer_size=1000, **kwargs):
+        kwargs.setdefault("jitter_ms", 4.0)
+        return ImpairedChannel(loss_rate=0.02, reordering_rate=0.4, duplication_rate=0.05, corruption_rate=0.02,
+                               reorder_buffer_size=reorder_buffer_size, propagation_delay_ms=1.0, seed=seed,
+                               burst_loss=(0.01, 0.2, 0.6), **kwargs)
+
+    def _scalar_run(self, channel, num_pdus):
+        tx = PDCPTransmitter(sn_length=12)
+        arrivals = []
+        for i in range(num_pdus):
+            arrivals.extend(channel.transmit([tx.send_sdu(sdu_id=i)], now_ms=i * 0.5))
+        return arrivals + channel.flush()
+
+    def _batch_run(self, channel, num_pdus, block):
+        indices, corrupted_mask, arrival_times = [], [], []
+        start = 0
+        for start in range(0, num_pdus, block):
+            n = min(block, num_pdus - start)
+            idx, corrupted, times = channel.transmit_batch(n, send_times_ms=(start + np.arange(n)) * 0.5)
+            indices.extend((idx + start).tolist())
+            corrupted_mask.extend(corrupted.tolist())
+            arrival_times.extend(times.tolist())
+        idx, corrupted, times = channel.flush_batch()
+        return indices + (idx + start).tolist(), corrupted_mask + corrupted.tolist(), arrival_times + times.tolist()
+
+    def test_batch_matches_per_pdu_transmit(self):
+        # A small in-flight limit exercises forced early releases (and the batch path's heap walk)
+        for distribution, limit in [("exponential", 1000), ("pareto", 1000), ("uniform", 3)]:
+            scalar_channel = self._channel(5, limit, jitter_distribution=distribution)
+            batch_channel = self._channel(5, limit, jitter_distribution=distribution)
+            arrivals = self._scalar_run(scalar_channel, 5000)
+            indices, corrupted_mask, arrival_times = self._batch_run(batch_channel, 5000, 777)
+            self.assertEqual(indices, [p.sdu_id for p in arrivals])
+            self.assertEqual(corrupted_mask, [p.is_corrupted for p in arrivals])
+            self.assertEqual(arrival_times, [p.arrival_time for p in arrivals])
+            self.assertEqual(batch_channel.get_stats(), scalar_channel.get_stats())
+            self.assertEqual(scalar_channel.get_stats()["total_forced_releases"] > 0, limit == 3)
+
+    def test_single_pdu_transmits_are_reordered(self):
+        channel = self._channel(9)
+        arrivals = self._scalar_run(channel, 3000)
+        sdu_ids = [p.sdu_id for p in arrivals]
+        arrival_times = [p.arrival_time for p in arrivals]
+        stats = channel.get_stats()
+        self.assertEqual(arrival_times, sorted(arrival_times)) # PDUs leave in delivery order
+        self.assertNotEqual(sdu_ids, sorted(sdu_ids))
+        self.assertGreater(stats["total_reordered_events"], 100)
+        self.assertEqual(len(arrivals), stats["total_passed_through"])
+        self.assertEqual(stats["total_passed_through"], 3000 - stats["total_lost"] + stats["total_duplicated"])
+        self.assertTrue(all(t >= i * 0.5 + 1.0 for t, i in zip(arrival_times, sdu_ids)))
+        with self.assertRaises(ValueError):
+            channel.transmit([PDCPTransmitter(sn_length=12).send_sdu(sdu_id=0)])
+
+    def test_burst_losses_cluster(self):
+        # Same mean loss rate, very different loss run lengths
+        p_good_to_bad, p_bad_to_good = 0.01, 0.1
+        bursty = ImpairedChannel(0.0, 0, 0, 0, seed=2, burst_loss=(p_good_to_bad, p_bad_to_good, 1.0))
+        mean_loss = p_good_to_bad / (p_good_to_bad + p_bad_to_good)
+        uniform = ImpairedChannel(mean_loss, 0, 0, 0, seed=2)
+        num_pdus = 100000
+
+        def mean_run_length(channel):
+            received = np.zeros(num_pdus, dtype=bool)
+            received[channel.transmit_batch(num_pdus)[0]] = True
+            runs = np.diff(np.flatnonzero(np.diff(np.concatenate([[1], received, [1]]).astype(np.int8))))[::2]
+            return runs.mean()
+
+        self.assertGreater(mean_run_length(bursty), 5)
+        self.assertLess(mean_run_length(uniform), 1.5)
+        self.assertAlmostEqual(bursty.get_stats()["total_lost"] / num_pdus, mean_loss, delta=0.02)
+        self.assertEqual(bursty.get_stats()["total_lost"], bursty.get_stats()["total_bad_state_pdus"])
+
+    def test_batched_simulation_matches_per_sdu_loop(self):
+        params = simulation_params({"SIMULATION_PACKETS": 6000, "PAYLOAD_FREE": True, "REORDERING_RATE": 0.3,
+                                    "CHANNEL_JITTER_MS": 2.0, "T_REORDERING_MS": 5.0,
+                                    "CHANNEL_BURST_P_GOOD_TO_BAD": 0.005}, seed=4)
+        scalar = sim_main.run_simulation(params)
+        params.BATCH_SIZE = 1000
+        batched = sim_main.run_simulation(params)
+        self.assertEqual(batched["rx_status"], scalar["rx_status"])
+        self.assertEqual(batched["channel_stats"], scalar["channel_stats"])
+        self.assertGreater(scalar["rx_status"]["out_of_order_deliveries"], 0)
+
 
 if __name__ == '__main__':
     # If you want to run tests with more verbose logging from the main modules:
@@ -0,0 +1,53 @@
+import unittest
+from src.pdcp_entity import PDCPReceiver
+from src.pdcp_packet import PDCP_PDU
+from src.stage_timing import StageTimers, STAGE_RX_HFN_DERIVATION, STAGE_RX_BUFFERING, STAGE_RX_DELIVERY, \
+    STAGE_RX_T_REORDERING, STAGE_RX_T_REORDERING_EXPIRY
+import main as sim_main
+from cell_simulation import simulation_params
+
+
+class TestStageTimers(unittest.TestCase):
+
+    def test_counts_total_and_max(self):
+        timers = StageTimers(enabled=True)
+        for elapsed in (5, 20, 11):
+            timers.add("x", elapsed)
+        self.assertEqual(timers.snapshot(), {"x": {"calls": 3, "total_ns": 36, "max_ns": 20, "mean_ns": 12.0}})
+        timers.reset()
+        self.assertEqual(timers.snapshot(), {})
+
+    def test_receiver_stages(self):
+        rx = PDCPReceiver(sn_length=12, t_reordering_threshold=2, timers=StageTimers(enabled=True))
+        for count in [0, 2, 3, 4, 2]: # COUNT 1 lost, then a duplicate
+            rx.receive_pdu(PDCP_PDU(sdu_id=count, sn=count, count=count, hfn=0))
+        timing = rx.get_status()["stage_timing"]
+        self.assertEqual(timing[STAGE_RX_HFN_DERIVATION]["calls"], 5)
+        self.assertEqual(timing[STAGE_RX_BUFFERING]["calls"], 5)
+        self.assertEqual(timing[STAGE_RX_DELIVERY]["calls"], 4) # Not reached by the duplicate
+        self.assertEqual(timing[STAGE_RX_T_REORDERING]["calls"], 4)
+        self.assertEqual(timing[STAGE_RX_T_REORDERING_EXPIRY]["calls"], 1)
+        self.assertGreaterEqual(timing[STAGE_RX_T_REORDERING]["total_ns"], timing[STAGE_RX_T_REORDERING_EXPIRY]["total_ns"])
+
+    def test_off_by_default(self):
+        rx = PDCPReceiver(sn_length=12, t_reordering_threshold=2)
+        rx.receive_pdu(PDCP_PDU(sdu_id=0, sn=0, count=0, hfn=0))
+        self.assertNotIn("stage_timing", rx.get_status())
+        self.assertEqual(rx.timers.snapshot(), {})
+
+    def test_run_simulation_stage_timing(self):
+        params = simulation_params({"SIMULATION_PACKETS": 2000, "PAYLOAD_FREE": True, "LOSS_RATE": 0.05}, seed=3)
+        self.assertNotIn("stage_timing", sim_main.run_simulation(params))
+        params.STAGE_TIMING = True
+        for batch_size, tx_calls in [(0, 2000), (500, 4)]:
+            params.BATCH_SIZE = batch_size
+            results = sim_main.run_simulation(params)
+            self.assertEqual(results["stage_timing"]["tx"]["calls"], tx_calls)
+            self.assertEqual(results["stage_timing"]["flush"]["calls"], 1)
+            self.assertIn(STAGE_RX_BUFFERING, results["stage_timing"])
+            self.assertEqual(results["rx_status"]["stage_timing"][STAGE_RX_BUFFERING],
+                             results["stage_timing"][STAGE_RX_BUFFERING])
+
+
+if __name__ == '__main__':
+    unittest.main()
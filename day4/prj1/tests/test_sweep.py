@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+from sweep import SweepSpec, run_sweep, run_seed, confidence_interval
+
+
+class TestSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.spec = SweepSpec(grid={"LOSS_RATE": [0.0, 0.05], "SN_LENGTH_BITS": [12, 18]}, replicates=3, base_seed=5,
+                              base_overrides={"PAYLOAD_FREE": True, "SIMULATION_PACKETS": 200})
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.results_path = os.path.join(self.tmpdir.name, "runs.jsonl")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_results_independent_of_worker_count(self):
+        one = run_sweep(self.spec, workers=1)
+        two = run_sweep(self.spec, workers=2)
+        self.assertEqual(len(one["points"]), 4)
+        self.assertEqual(one["points"], two["points"])
+        for entry in one["points"]:
+            self.assertEqual(entry["replicates"], 3)
+            delivered = entry["metrics"]["delivered_sdu_count"]
+            self.assertLessEqual(delivered["ci95_low"], delivered["mean"])
+            self.assertLessEqual(delivered["mean"], delivered["ci95_high"])
+
+    def test_resume_skips_finished_runs(self):
+        full = run_sweep(self.spec, results_path=self.results_path, workers=1)
+        self.assertEqual(full["run"]["runs_executed"], 12)
+
+        # Simulate an interrupted sweep: keep 5 runs plus a torn half-written line
+        with open(self.results_path) as f:
+            lines = f.readlines()
+        with open(self.results_path, "w") as f:
+            f.writelines(lines[:5])
+            f.write(lines[5][:20])
+
+        resumed = run_sweep(self.spec, results_path=self.results_path, workers=1)
+        self.assertEqual(resumed["run"]["runs_resumed"], 5)
+        self.assertEqual(resumed["run"]["runs_executed"], 7)
+        self.assertEqual(resumed["points"], full["points"])
+
+        again = run_sweep(self.spec, results_path=self.results_path, workers=1)
+        self.assertEqual(again["run"]["runs_executed"], 0)
+
+    def test_seeds_stable_when_grid_grows(self):
+        point = {"LOSS_RATE": 0.05, "SN_LENGTH_BITS": 12}
+        self.assertEqual(run_seed(5, point, 0), run_seed(5, dict(reversed(list(point.items()))), 0))
+        self.assertNotEqual(run_seed(5, point, 0), run_seed(5, point, 1))
+        self.assertNotEqual(run_seed(5, point, 0), run_seed(6, point, 0))
+
+    def test_confidence_interval(self):
+        ci = confidence_interval([10, 12, 14])
+        self.assertAlmostEqual(ci["mean"], 12)
+        self.assertAlmostEqual(ci["std"], 2)
+        self.assertAlmostEqual(ci["ci95_high"] - ci["mean"], 4.303 * 2 / 3 ** 0.5)
+        self.assertEqual(confidence_interval([7])["ci95_low"], 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
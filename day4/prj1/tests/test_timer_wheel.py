@@ -0,0 +1,58 @@
+import unittest
+from src.timer_wheel import TimerWheel
+
+
+class TestTimerWheel(unittest.TestCase):
+
+    def test_fires_in_time_order_across_levels(self):
+        wheel = TimerWheel(tick_ms=1.0, slots_per_level=64, levels=3)
+        fired = []
+        # Delays spanning level 0, level 1, level 2 and the overflow set
+        delays = [3, 63, 64, 65, 500, 4095, 4096, 5000, 300000]
+        for delay in delays:
+            wheel.schedule(delay, lambda d=delay: fired.append((d, wheel.now_ms)))
+        self.assertEqual(len(wheel), len(delays))
+
+        wheel.advance_to(300000)
+        self.assertEqual([d for d, _ in fired], sorted(delays))
+        for delay, fired_at in fired:
+            self.assertEqual(fired_at, delay, f"Timer for {delay} ms fired at {fired_at} ms")
+        self.assertEqual(len(wheel), 0)
+
+    def test_cancel(self):
+        wheel = TimerWheel()
+        fired = []
+        keep = wheel.schedule(10, lambda: fired.append("keep"))
+        drop = wheel.schedule(10, lambda: fired.append("drop"))
+        wheel.cancel(drop)
+        wheel.cancel(drop) # Cancelling twice is harmless
+        self.assertFalse(drop.active)
+        self.assertTrue(keep.active)
+        wheel.advance_to(9.5)
+        self.assertEqual(fired, [])
+        wheel.advance_to(10)
+        self.assertEqual(fired, ["keep"])
+
+    def test_many_arm_cancel_cycles(self):
+        wheel = TimerWheel(tick_ms=0.5)
+        for i in range(100000):
+            timer = wheel.schedule(20, lambda: None)
+            wheel.cancel(timer)
+        self.assertEqual(len(wheel), 0)
+        wheel.advance_to(1000)
+        self.assertEqual(wheel.fired_count, 0)
+
+    def test_callback_can_rearm(self):
+        wheel = TimerWheel()
+        fired_at = []
+        def on_expiry():
+            fired_at.append(wheel.now_ms)
+            if len(fired_at) < 3:
+                wheel.schedule(7, on_expiry)
+        wheel.schedule(7, on_expiry)
+        wheel.advance_to(100)
+        self.assertEqual(fired_at, [7, 14, 21])
+
+
+if __name__ == '__main__':
+    unittest.main()
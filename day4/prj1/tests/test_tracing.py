@@ -0,0 +1,51 @@
+import logging
+import unittest
+from src.pdcp_entity import PDCPReceiver
+from src.pdcp_packet import PDCP_PDU
+from src.tracing import Tracer, EV_RX_DELIVERED
+
+
+class TestTracer(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("test_tracing")
+        self.logger.setLevel(logging.INFO)
+
+    def test_level_flags_snapshot(self):
+        tracer = Tracer(logger=self.logger)
+        self.assertFalse(tracer.debug)
+        self.assertTrue(tracer.info)
+        self.logger.setLevel(logging.DEBUG)
+        self.assertFalse(tracer.debug) # Not seen until refresh()
+        tracer.refresh()
+        self.assertTrue(tracer.debug)
+
+    def test_sampling_one_in_n(self):
+        tracer = Tracer(logger=self.logger, sample_every=4)
+        hits = [tracer.sampled() for _ in range(12)]
+        self.assertEqual(sum(hits), 3)
+        self.assertEqual(hits[:4], [True, False, False, False])
+
+    def test_ring_keeps_most_recent_events(self):
+        tracer = Tracer(logger=self.logger, ring_capacity=3)
+        for count in range(5):
+            tracer.record(EV_RX_DELIVERED, count, count + 100)
+        self.assertEqual(tracer.recent_events(),
+                         [("EV_RX_DELIVERED", 2, 102), ("EV_RX_DELIVERED", 3, 103), ("EV_RX_DELIVERED", 4, 104)])
+        with self.assertLogs(self.logger, level="ERROR") as logs:
+            tracer.dump()
+        self.assertEqual(len(logs.records), 4) # Header + 3 events
+
+    def test_receiver_records_events_with_logging_off(self):
+        self.logger.setLevel(logging.CRITICAL)
+        tracer = Tracer(logger=self.logger, ring_capacity=8)
+        rx = PDCPReceiver(sn_length=12, t_reordering_threshold=5, tracer=tracer)
+        rx.receive_pdu(PDCP_PDU(sdu_id=0, sn=0, count=0, hfn=0, original_sdu_payload="a"))
+        rx.receive_pdu(PDCP_PDU(sdu_id=0, sn=0, count=0, hfn=0, original_sdu_payload="a"))
+        names = [name for name, _, _ in tracer.recent_events()]
+        self.assertIn("EV_RX_DELIVERED", names)
+        self.assertEqual(names[-1], "EV_RX_DUPLICATE")
+
+
+if __name__ == '__main__':
+    unittest.main()